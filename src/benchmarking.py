@@ -5,7 +5,7 @@ from typing import List
 import numpy as np
 from matplotlib import pyplot as plt
 
-from circuit import Circuit
+from circuit import Circuit, addition_circuit, superposition_circuit
 from gate import GatesIdentfications, Gate
 from simulators.db_simulator.db_simulator import DBSimulator
 from simulators.db_simulator_state_drop.db_simulator_state_drop import DBSimulatorStateDrop
@@ -26,14 +26,9 @@ class Benchmark():
                        range(1, max_input_size + 1) for
                        non_det_qubits in range(min(max_non_det_qubits + 1, 2 * input_size + 1))} for alg in
             self.algorithms}
-        circuit = Circuit()
         for input_size in range(1, max_input_size + 1):
             for non_det in range(min(max_non_det_qubits + 1, 2 * input_size + 1)):
-                circuit.set_addition_circuit(range(input_size), range(input_size, 2 * input_size),
-                                             range(2 * input_size, 3 * input_size + 1),
-                                             range(3 * input_size + 1, 3 * input_size + 5))
-                for h in range(non_det):
-                    circuit.prepend_gate(Gate(GatesIdentfications.hadamard, [h]))
+                circuit = addition_circuit(input_size, non_det)
                 for alg in self.algorithms:
                     for j in range(self.iterations):
                         now = datetime.now()
@@ -87,9 +82,7 @@ class Benchmark():
             self.algorithms}
         for input_size in range(1, max_size + 1):
             for non_det in range(min(max_size + 1, input_size + 1)):
-                circuit = Circuit()
-                for h in range(non_det):
-                    circuit.prepend_gate(Gate(GatesIdentfications.hadamard, [h]))
+                circuit = superposition_circuit(non_det)
                 for alg in self.algorithms:
                     for j in range(self.iterations):
                         now = datetime.now()
@@ -115,10 +108,15 @@ class Benchmark():
 
 
 class BenchmarkStateDrop():
-    def __init__(self, iterations: int, output_file: str):
+    def __init__(self, iterations: int, output_file: str, state_drop_simulator: DBSimulatorStateDrop = None):
+        """
+        :param state_drop_simulator: The state drop simulator to compare, e.g. with a probability budget, by default
+        one which keeps 1000 basis states
+        """
         self.iterations = iterations
         self.output_file = output_file
-        self.algorithms = [DBSimulatorStateDrop(), DBSimulator()]
+        self.algorithms = [state_drop_simulator if state_drop_simulator is not None else DBSimulatorStateDrop(),
+                           DBSimulator()]
         self.data = []
 
     def benchmark(self, circuit: Circuit):
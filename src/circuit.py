@@ -69,3 +69,27 @@ class Circuit:
         if qubits == set([]):
             return 1
         return max(qubits)
+
+
+def addition_circuit(input_size, non_det):
+    """
+    :return: The addition circuit of two numbers with input_size qubits each on 3 * input_size + 5 qubits, with the
+    first non_det input qubits in superposition
+    """
+    circuit = Circuit()
+    circuit.set_addition_circuit(range(input_size), range(input_size, 2 * input_size),
+                                 range(2 * input_size, 3 * input_size + 1),
+                                 range(3 * input_size + 1, 3 * input_size + 5))
+    for h in range(non_det):
+        circuit.prepend_gate(Gate(GatesIdentfications.hadamard, [h]))
+    return circuit
+
+
+def superposition_circuit(non_det):
+    """
+    :return: A circuit which only puts the first non_det qubits into superposition
+    """
+    circuit = Circuit()
+    for h in range(non_det):
+        circuit.prepend_gate(Gate(GatesIdentfications.hadamard, [h]))
+    return circuit
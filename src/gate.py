@@ -16,6 +16,11 @@ class GatesIdentfications(IntEnum):
     diffusion = 10
 
 
+# Gates which only permute or reset the basis states, without changing amplitudes or creating new states
+PERMUTATION_GATES = [GatesIdentfications.cnot, GatesIdentfications.ccnot, GatesIdentfications.paulix,
+                     GatesIdentfications.reset]
+
+
 class Gate:
     def __init__(self, gatter: GatesIdentfications, qubits: List[int]):
         self.qubits = qubits
@@ -2,9 +2,15 @@ from benchmarking import Benchmark, BenchmarkStateDrop
 from circuit import Circuit
 from simulators.array_simulator.array_simulator import ArraySimulator
 from simulators.db_simulator.db_simulator import DBSimulator
+from simulators.db_simulator_integer_key.db_simulator_integer_key import DBSimulatorIntegerKey
 from simulators.db_simulator_state_drop.db_simulator_state_drop import DBSimulatorStateDrop
+from simulators.mixed_simulator.calibration import calibrate
+from simulators.mixed_simulator.cost_model import CALIBRATION_FILE
 from simulators.mixed_simulator.mixed_simulator import MixedSimulator
+from simulators.qiskit.aer_options import AerOptions
 from simulators.qiskit.qiskit_simulator import QiskitSimulator
+from simulators.reversible_simulator.reversible_simulator import ReversibleSimulator
+from simulators.statevector_simulator.statevector_simulator import StatevectorSimulator
 
 if __name__ == "__main__":
     # Constants for benchmarking
@@ -12,8 +18,14 @@ if __name__ == "__main__":
     benchmark_type = "StateDrop"
     output_dir_state_drop = "output-state-drop/"
     output_dir_almost_all = "output-almost-all/"
+    output_dir_without_rowid = "output-without-rowid/"
+    output_dir_grover = "output-grover/"
     iterations = 10
-    algorithms = [DBSimulator(), QiskitSimulator(), ArraySimulator(), MixedSimulator()]
+    # Performance options of the qiskit simulator, e.g. AerOptions(max_parallel_threads=0, precision="single")
+    aer_options = AerOptions()
+    algorithms = [DBSimulator(), QiskitSimulator(aer_options=aer_options), ArraySimulator(), StatevectorSimulator(),
+                  MixedSimulator(dense_simulator=QiskitSimulator(aer_options=aer_options),
+                                 calibration_file=CALIBRATION_FILE)]
     max_qubits_superposition = 20
     max_variable_size_addition = 10
     max_nondet_qubits_addition = 2 * max_variable_size_addition
@@ -49,33 +61,76 @@ if __name__ == "__main__":
                 max_qubits_superposition)
 
             print("Benchmarking Addition")
-            algorithms = [DBSimulator(), QiskitSimulator(), MixedSimulator()]
+            algorithms = [DBSimulator(), QiskitSimulator(aer_options=aer_options), ReversibleSimulator(),
+                          MixedSimulator(dense_simulator=QiskitSimulator(aer_options=aer_options),
+                                 calibration_file=CALIBRATION_FILE)]
             Benchmark(iterations, output_dir_almost_all + "addition.csv", algorithms).compare_addition(
                 max_variable_size_addition,
                 max_nondet_qubits_addition)
 
             print("Benchmarking Grover")
-            algorithms = [DBSimulator(), QiskitSimulator(), MixedSimulator()]
+            algorithms = [DBSimulator(), QiskitSimulator(aer_options=aer_options), ArraySimulator(),
+                          MixedSimulator(dense_simulator=QiskitSimulator(aer_options=aer_options),
+                                 calibration_file=CALIBRATION_FILE)]
             Benchmark(iterations, output_dir_almost_all + "grover.csv",
                       algorithms).compare_grover_search_min_of_addition_two_numbers(max_variable_size_grover)
+        elif benchmark_type == "WithoutRowid":
+            print("Benchmarking the database simulators with and without rowid tables")
+
+            print("Benchmarking Superposition")
+            algorithms = [DBSimulator(), DBSimulator(without_rowid=True), DBSimulatorIntegerKey(),
+                          DBSimulatorIntegerKey(without_rowid=True), DBSimulatorStateDrop(),
+                          DBSimulatorStateDrop(without_rowid=True)]
+            Benchmark(iterations, output_dir_without_rowid + "superposition.csv", algorithms).compare_superposition(
+                max_qubits_superposition)
+        elif benchmark_type == "Grover":
+            print("Benchmarking the diffusion operator of the sparse simulators")
+
+            print("Benchmarking Grover")
+            algorithms = [DBSimulator(), DBSimulatorIntegerKey(), ArraySimulator(), StatevectorSimulator()]
+            Benchmark(iterations, output_dir_grover + "grover.csv",
+                      algorithms).compare_grover_search_min_of_addition_two_numbers(max_variable_size_grover)
+        elif benchmark_type == "Calibration":
+            print("Calibrating the cost model of the mixed simulator on this machine")
+            cost_model, heuristic = calibrate(QiskitSimulator(aer_options=aer_options), iterations,
+                                              calibration_file=CALIBRATION_FILE)
+            for name, cost in cost_model.backends.items():
+                print(name, "seconds per gate, state and branching state:", cost.coefficients())
+            print("Heuristic:", heuristic.name)
         else:
             print("There is no known benchmark for: " + benchmark_type)
     else:
         if chosen_simulator == "Qiskit":
             print("Using the qiskit simulator")
-            print("Time taken for this circuit: " + str(QiskitSimulator().run(circuit, circuit.get_required_qubits())))
+            print("Time taken for this circuit: " + str(
+                QiskitSimulator(aer_options=aer_options).run(circuit, circuit.get_required_qubits())))
         elif chosen_simulator == "Database":
             print("Using the database simulator")
             print("Time taken for this circuit: " + str(DBSimulator().run(circuit, circuit.get_required_qubits())))
+        elif chosen_simulator == "DatabaseIntegerKey":
+            print("Using the integer key database simulator")
+            print("Time taken for this circuit: " +
+                  str(DBSimulatorIntegerKey().run(circuit, circuit.get_required_qubits())))
         elif chosen_simulator == "DatabaseStateDrop":
             print("Using the database simulator")
             print("Time taken for this circuit: " +
                   str(DBSimulatorStateDrop().run(circuit, circuit.get_required_qubits())))
+        elif chosen_simulator == "Statevector":
+            print("Using the numpy statevector simulator")
+            print("Time taken for this circuit: " +
+                  str(StatevectorSimulator().run(circuit, circuit.get_required_qubits())))
         elif chosen_simulator == "Array":
             print("Using the array simulator")
             print("Time taken for this circuit: " + str(ArraySimulator().run(circuit, circuit.get_required_qubits())))
+        elif chosen_simulator == "Reversible":
+            print("Using the reversible array simulator")
+            print("Time taken for this circuit: " +
+                  str(ReversibleSimulator().run(circuit, circuit.get_required_qubits())))
         elif chosen_simulator == "Mixed":
             print("Using the mixed simulator")
-            print("Time taken for this circuit: " + str(MixedSimulator().run(circuit, circuit.get_required_qubits())))
+            print("Time taken for this circuit: " + str(
+                MixedSimulator(dense_simulator=QiskitSimulator(aer_options=aer_options),
+                               calibration_file=CALIBRATION_FILE).run(
+                    circuit, circuit.get_required_qubits())))
         else:
             print("No valid simulator found for: " + chosen_simulator)
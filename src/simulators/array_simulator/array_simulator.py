@@ -5,122 +5,337 @@ import numpy as np
 from gate import GatesIdentfications
 from simulators.simulator import Simulator
 
+WORD_SIZE = 64
+
 
 class ArraySimulator(Simulator):
+    """
+    Sparse simulator which only stores the basis states with an amplitude. Every basis state is bit packed into
+    uint64 words (qubit q is bit q % 64 of word q // 64), the amplitudes are kept in a separate complex128 array.
+    """
 
-    def __init__(self):
-        self.state = None
+    def __init__(self, amplitude_cutoff: float = None, maximum_states: int = None):
+        """
+        Without arguments the simulation is exact. Otherwise, like the DBSimulatorStateDrop, basis states are dropped
+        after every Hadamard, Pauli Y and diffusion gate:
+        :param amplitude_cutoff: Basis states whose amplitude has a smaller absolute value are dropped
+        :param maximum_states: Only this amount of basis states with the largest amplitudes is kept
+        """
+        assert maximum_states is None or maximum_states > 0
+        self.basis_states = None
+        self.amplitudes = None
         self.amnt_qubits = None
+        self.amplitude_cutoff = amplitude_cutoff
+        self.maximum_states = maximum_states
+        self.discarded_probability = 0.0
+        # Called after every gate with the gate and the amount of stored basis states
+        self.gate_callback = None
         self.name = "ArraySimulator"
+        if amplitude_cutoff is not None or maximum_states is not None:
+            self.name = "ArraySimulatorStateDrop"
 
     def run(self, gates, amnt_qubits=None) -> float:
         start = time.process_time()
         if amnt_qubits is not None:
-            self.amnt_qubits = amnt_qubits
-            self.state = np.zeros((1, self.amnt_qubits + 2))
-            self.state[0, -2] = 1.0
+            self.init_state(amnt_qubits)
         for gate in gates:
-            if gate.gatter == GatesIdentfications.cnot:
-                self.execute_cnot(gate.qubits)
-            elif gate.gatter == GatesIdentfications.ccnot:
-                self.execute_ccnot(gate.qubits)
-            elif gate.gatter == GatesIdentfications.paulix:
-                self.execute_paulix(gate.qubits)
-            elif gate.gatter == GatesIdentfications.pauliy:
-                self.execute_pauliy(gate.qubits)
-            elif gate.gatter == GatesIdentfications.pauliz:
-                self.execute_pauliz(gate.qubits)
-            elif gate.gatter == GatesIdentfications.hadamard:
-                self.execute_hadamard(gate.qubits)
-            elif gate.gatter == GatesIdentfications.reset:
-                self.reset_qubits(gate.qubits)
-            else:
-                print("Unknown Gate Type")
-                raise
-        self.get_state()
+            self.execute_gate(gate)
+            self.report_states([gate])
+        self.aggregate_state()
         end = time.process_time()
         return end - start
 
+    def amnt_states(self):
+        """
+        :return: The amount of stored basis states. It is an upper bound of the basis states with an amplitude, since
+        basis states whose amplitude became zero are kept and the basis states merged by a reset are only aggregated by
+        the next Hadamard or diffusion.
+        """
+        return self.basis_states.shape[0]
+
+    def report_states(self, gates):
+        if self.gate_callback is not None:
+            for gate in gates:
+                self.gate_callback(gate, self.amnt_states())
+
+    def execute_gate(self, gate):
+        if gate.gatter == GatesIdentfications.cnot:
+            self.execute_cnot(gate.qubits)
+        elif gate.gatter == GatesIdentfications.ccnot:
+            self.execute_ccnot(gate.qubits)
+        elif gate.gatter == GatesIdentfications.paulix:
+            self.execute_paulix(gate.qubits)
+        elif gate.gatter == GatesIdentfications.pauliy:
+            self.execute_pauliy(gate.qubits)
+        elif gate.gatter == GatesIdentfications.pauliz:
+            self.execute_pauliz(gate.qubits)
+        elif gate.gatter == GatesIdentfications.hadamard:
+            self.execute_hadamard(gate.qubits)
+        elif gate.gatter == GatesIdentfications.reset:
+            self.reset_qubits(gate.qubits)
+        elif gate.gatter == GatesIdentfications.invert_all_zero:
+            self.invert_all_zero(gate.qubits)
+        elif gate.gatter == GatesIdentfications.invert_some_one:
+            self.invert_some_one(gate.qubits)
+        elif gate.gatter == GatesIdentfications.invert_all_one:
+            self.invert_all_one(gate.qubits)
+        elif gate.gatter == GatesIdentfications.diffusion:
+            self.diffusion(gate.qubits)
+        else:
+            print("Unknown Gate Type")
+            raise
+
     def init_state(self, amnt_qubits):
         self.amnt_qubits = amnt_qubits
-        self.state = np.zeros((1, self.amnt_qubits + 2))
-        self.state[0, -2] = 1.0
+        self.discarded_probability = 0.0
+        self.basis_states = np.zeros((1, self.amnt_words()), dtype=np.uint64)
+        self.amplitudes = np.ones(1, dtype=np.complex128)
 
     def init_with_state(self, state):
-        self.state = np.array(state)
+        """
+        :param state: Rows of the form [q0, ..., qn, real part, imaginary part], the same format get_state returns
+        """
+        state = np.array(state, dtype=np.float64)
+        self.amnt_qubits = state.shape[1] - 2
+        self.discarded_probability = 0.0
+        self.basis_states = self.pack_bits(state[:, :-2].astype(np.uint64))
+        self.amplitudes = state[:, -2] + 1j * state[:, -1]
+
+    def init_with_arrays(self, amnt_qubits, basis_states, amplitudes):
+        """
+        :param basis_states: Either a (states, amnt_qubits) array with the qubit values or, for up to 64 qubits, a one
+        dimensional array of keys where bit q is the value of qubit q
+        :param amplitudes: The complex amplitudes of the basis states
+        """
+        self.amnt_qubits = amnt_qubits
+        self.discarded_probability = 0.0
+        basis_states = np.asarray(basis_states)
+        if basis_states.ndim == 1:
+            assert amnt_qubits <= WORD_SIZE
+            self.basis_states = basis_states.astype(np.uint64)[:, np.newaxis]
+        else:
+            self.basis_states = self.pack_bits(basis_states.astype(np.uint64).reshape(-1, amnt_qubits))
+        self.amplitudes = np.array(amplitudes, dtype=np.complex128)
+
+    def amnt_words(self):
+        return max(1, (self.amnt_qubits + WORD_SIZE - 1) // WORD_SIZE)
+
+    def pack_bits(self, bits):
+        basis_states = np.zeros((bits.shape[0], self.amnt_words()), dtype=np.uint64)
+        for w in range(basis_states.shape[1]):
+            word_bits = bits[:, w * WORD_SIZE:(w + 1) * WORD_SIZE]
+            shifts = np.arange(word_bits.shape[1], dtype=np.uint64)
+            basis_states[:, w] = np.bitwise_or.reduce(word_bits << shifts, axis=1)
+        return basis_states
+
+    def unpack_bits(self, basis_states):
+        shifts = np.arange(WORD_SIZE, dtype=np.uint64)
+        bits = (basis_states[:, :, np.newaxis] >> shifts) & np.uint64(1)
+        return bits.reshape(basis_states.shape[0], -1)[:, :self.amnt_qubits]
+
+    @staticmethod
+    def mask(qubit):
+        """
+        :return: The word index and the bit mask of the qubit inside the packed basis states
+        """
+        return qubit // WORD_SIZE, np.uint64(1 << (qubit % WORD_SIZE))
+
+    def is_one(self, qubit):
+        word, mask = self.mask(qubit)
+        return (self.basis_states[:, word] & mask) != 0
+
+    def masks(self, qubits):
+        """
+        :return: The combined bit mask of the qubits for every word which contains at least one of them
+        """
+        masks = {}
+        for q in qubits:
+            word, mask = self.mask(q)
+            masks[word] = masks.get(word, np.uint64(0)) | mask
+        return masks
+
+    def all_equal(self, qubits, value):
+        """
+        :return: For every basis state whether all the qubits have the given value
+        """
+        selected = np.ones(self.basis_states.shape[0], dtype=bool)
+        for word, mask in self.masks(qubits).items():
+            selected &= (self.basis_states[:, word] & mask) == (mask if value else 0)
+        return selected
 
     def aggregate_state(self):
-        new_state = []
-        i = 0
-        while i < self.state.shape[0]:
-            new_state.append(self.state[i, :])
-            self.state = np.delete(self.state, (i), axis=0)
-            j = i
-            while j < self.state.shape[0]:
-                if list(new_state[-1][:-2]) == list(self.state[j, :-2]):
-                    new_state[-1][-2] += self.state[j, -2]
-                    new_state[-1][-1] += self.state[j, -1]
-                    self.state = np.delete(self.state, (j), axis=0)
-                else:
-                    j += 1
-        self.state = np.array(new_state)
+        """
+        Merges all basis states which appear more than once by summing up their amplitudes. The packed basis states
+        are grouped with a single sort over the integer keys.
+        """
+        if self.basis_states.shape[1] == 1:
+            keys, inverse = np.unique(self.basis_states[:, 0], return_inverse=True)
+            basis_states = keys[:, np.newaxis]
+        else:
+            basis_states, inverse = np.unique(self.basis_states, axis=0, return_inverse=True)
+        amplitudes = np.zeros(basis_states.shape[0], dtype=np.complex128)
+        np.add.at(amplitudes, inverse.reshape(-1), self.amplitudes)
+        self.basis_states = basis_states
+        self.amplitudes = amplitudes
         return
 
+    def drop_states(self):
+        """
+        Drops the basis states below the amplitude cutoff and afterwards all but the maximum_states largest ones. The
+        largest ones are selected with a linear time partition, not a sort. The amplitudes are not rescaled, so the
+        dropped probability, which is added to discarded_probability, is one minus the norm of the remaining state.
+        """
+        if self.amplitude_cutoff is None and self.maximum_states is None:
+            return
+        self.aggregate_state()
+        probabilities = self.amplitudes.real ** 2 + self.amplitudes.imag ** 2
+        total = np.sum(probabilities)
+        keep = np.arange(len(probabilities))
+        if self.amplitude_cutoff is not None:
+            keep = keep[probabilities >= self.amplitude_cutoff ** 2]
+            if len(keep) == 0:
+                keep = np.array([np.argmax(probabilities)])
+        if self.maximum_states is not None and len(keep) > self.maximum_states:
+            keep = keep[np.argpartition(-probabilities[keep], self.maximum_states - 1)[:self.maximum_states]]
+        if len(keep) == len(probabilities):
+            return
+        self.discarded_probability += total - np.sum(probabilities[keep])
+        self.basis_states = self.basis_states[keep]
+        self.amplitudes = self.amplitudes[keep]
+
     def get_state(self):
+        """
+        :return: One row per basis state of the form [q0, ..., qn, real part, imaginary part]
+        """
+        self.aggregate_state()
+        state = np.empty((self.basis_states.shape[0], self.amnt_qubits + 2))
+        state[:, :-2] = self.unpack_bits(self.basis_states)
+        state[:, -2] = self.amplitudes.real
+        state[:, -1] = self.amplitudes.imag
+        return state
+
+    def iter_state(self):
+        """
+        Same format as iter_state of the DBSimulator, the whole state is a single chunk.
+        :return: Pairs of a (rows, amnt_qubits) uint8 array with the qubit values and a complex128 array with the
+        amplitudes of these basis states
+        """
         self.aggregate_state()
-        return self.state
+        yield self.unpack_bits(self.basis_states).astype(np.uint8), self.amplitudes.copy()
 
     def execute_cnot(self, qubits):
-        for i in range(self.state.shape[0]):
-            if self.state[i, qubits[0]] == 1:
-                self.state[i, qubits[1]] = 1 - self.state[i, qubits[1]]
+        word, mask = self.mask(qubits[1])
+        self.basis_states[self.is_one(qubits[0]), word] ^= mask
 
     def execute_ccnot(self, qubits):
-        for i in range(self.state.shape[0]):
-            if self.state[i, qubits[0]] == 1 and self.state[i, qubits[1]] == 1:
-                self.state[i, qubits[2]] = 1 - self.state[i, qubits[2]]
+        word, mask = self.mask(qubits[2])
+        self.basis_states[self.is_one(qubits[0]) & self.is_one(qubits[1]), word] ^= mask
 
     def execute_paulix(self, qubits):
-        for i in range(self.state.shape[0]):
-            self.state[i, qubits[0]] = 1 - self.state[i, qubits[0]]
+        word, mask = self.mask(qubits[0])
+        self.basis_states[:, word] ^= mask
 
     def execute_pauliy(self, qubits):
-        for i in range(self.state.shape[0]):
-            if self.state[i, qubits[0]] == 0:
-                tmp = self.state[i, -2]
-                self.state[i, -2] = -self.state[i, -1]
-                self.state[i, -1] = tmp
-            else:
-                tmp = self.state[i, -2]
-                self.state[i, -2] = self.state[i, -1]
-                self.state[i, -1] = -tmp
-            self.state[i, qubits[0]] = 1 - self.state[i, qubits[0]]
+        # Y|0> = i|1> and Y|1> = -i|0>
+        self.amplitudes *= np.where(self.is_one(qubits[0]), -1j, 1j)
+        self.execute_paulix(qubits)
+        self.drop_states()
 
     def execute_pauliz(self, qubits):
-        for i in range(self.state.shape[0]):
-            if self.state[i, qubits[0]] == 1:
-                self.state[i, -2] *= -1
-                self.state[i, -1] *= -1
+        self.amplitudes[self.is_one(qubits[0])] *= -1
 
     def execute_hadamard(self, qubits):
-        for i in range(self.state.shape[0]):
-            self.state = np.append(self.state, np.array([self.state[i]]), axis=0)
-            self.state[-1][qubits[0]] = 1 - self.state[-1][qubits[0]]
-            if self.state[i][qubits[0]] == 0:
-                self.state[-1][-2] *= np.sqrt(0.5)
-                self.state[-1][-1] *= np.sqrt(0.5)
-                self.state[i][-2] *= np.sqrt(0.5)
-                self.state[i][-1] *= np.sqrt(0.5)
-            else:
-                self.state[-1][-2] *= np.sqrt(0.5)
-                self.state[-1][-1] *= np.sqrt(0.5)
-                self.state[i][-2] *= -np.sqrt(0.5)
-                self.state[i][-1] *= -np.sqrt(0.5)
+        """
+        The output is built in a single preallocated buffer of twice the size of the current state. The first half
+        keeps the original basis states, the second half holds the copies with the flipped qubit. Both halves are
+        scaled by 1/sqrt(2), the first one with a negative sign where the qubit is one. Afterwards the basis states
+        which appear twice are merged.
+        """
+        rows = self.basis_states.shape[0]
+        word, mask = self.mask(qubits[0])
+        sign = 1 - 2 * self.is_one(qubits[0])
+        basis_states = np.empty((2 * rows, self.basis_states.shape[1]), dtype=np.uint64)
+        basis_states[:rows] = self.basis_states
+        basis_states[rows:] = self.basis_states
+        basis_states[rows:, word] ^= mask
+        amplitudes = np.empty(2 * rows, dtype=np.complex128)
+        np.multiply(self.amplitudes, np.sqrt(0.5) * sign, out=amplitudes[:rows])
+        np.multiply(self.amplitudes, np.sqrt(0.5), out=amplitudes[rows:])
+        self.basis_states = basis_states
+        self.amplitudes = amplitudes
+        self.aggregate_state()
+        self.drop_states()
 
     def reset_qubits(self, qubits):
         for q in qubits:
-            for i in range(self.state.shape[0]):
-                self.state[i, q] = 0
+            word, mask = self.mask(q)
+            self.basis_states[:, word] &= ~mask
+
+    def invert_all_zero(self, qubits):
+        self.amplitudes[self.all_equal(qubits, 0)] *= -1
+
+    def invert_some_one(self, qubits):
+        self.amplitudes[~self.all_equal(qubits, 0)] *= -1
+
+    def invert_all_one(self, qubits):
+        self.amplitudes[self.all_equal(qubits, 1)] *= -1
+
+    def diffusion(self, qubits):
+        """
+        Reflection about the mean over the qubits, separately for every value of the other qubits (a group), the same
+        as in the DBSimulator: the stored amplitudes a become 2*mean - a and the missing basis states of a group are
+        appended with the amplitude 2*mean. With maximum_states only the missing basis states of the groups with the
+        largest means are created, like the LIMIT of the DBSimulatorStateDrop, since the state is cut down afterwards.
+        """
+        self.aggregate_state()
+        masks = self.masks(qubits)
+        groups = self.basis_states.copy()
+        for word, mask in masks.items():
+            groups[:, word] &= ~mask
+        if groups.shape[1] == 1:
+            keys, inverse = np.unique(groups[:, 0], return_inverse=True)
+            keys = keys[:, np.newaxis]
+        else:
+            keys, inverse = np.unique(groups, axis=0, return_inverse=True)
+        means = np.zeros(keys.shape[0], dtype=np.complex128)
+        np.add.at(means, inverse.reshape(-1), self.amplitudes)
+        means *= 2.0 / (2 ** len(qubits))
+        stored_means = means[inverse.reshape(-1)]
+        keys = keys[means != 0]
+        means = means[means != 0]
+
+        rows = self.basis_states.shape[0]
+        if self.maximum_states is None or keys.shape[0] * 2 ** len(qubits) <= rows + self.maximum_states:
+            # Every basis state of the groups is appended, the aggregation sums up -a and 2*mean
+            combinations = np.zeros((2 ** len(qubits), keys.shape[1]), dtype=np.uint64)
+            for j, q in enumerate(qubits):
+                word, mask = self.mask(q)
+                combinations[(np.arange(2 ** len(qubits)) >> j) & 1 == 1, word] |= mask
+            new_states = (keys[:, np.newaxis, :] | combinations[np.newaxis, :, :]).reshape(-1, keys.shape[1])
+            self.basis_states = np.concatenate([self.basis_states, new_states])
+            self.amplitudes = np.concatenate([-self.amplitudes, np.repeat(means, 2 ** len(qubits))])
+            self.aggregate_state()
+        else:
+            # At most maximum_states of the missing basis states can survive the following drop, so only this many
+            # candidates of the groups with the largest means are created. Candidate i is combination i % 2^k of the
+            # i // 2^k largest group.
+            candidates = np.arange(rows + self.maximum_states, dtype=np.int64)
+            group = np.argsort(-np.abs(means), kind="stable")[candidates // 2 ** len(qubits)]
+            combination = candidates % 2 ** len(qubits)
+            new_states = keys[group]
+            for j, q in enumerate(qubits):
+                word, mask = self.mask(q)
+                new_states[(combination >> j) & 1 == 1, word] |= mask
+            # The stored basis states come first, so the unique keeps them instead of the candidates of the same state
+            basis_states = np.concatenate([self.basis_states, new_states])
+            amplitudes = np.concatenate([stored_means - self.amplitudes, means[group]])
+            if basis_states.shape[1] == 1:
+                _keys, first = np.unique(basis_states[:, 0], return_index=True)
+            else:
+                _keys, first = np.unique(basis_states, axis=0, return_index=True)
+            self.basis_states = basis_states[first]
+            self.amplitudes = amplitudes[first]
+        self.drop_states()
 
 
 if __name__ == "__main__":
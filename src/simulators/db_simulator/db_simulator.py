@@ -1,19 +1,124 @@
 import sqlite3
 import time
+from collections import OrderedDict
 from typing import List, Tuple
 
 import numpy as np
 
-from gate import GatesIdentfications
+from gate import GatesIdentfications, PERMUTATION_GATES
 from simulators.simulator import Simulator
 
+# Fused queries are split once a qubit expression grows longer than this, since the expressions can grow quickly
+MAX_FUSED_EXPRESSION_LENGTH = 2000
+
+
+def xor_expression(a: str, b: str) -> str:
+    if a == "0":
+        return b
+    if b == "0":
+        return a
+    if b == "1":
+        return not_expression(a)
+    if a == "1":
+        return not_expression(b)
+    return "({0} <> {1})".format(a, b)
+
+
+def and_expression(a: str, b: str) -> str:
+    if a == "0" or b == "0":
+        return "0"
+    if a == "1":
+        return b
+    if b == "1":
+        return a
+    return "({0} * {1})".format(a, b)
+
+
+def not_expression(a: str) -> str:
+    if a in ["0", "1"]:
+        return str(1 - int(a))
+    return "(1 - {0})".format(a)
+
+
+# Default page size of SQLite, smaller pages only add B-tree levels
+DEFAULT_PAGE_SIZE = 4096
+# Largest page size SQLite accepts
+MAX_PAGE_SIZE = 65536
+# Cache size SQLite uses by default, in pages
+DEFAULT_CACHE_PAGES = 2000
+# Upper bound of the expected states if no expectation is given
+DEFAULT_EXPECTED_STATES = 2 ** 20
+
+
+def choose_page_size(row_size: int) -> int:
+    """
+    WITHOUT ROWID tables work best if a row is smaller than about 1/20 of a page, see:
+    https://www.sqlite.org/withoutrowid.html. The smallest page size fulfilling this, but at least the default page
+    size, is chosen.
+    """
+    page_size = DEFAULT_PAGE_SIZE
+    while page_size < MAX_PAGE_SIZE and page_size < 20 * row_size:
+        page_size *= 2
+    return page_size
+
+
+def choose_cache_size(row_size: int, page_size: int, expected_states: int) -> int:
+    """
+    The cache has to hold all expected states. B-tree pages are assumed to be only two thirds full.
+    """
+    return max(DEFAULT_CACHE_PAGES, int(np.ceil(1.5 * expected_states * row_size / page_size)))
+
+
+def estimated_row_size(amnt_qubits: int) -> int:
+    """
+    SQLite stores the integers 0 and 1 only in the record header, so every qubit takes a single byte. The two REAL
+    values and the record and cell headers are added.
+    """
+    return amnt_qubits + 2 * 8 + 8
+
+
+def configure_page_and_cache_size(simulator, row_size: int, expected_states: int):
+    """
+    Sets the page size and the cache size of the database of a simulator with a connect method for rows of the
+    given size. Has to be called before the table is created.
+    """
+    page_size = choose_page_size(row_size)
+    if simulator.cur.execute("PRAGMA page_size").fetchone()[0] != page_size:
+        # The page size of an in memory database can not be changed once a table has been created in it
+        simulator.conn.close()
+        simulator.connect()
+        simulator.cur.execute("PRAGMA page_size = " + str(page_size))
+    simulator.cur.execute("PRAGMA cache_size = " + str(choose_cache_size(row_size, page_size, expected_states)))
+
 
 class DBSimulator(Simulator):
-    def __init__(self):
-        self.conn = sqlite3.connect(':memory:')
-        self.cur = self.conn.cursor()
+    def __init__(self, without_rowid: bool = False, expected_states: int = None, query_cache_size: int = 256,
+                 gate_fusion: bool = True):
+        """
+        :param without_rowid: Creates the state table WITHOUT ROWID, so every change only maintains the primary key
+        B-tree. Page size and cache size are chosen from the amount of qubits and the expected amount of states.
+        :param expected_states: Expected amount of basis states, only used to choose the cache size
+        :param query_cache_size: Amount of generated gate queries and compiled statements which are kept
+        :param gate_fusion: Fuses consecutive CNOT, CCNOT, Pauli-X and reset gates into a single update
+        """
         self.amnt_qubits = None
-        self.name = "DBSimulator"
+        self.gate_fusion = gate_fusion
+        self.query_cache_size = query_cache_size
+        self.query_cache = OrderedDict()
+        self.query_cache_hits = 0
+        self.query_cache_misses = 0
+        self.without_rowid = without_rowid
+        self.expected_states = expected_states
+        # Amount of rows of the state table, including rows whose amplitude became zero
+        self.amnt_stored_states = 0
+        # Called after every gate with the gate and the amount of stored basis states
+        self.gate_callback = None
+        self.name = "DBSimulatorWithoutRowid" if without_rowid else "DBSimulator"
+        self.connect()
+
+    def connect(self):
+        self.conn = sqlite3.connect(':memory:', cached_statements=self.query_cache_size)
+        self.cur = self.conn.cursor()
         # See: https://blog.devart.com/increasing-sqlite-performance.html
         self.cur.execute('''PRAGMA threads = 8''')  # Maximum of the compiled version of sql
         self.cur.execute('''PRAGMA journal_mode = OFF''')
@@ -26,36 +131,78 @@ class DBSimulator(Simulator):
             if self.amnt_qubits is not None:
                 self.destroy_db()
             self.init_db(amnt_qubits)
+        permutation_gates = []
         for gate in gates:
-            if gate.gatter == GatesIdentfications.cnot:
-                self.execute_cnot(gate.qubits)
-            elif gate.gatter == GatesIdentfications.ccnot:
-                self.execute_ccnot(gate.qubits)
-            elif gate.gatter == GatesIdentfications.paulix:
-                self.execute_paulix(gate.qubits)
-            elif gate.gatter == GatesIdentfications.pauliy:
-                self.execute_pauliy(gate.qubits)
-            elif gate.gatter == GatesIdentfications.pauliz:
-                self.execute_pauliz(gate.qubits)
-            elif gate.gatter == GatesIdentfications.hadamard:
-                self.execute_hadamard(gate.qubits)
-            elif gate.gatter == GatesIdentfications.reset:
-                self.reset_qubits(gate.qubits)
-            elif gate.gatter == GatesIdentfications.invert_all_zero:
-                self.invert_all_zero(gate.qubits)
-            elif gate.gatter == GatesIdentfications.invert_some_one:
-                self.invert_some_one(gate.qubits)
-            elif gate.gatter == GatesIdentfications.invert_all_one:
-                self.invert_all_one(gate.qubits)
-            elif gate.gatter == GatesIdentfications.diffusion:
-                self.diffusion(gate.qubits)
-            else:
-                print("Unknown Gate Type")
-                raise
-        self.get_state()
+            if self.gate_fusion and gate.gatter in PERMUTATION_GATES:
+                permutation_gates.append(gate)
+                continue
+            self.execute_permutation_gates(permutation_gates)
+            self.report_states(permutation_gates)
+            permutation_gates = []
+            self.execute_gate(gate)
+            self.report_states([gate])
+        self.execute_permutation_gates(permutation_gates)
+        self.report_states(permutation_gates)
+        self.conn.commit()
         end = time.process_time()
         return end - start
 
+    def execute_gate(self, gate):
+        if gate.gatter == GatesIdentfications.cnot:
+            self.execute_cnot(gate.qubits)
+        elif gate.gatter == GatesIdentfications.ccnot:
+            self.execute_ccnot(gate.qubits)
+        elif gate.gatter == GatesIdentfications.paulix:
+            self.execute_paulix(gate.qubits)
+        elif gate.gatter == GatesIdentfications.pauliy:
+            self.execute_pauliy(gate.qubits)
+        elif gate.gatter == GatesIdentfications.pauliz:
+            self.execute_pauliz(gate.qubits)
+        elif gate.gatter == GatesIdentfications.hadamard:
+            self.execute_hadamard(gate.qubits)
+        elif gate.gatter == GatesIdentfications.reset:
+            self.reset_qubits(gate.qubits)
+        elif gate.gatter == GatesIdentfications.invert_all_zero:
+            self.invert_all_zero(gate.qubits)
+        elif gate.gatter == GatesIdentfications.invert_some_one:
+            self.invert_some_one(gate.qubits)
+        elif gate.gatter == GatesIdentfications.invert_all_one:
+            self.invert_all_one(gate.qubits)
+        elif gate.gatter == GatesIdentfications.diffusion:
+            self.diffusion(gate.qubits)
+        else:
+            print("Unknown Gate Type")
+            raise
+
+    def amnt_states(self):
+        """
+        :return: The amount of stored basis states, it is kept up to date by the gates without a query. It is an upper
+        bound of the basis states with an amplitude, since rows whose amplitude became zero are not deleted.
+        """
+        return self.amnt_stored_states
+
+    def report_states(self, gates):
+        """
+        Calls the gate callback for the executed gates, fused gates are reported together after their update.
+        """
+        if self.gate_callback is not None:
+            for gate in gates:
+                self.gate_callback(gate, self.amnt_states())
+
+    def execute_permutation_gates(self, gates):
+        """
+        Executes consecutive gates which only change the basis states. More than one of them are fused into a single
+        update of the keys, so the table is not scanned once per gate.
+        """
+        if len(gates) == 0:
+            return
+        if len(gates) == 1:
+            self.execute_gate(gates[0])
+            return
+        for query in self.cached_query(self.fused_queries, [(g.gatter, tuple(g.qubits)) for g in gates]):
+            self.execute_key_update(query)
+        return
+
     def init_db(self, amnt_qubits: int):
         assert amnt_qubits > 0
         self.amnt_qubits = amnt_qubits
@@ -68,71 +215,267 @@ class DBSimulator(Simulator):
             else:
                 primary_key += ", " + "q" + str(_t)
         query_create += " revalue REAL, imvalue REAL, PRIMARY KEY (" + primary_key + ") )"
+        if self.without_rowid:
+            self.configure_storage()
+            query_create += " WITHOUT ROWID"
         self.cur.execute(query_create)
         self.cur.execute("insert into quantumstate values (?" + ", ?" * (amnt_qubits + 1) + ")",
                          [0 for _t in range(amnt_qubits)] + [1.0, 0.0])
+        self.amnt_stored_states = 1
         return
 
+    def configure_storage(self):
+        """
+        Sets the page size and the cache size for the amount of qubits. Has to be called before the table is created.
+        """
+        expected_states = self.expected_states
+        if expected_states is None:
+            expected_states = min(2 ** self.amnt_qubits, DEFAULT_EXPECTED_STATES)
+        configure_page_and_cache_size(self, self.estimated_row_size(), expected_states)
+
+    def estimated_row_size(self):
+        return estimated_row_size(self.amnt_qubits)
+
     def init_with_state(self, state: List[Tuple[List[int], float, float]]):
-        assert abs(sum([r ** 2 + i ** 2 for (_s, r, i) in state]) - 1.0) < 1e-6
+        self.init_with_arrays(np.array([s for (s, _r, _i) in state]), np.array([complex(r, i) for (_s, r, i) in state]))
+        return
+
+    def init_with_arrays(self, basis_states: np.ndarray, amplitudes: np.ndarray):
+        """
+        :param basis_states: Either a (states, amnt_qubits) array with the qubit values or, for up to 64 qubits, a one
+        dimensional array of keys where bit q is the value of qubit q
+        :param amplitudes: The complex amplitudes of the basis states
+        """
+        self.init_with_chunks([(basis_states, amplitudes)])
+        return
+
+    def init_with_chunks(self, chunks):
+        """
+        Bulk loads the state from an iterable of (basis_states, amplitudes) chunks, in the format of init_with_arrays.
+        All chunks are inserted with executemany inside the same transaction. The journal is off, so a transaction
+        can not be rolled back: the chunks are collected and their norm is checked before the old state is deleted.
+        """
+        chunks = [(np.asarray(b), np.asarray(a, dtype=np.complex128)) for b, a in chunks]
+        assert all(len(b) == len(a) for b, a in chunks)
+        assert abs(sum(np.vdot(a, a).real for _b, a in chunks) - 1.0) < 1e-6
         self.cur.execute("DELETE FROM quantumstate")
-        for (s, r, i) in state:
-            assert len(s) == self.amnt_qubits
-            self.cur.execute("insert into quantumstate values (?" + ", ?" * (self.amnt_qubits + 1) + ")",
-                             s + [r, i])
+        self.amnt_stored_states = 0
+        query = "insert into quantumstate values (?" + ", ?" * (self.amnt_key_columns() + 1) + ")"
+        for basis_states, amplitudes in chunks:
+            keys = self.key_columns(basis_states)
+            self.amnt_stored_states += len(keys)
+            self.cur.executemany(query, [k + [r, i] for k, r, i in
+                                         zip(keys, amplitudes.real.tolist(), amplitudes.imag.tolist())])
         return
 
+    def amnt_key_columns(self):
+        return self.amnt_qubits
+
+    def key_column_names(self):
+        return ["q" + str(_t) for _t in range(self.amnt_qubits)]
+
+    def key_columns(self, basis_states: np.ndarray):
+        """
+        :return: The values of the key columns for every basis state
+        """
+        if basis_states.ndim == 1:
+            assert self.amnt_qubits <= 64
+            basis_states = (basis_states.astype(np.uint64)[:, np.newaxis] >> np.arange(
+                self.amnt_qubits, dtype=np.uint64)) & np.uint64(1)
+        assert basis_states.shape[1] == self.amnt_qubits
+        return basis_states.astype(np.int64).tolist()
+
     def destroy_db(self):
         self.cur.execute("DROP TABLE quantumstate")
 
     def get_state(self):
         """
-        Only this function commits the transaction. This is done for performance reasons. Only use this function
-        to access the state or commit before accessing the state.
+        Only this function, iter_state and run commit the transaction. This is done for performance reasons. Only use
+        these functions to access the state or commit before accessing the state.
         :return:
         """
         self.conn.commit()
         return self.cur.execute('SELECT * FROM quantumstate').fetchall()
 
+    def iter_state(self, chunk_size: int = 10000):
+        """
+        Streams the state in chunks, without building the full list of rows.
+        :return: Pairs of a (rows, amnt_qubits) uint8 array with the qubit values and a complex128 array with the
+        amplitudes of these basis states
+        """
+        self.conn.commit()
+        cursor = self.conn.execute('SELECT * FROM quantumstate')
+        rows = cursor.fetchmany(chunk_size)
+        while len(rows) > 0:
+            yield self.state_chunk(rows)
+            rows = cursor.fetchmany(chunk_size)
+        cursor.close()
+
+    def state_chunk(self, rows):
+        chunk = np.array(rows, dtype=np.float64)
+        return chunk[:, :-2].astype(np.uint8), chunk[:, -2] + 1j * chunk[:, -1]
+
+    def cached_query(self, query_builder, qubits):
+        """
+        Returns the query of a gate from the LRU cache. The key is the gate, its qubits and the amount of qubits, so
+        repeated gates get the identical query string and sqlite3 reuses the compiled statement of it.
+        """
+        key = (query_builder.__name__, tuple(qubits), self.amnt_qubits)
+        query = self.query_cache.get(key)
+        if query is None:
+            self.query_cache_misses += 1
+            query = query_builder(qubits)
+            self.query_cache[key] = query
+            if len(self.query_cache) > self.query_cache_size:
+                self.query_cache.popitem(last=False)
+        else:
+            self.query_cache_hits += 1
+            self.query_cache.move_to_end(key)
+        return query
+
+    def query_cache_hit_rate(self):
+        lookups = self.query_cache_hits + self.query_cache_misses
+        if lookups == 0:
+            return 0.0
+        return self.query_cache_hits / lookups
+
     def execute_cnot(self, qubits):
         assert len(qubits) == 2
-        query = "update quantumstate set q{1} = (1 - q{1})*q{0} + q{1}*(1 - q{0}) where 1".format(qubits[0],
-                                                                                                  qubits[1])
-        self.cur.execute(query)
+        self.execute_key_update(self.cached_query(self.cnot_query, qubits))
         return
 
     def execute_paulix(self, qubits):
         assert len(qubits) == 1
-        query = "update quantumstate set q{0} = (1 - q{0}) where 1".format(qubits[0])
-        self.cur.execute(query)
+        self.execute_key_update(self.cached_query(self.paulix_query, qubits))
         return
 
     def execute_pauliy(self, qubits):
         assert len(qubits) == 1
-        query = "update quantumstate set q{0} = (1 - q{0})," \
-                " imvalue = case when q{0} = 1 then -revalue else revalue end, " \
-                "revalue = case when q{0} = 1 then imvalue else -imvalue END where 1".format(
-            qubits[0])
-        self.cur.execute(query)
+        self.execute_key_update(self.cached_query(self.pauliy_query, qubits))
         return
 
     def execute_pauliz(self, qubits):
         assert len(qubits) == 1
-        query = "update quantumstate set imvalue = case when q{0} = 1 then -imvalue else imvalue end," \
-                " revalue = case when q{0} = 1 then -revalue else revalue END where 1".format(
-            qubits[0])
-        self.cur.execute(query)
+        self.cur.execute(self.cached_query(self.pauliz_query, qubits))
         return
 
     def execute_ccnot(self, qubits):
         assert len(qubits) == 3
-        query = "update quantumstate set q{2} = case when q{0} = 1 AND q{1} = 1 then 1 - q{2} ELSE q{2} END where 1".format(
-            qubits[0],
-            qubits[1], qubits[2])
-        self.cur.execute(query)
+        self.execute_key_update(self.cached_query(self.ccnot_query, qubits))
         return
 
     def execute_hadamard(self, qubits):
+        self.cur.execute(self.cached_query(self.hadamard_query, qubits))
+        # Every stored basis state is in the result of the query, so it replaces the whole table
+        self.amnt_stored_states = self.cur.rowcount
+        return
+
+    def reset_qubits(self, qubits: List[int]):
+        """
+        This will produce irregularities, meaning the quantum state does not have amplitude 1,
+         if the superposition is dependent on the resetted qubits. The amplitudes of merged basis states are summed up.
+        """
+        self.execute_key_update(self.cached_query(self.reset_query, qubits))
+        return
+
+    def execute_key_update(self, queries):
+        """
+        Executes the statements of key_update_queries or merge_update_queries, the latter end with counting the rows.
+        """
+        rows = None
+        for query in queries:
+            rows = self.cur.execute(query).fetchone()
+        if rows is not None:
+            self.amnt_stored_states = rows[0]
+        return
+
+    def invert_all_zero(self, qubits: List[int]):
+        self.cur.execute(self.cached_query(self.invert_all_zero_query, qubits))
+        return
+
+    def invert_some_one(self, qubits: List[int]):
+        self.cur.execute(self.cached_query(self.invert_some_one_query, qubits))
+        return
+
+    def invert_all_one(self, qubits: List[int]):
+        self.cur.execute(self.cached_query(self.invert_all_one_query, qubits))
+        return
+
+    def diffusion(self, qubits):
+        """
+        Reflects the amplitudes about their mean over the diffusion qubits, separately for every value of the other
+        qubits (a group). Every stored amplitude a becomes 2*mean - a, the basis states missing from a group are
+        inserted with the amplitude 2*mean, since they are no longer zero after the reflection.
+        The means of all groups are computed once into a temporary table, which the update joins.
+        """
+        means, update, insert = self.cached_query(self.diffusion_queries, qubits)
+        self.cur.execute(means)
+        self.cur.execute(update)
+        # The insert starts with a common table expression, so the cursor does not report its row count
+        changes = self.conn.total_changes
+        self.cur.execute(insert)
+        self.amnt_stored_states += self.conn.total_changes - changes
+        self.cur.execute("DROP TABLE diffusion_mean")
+        return
+
+    def key_update_queries(self, assignments, condition="1", values=None):
+        """
+        SQLite checks the primary key after every row, so a single update fails if a row is moved onto the key of a row
+        which is only moved later, although the gate permutes the basis states. Thats why the first update stores the
+        first changed column bitwise negated, which no basis state uses, and the second one restores it.
+        :param assignments: Pairs of a key column and its new value as expression of the old row
+        :param condition: The rows which are moved
+        :param values: Further SET clauses, e.g. of the amplitudes
+        :return: The two updates
+        """
+        column, expression = assignments[0]
+        clauses = ["{0} = ~({1})".format(column, expression)] + ["{0} = {1}".format(c, e) for c, e in assignments[1:]]
+        if values is not None:
+            clauses.append(values)
+        return ["update quantumstate set " + ", ".join(clauses) + " where " + condition,
+                "update quantumstate set {0} = ~{0} where {0} < 0".format(column)]
+
+    def merge_update_queries(self, assignments, condition="1"):
+        """
+        Gates like the reset map several basis states onto the same one, whose amplitudes are summed up. The moved rows
+        are copied into a temporary table and inserted again, adding to the rows which already have their new key.
+        :return: The statements of the update, the last one counts the rows
+        """
+        keys = self.key_column_names()
+        expressions = dict(assignments)
+        return ["CREATE TEMP TABLE moved_states AS SELECT " + ", ".join(
+            [expressions.get(k, k) + " as " + k for k in keys]) + ", revalue, imvalue FROM quantumstate where " +
+                condition,
+                "DELETE FROM quantumstate where " + condition,
+                "INSERT INTO quantumstate SELECT * FROM moved_states where 1 ON CONFLICT (" + ", ".join(
+                    keys) + ") DO UPDATE SET revalue = revalue + excluded.revalue, imvalue = imvalue + excluded.imvalue",
+                "DROP TABLE moved_states",
+                "SELECT count(*) FROM quantumstate"]
+
+    def cnot_query(self, qubits):
+        return self.key_update_queries(
+            [("q" + str(qubits[1]), "(1 - q{1})*q{0} + q{1}*(1 - q{0})".format(qubits[0], qubits[1]))])
+
+    def paulix_query(self, qubits):
+        return self.key_update_queries([("q" + str(qubits[0]), "1 - q" + str(qubits[0]))])
+
+    def pauliy_query(self, qubits):
+        """
+        Y|0> = i|1> and Y|1> = -i|0>, so the amplitude is multiplied by i with a sign given by the old qubit value.
+        SQLite evaluates all expressions of the update on the old row.
+        """
+        return self.key_update_queries([("q" + str(qubits[0]), "1 - q" + str(qubits[0]))],
+                                       values="revalue = (2*q{0} - 1)*imvalue, imvalue = (1 - 2*q{0})*revalue".format(
+                                           qubits[0]))
+
+    def pauliz_query(self, qubits):
+        return "update quantumstate set revalue = -revalue, imvalue = -imvalue where q{0} = 1".format(qubits[0])
+
+    def ccnot_query(self, qubits):
+        return self.key_update_queries([("q" + str(qubits[2]), "1 - q" + str(qubits[2]))],
+                                       "q{0} = 1 AND q{1} = 1".format(qubits[0], qubits[1]))
+
+    def hadamard_query(self, qubits):
         """
         This gate is more complicated than the other, since multiple states can be fused into one, so a simple update is
         not possible. Thats why we sepparate the update into four queries and aggregate over them.
@@ -147,50 +490,130 @@ class DBSimulator(Simulator):
         query1 = "Select " + ", ".join(
             ["q" + str(_t) if _t != qubits[0] else "1 as q" + str(_t) for _t in
              range(
-                 self.amnt_qubits)]) + ", revalue*{0}*(1 - {1}) - revalue*{0}*{1} as revalue, imvalue*{0}*(1 - {1}) - imvalue*{0}*{1}  as imvalue".format(
+                 self.amnt_qubits)]) + ", revalue*{0}*(1 - 2*{1}) as revalue, imvalue*{0}*(1 - 2*{1}) as imvalue".format(
             np.sqrt(0.5), "q" + str(qubits[0])) + " FROM quantumstate"
 
         new_values = "Select " + ", ".join(["q" + str(t) for t in range(self.amnt_qubits)]) + \
                      ", sum(revalue) as revalue, sum(imvalue) as imvalue FROM (" + query0 + " union all " + query1 + ") GROUP BY " + ", ".join(
             ["q" + str(_t) for _t in range(self.amnt_qubits)])
 
-        update_query = "replace into quantumstate (" + ", ".join(
+        return "replace into quantumstate (" + ", ".join(
             ["q" + str(_t) for _t in range(
                 self.amnt_qubits)]) + ", revalue, imvalue) " + new_values
-        self.cur.execute(update_query)
-        return
 
-    def reset_qubits(self, qubits: List[int]):
-        """
-        This will produce irregularities, meaning the quantum state does not have amplitude 1,
-         if the superposition is dependent on the resetted qubits
-        """
-        query = "update quantumstate set " + ",".join(["q{0} = 0".format(q) for q in qubits]) + " where 1"
-        self.cur.execute(query)
-        return
+    def reset_query(self, qubits):
+        return self.merge_update_queries([("q" + str(q), "0") for q in qubits],
+                                         " or ".join(["q{0} = 1".format(q) for q in qubits]))
 
-    def invert_all_zero(self, qubits: List[int]):
-        query = "update quantumstate set revalue = -revalue, imvalue = -imvalue where " + " and ".join(
+    def invert_all_zero_query(self, qubits):
+        return "update quantumstate set revalue = -revalue, imvalue = -imvalue where " + " and ".join(
             ["q{0} = 0".format(q) for q in qubits])
-        self.cur.execute(query)
-        return
 
-    def invert_some_one(self, qubits: List[int]):
-        query = "update quantumstate set revalue = -revalue, imvalue = -imvalue where " + " or ".join(
+    def invert_some_one_query(self, qubits):
+        return "update quantumstate set revalue = -revalue, imvalue = -imvalue where " + " or ".join(
             ["q{0} = 1".format(q) for q in qubits])
-        self.cur.execute(query)
-        return
 
-    def invert_all_one(self, qubits: List[int]):
-        query = "update quantumstate set revalue = -revalue, imvalue = -imvalue where " + " and ".join(
+    def invert_all_one_query(self, qubits):
+        return "update quantumstate set revalue = -revalue, imvalue = -imvalue where " + " and ".join(
             ["q{0} = 1".format(q) for q in qubits])
-        self.cur.execute(query)
-        return
 
-    def diffusion(self, qubits):
-        query = "update quantumstate set revalue = -revalue + (Select sum(revalue)*" + str(
-            2.0 / (2 ** len(qubits))) + " FROM quantumstate)" \
-                                        ", imvalue = -imvalue + (Select sum(imvalue)*" + str(
-            2.0 / (2 ** len(qubits))) + " FROM quantumstate) where 1"
-        self.cur.execute(query)
-        return
+    def diffusion_queries(self, qubits):
+        """
+        :return: The queries of the diffusion, see diffusion for how they are used
+        """
+        groups = self.diffusion_group_columns(qubits, "quantumstate")
+        factor = 2.0 / (2 ** len(qubits))
+        amplitudes = "sum(revalue)*{0} as revalue, sum(imvalue)*{0} as imvalue, count(*) as states".format(factor)
+
+        # Without other qubits there is a single group, so the means table has one row and the update joins all rows
+        means = "CREATE TEMP TABLE diffusion_mean AS SELECT " + "".join(
+            [e + " as " + c + ", " for e, c in groups]) + amplitudes + " FROM quantumstate" + (
+                    " GROUP BY " + ", ".join([e for e, _c in groups]) if len(groups) > 0 else "")
+
+        update = "update quantumstate set revalue = m.revalue - quantumstate.revalue, imvalue = m.imvalue - " \
+                 "quantumstate.imvalue FROM diffusion_mean AS m where " + (
+                     " and ".join([e + " = m." + c for e, c in groups]) if len(groups) > 0 else "1")
+
+        insert = "WITH RECURSIVE combinations(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM combinations WHERE i < " + \
+                 str(2 ** len(qubits) - 1) + ") INSERT OR IGNORE INTO quantumstate SELECT " + ", ".join(
+            self.diffusion_key_columns(qubits, "m", "c.i")) + ", m.revalue, m.imvalue FROM diffusion_mean AS m " \
+                                                              "CROSS JOIN combinations AS c where m.states < " + \
+                 str(2 ** len(qubits)) + " and (m.revalue != 0 or m.imvalue != 0)"
+
+        return means, update, insert
+
+    def diffusion_group_columns(self, qubits, table):
+        """
+        :return: Pairs of an expression over the table and a column name, which together identify the group of a basis
+        state, i.e. the values of all qubits which are not part of the diffusion
+        """
+        return [(table + ".q" + str(t), "q" + str(t)) for t in range(self.amnt_qubits) if t not in qubits]
+
+    def diffusion_key_columns(self, qubits, means, combination):
+        """
+        :return: The key columns of the basis state given by a group of the means table and a combination of the
+        diffusion qubit values, bit j of the combination is the value of the j-th diffusion qubit
+        """
+        positions = {q: j for j, q in enumerate(qubits)}
+        return ["(({0} >> {1}) & 1)".format(combination, positions[t]) if t in positions else means + ".q" + str(t)
+                for t in range(self.amnt_qubits)]
+
+    def fused_queries(self, gates):
+        """
+        Composes the permutation gates into one expression per changed qubit, which only depends on the qubit values
+        before the first gate. These expressions are the SET clauses of a single update, since SQLite evaluates all of
+        them on the old row.
+        :param gates: Pairs of gate type and qubits
+        :return: The updates, usually one, a new one is started if the expressions grow too long. Every update is a
+        list of statements, see execute_key_update.
+        """
+        queries = []
+        expressions = {}
+        merge = False
+        for gatter, qubits in gates:
+            new_expressions = self.compose_permutation(expressions, gatter, qubits)
+            if len(expressions) > 0 and max(len(e) for e in new_expressions.values()) > MAX_FUSED_EXPRESSION_LENGTH:
+                queries.append(self.fused_query(expressions, merge))
+                new_expressions = self.compose_permutation({}, gatter, qubits)
+                merge = False
+            expressions = new_expressions
+            merge = merge or gatter == GatesIdentfications.reset
+        queries.append(self.fused_query(expressions, merge))
+        return [q for q in queries if q is not None]
+
+    def compose_permutation(self, expressions, gatter, qubits):
+        """
+        :param expressions: The value of every changed qubit as expression of the values before the fused gates
+        :return: The expressions after the gate is applied. The qubits are 0/1 valued, so xor is written as <> and and
+        as *.
+        """
+        expressions = dict(expressions)
+
+        def current(q):
+            return expressions.get(q, self.bit_expression(q))
+
+        if gatter == GatesIdentfications.cnot:
+            expressions[qubits[1]] = xor_expression(current(qubits[1]), current(qubits[0]))
+        elif gatter == GatesIdentfications.ccnot:
+            expressions[qubits[2]] = xor_expression(current(qubits[2]),
+                                                    and_expression(current(qubits[0]), current(qubits[1])))
+        elif gatter == GatesIdentfications.paulix:
+            expressions[qubits[0]] = not_expression(current(qubits[0]))
+        elif gatter == GatesIdentfications.reset:
+            for q in qubits:
+                expressions[q] = "0"
+        return expressions
+
+    def bit_expression(self, qubit):
+        return "q" + str(qubit)
+
+    def fused_query(self, expressions, merge):
+        """
+        :param merge: Whether the fused gates contain a reset, so that basis states can be merged
+        """
+        assignments = [("q" + str(q), e) for q, e in expressions.items() if e != self.bit_expression(q)]
+        if len(assignments) == 0:
+            return None
+        if merge:
+            return self.merge_update_queries(assignments)
+        return self.key_update_queries(assignments)
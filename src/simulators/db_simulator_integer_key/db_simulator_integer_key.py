@@ -0,0 +1,216 @@
+import numpy as np
+
+from simulators.db_simulator.db_simulator import DBSimulator
+
+# SQLite integers are signed 64 bit values, the sign bit is not used to keep the keys positive
+WORD_SIZE = 63
+
+
+class DBSimulatorIntegerKey(DBSimulator):
+    """
+    Database simulator which stores a basis state as a single INTEGER key instead of one column per qubit. Qubit q is
+    bit q % 63 of the key column s{q // 63}, so circuits with more than 63 qubits use a composite key over several
+    integer words. The gates are bitwise expressions on these keys, the gate API and the output of get_state are the
+    same as for the DBSimulator.
+    """
+
+    def __init__(self, without_rowid: bool = False, expected_states: int = None, query_cache_size: int = 256,
+                 gate_fusion: bool = True):
+        super().__init__(without_rowid, expected_states, query_cache_size, gate_fusion)
+        self.name = "DBSimulatorIntegerKeyWithoutRowid" if without_rowid else "DBSimulatorIntegerKey"
+
+    def init_db(self, amnt_qubits: int):
+        assert amnt_qubits > 0
+        self.amnt_qubits = amnt_qubits
+        words = ", ".join(self.words())
+        query_create = "CREATE TABLE quantumstate (" + " Integer, ".join(
+            self.words()) + " Integer, revalue REAL, imvalue REAL, PRIMARY KEY (" + words + ") )"
+        if self.without_rowid:
+            self.configure_storage()
+            query_create += " WITHOUT ROWID"
+        self.cur.execute(query_create)
+        self.cur.execute("insert into quantumstate values (?" + ", ?" * (self.amnt_words() + 1) + ")",
+                         [0 for _w in range(self.amnt_words())] + [1.0, 0.0])
+        self.amnt_stored_states = 1
+        return
+
+    def get_state(self):
+        """
+        Only this function, iter_state and run commit the transaction. This is done for performance reasons. Only use
+        these functions to access the state or commit before accessing the state.
+        :return: The same rows as the DBSimulator, one column per qubit followed by the real and imaginary part
+        """
+        self.conn.commit()
+        rows = self.cur.execute('SELECT * FROM quantumstate').fetchall()
+        if len(rows) == 0:
+            return []
+        bits = self.unpack_words(rows).tolist()
+        return [tuple(b) + tuple(r[-2:]) for b, r in zip(bits, rows)]
+
+    def state_chunk(self, rows):
+        amplitudes = np.array([r[-2:] for r in rows], dtype=np.float64)
+        return self.unpack_words(rows).astype(np.uint8), amplitudes[:, 0] + 1j * amplitudes[:, 1]
+
+    def estimated_row_size(self):
+        # Every key word takes up to eight bytes and one header byte
+        return 9 * self.amnt_words() + 2 * 8 + 8
+
+    def amnt_words(self):
+        return (self.amnt_qubits + WORD_SIZE - 1) // WORD_SIZE
+
+    def words(self):
+        return ["s" + str(_w) for _w in range(self.amnt_words())]
+
+    def amnt_key_columns(self):
+        return self.amnt_words()
+
+    def key_column_names(self):
+        return self.words()
+
+    def key_columns(self, basis_states: np.ndarray):
+        """
+        :return: The key words of every basis state
+        """
+        if basis_states.ndim == 1 and self.amnt_qubits <= WORD_SIZE:
+            return [[k] for k in basis_states.astype(np.int64).tolist()]
+        bits = np.array(super().key_columns(basis_states), dtype=np.int64)
+        words = np.zeros((bits.shape[0], self.amnt_words()), dtype=np.int64)
+        for w in range(self.amnt_words()):
+            word_bits = bits[:, w * WORD_SIZE:(w + 1) * WORD_SIZE]
+            words[:, w] = np.bitwise_or.reduce(word_bits << np.arange(word_bits.shape[1], dtype=np.int64), axis=1)
+        return words.tolist()
+
+    def unpack_words(self, rows):
+        """
+        :return: The qubit values of the rows as (rows, amnt_qubits) array
+        """
+        words = np.array([r[:-2] for r in rows], dtype=np.int64)
+        bits = (words[:, :, np.newaxis] >> np.arange(WORD_SIZE, dtype=np.int64)) & 1
+        return bits.reshape(len(rows), -1)[:, :self.amnt_qubits]
+
+    @staticmethod
+    def mask(qubit):
+        """
+        :return: The key column and the bit mask of the qubit
+        """
+        return "s" + str(qubit // WORD_SIZE), 1 << (qubit % WORD_SIZE)
+
+    def masks(self, qubits):
+        """
+        :return: The combined bit mask of the qubits for every key column which contains at least one of them
+        """
+        masks = {}
+        for q in qubits:
+            word, mask = self.mask(q)
+            masks[word] = masks.get(word, 0) | mask
+        return masks
+
+    def bit(self, qubit):
+        word, mask = self.mask(qubit)
+        return "(({0} >> {1}) & 1)".format(word, qubit % WORD_SIZE)
+
+    def bit_expression(self, qubit):
+        return self.bit(qubit)
+
+    def flip(self, qubit):
+        """
+        :return: The key column of the qubit and its value with the qubit flipped
+        """
+        # SQLite has no xor operator, a ^ m is written as (a | m) - (a & m)
+        word, mask = self.mask(qubit)
+        return word, "({0} | {1}) - ({0} & {1})".format(word, mask)
+
+    def is_one(self, qubit):
+        word, mask = self.mask(qubit)
+        return "({0} & {1}) != 0".format(word, mask)
+
+    def cnot_query(self, qubits):
+        return self.key_update_queries([self.flip(qubits[1])], self.is_one(qubits[0]))
+
+    def paulix_query(self, qubits):
+        return self.key_update_queries([self.flip(qubits[0])])
+
+    def pauliy_query(self, qubits):
+        """
+        Y|0> = i|1> and Y|1> = -i|0>, so the amplitude is multiplied by i with a sign given by the old qubit value.
+        SQLite evaluates all expressions of the update on the old row.
+        """
+        return self.key_update_queries([self.flip(qubits[0])],
+                                       values="revalue = (2*{0} - 1)*imvalue, imvalue = (1 - 2*{0})*revalue".format(
+                                           self.bit(qubits[0])))
+
+    def pauliz_query(self, qubits):
+        return "update quantumstate set revalue = -revalue, imvalue = -imvalue where " + self.is_one(qubits[0])
+
+    def ccnot_query(self, qubits):
+        return self.key_update_queries([self.flip(qubits[2])],
+                                       self.is_one(qubits[0]) + " AND " + self.is_one(qubits[1]))
+
+    def hadamard_query(self, qubits):
+        """
+        Same approach as for the DBSimulator: both branches of the Hadamard are selected with the qubit set to zero
+        and one respectively and the resulting basis states are aggregated. Only the key column of the qubit changes.
+        """
+        word, mask = self.mask(qubits[0])
+        words = self.words()
+
+        query0 = "Select " + ", ".join(
+            [w if w != word else "({0} & ~{1}) as {0}".format(w, mask) for w in
+             words]) + ", revalue*{0} as revalue, imvalue*{0} as imvalue".format(np.sqrt(0.5)) + " FROM quantumstate"
+
+        query1 = "Select " + ", ".join(
+            [w if w != word else "({0} | {1}) as {0}".format(w, mask) for w in
+             words]) + ", revalue*{0}*(1 - 2*{1}) as revalue, imvalue*{0}*(1 - 2*{1}) as imvalue".format(
+            np.sqrt(0.5), self.bit(qubits[0])) + " FROM quantumstate"
+
+        new_values = "Select " + ", ".join(words) + ", sum(revalue) as revalue, sum(imvalue) as imvalue FROM (" + \
+                     query0 + " union all " + query1 + ") GROUP BY " + ", ".join(words)
+
+        return "replace into quantumstate (" + ", ".join(words) + ", revalue, imvalue) " + new_values
+
+    def reset_query(self, qubits):
+        masks = self.masks(qubits)
+        return self.merge_update_queries([(w, "{0} & ~{1}".format(w, m)) for w, m in masks.items()],
+                                         " or ".join(["({0} & {1}) != 0".format(w, m) for w, m in masks.items()]))
+
+    def invert_all_zero_query(self, qubits):
+        return "update quantumstate set revalue = -revalue, imvalue = -imvalue where " + " and ".join(
+            ["({0} & {1}) = 0".format(w, m) for w, m in self.masks(qubits).items()])
+
+    def invert_some_one_query(self, qubits):
+        return "update quantumstate set revalue = -revalue, imvalue = -imvalue where " + " or ".join(
+            ["({0} & {1}) != 0".format(w, m) for w, m in self.masks(qubits).items()])
+
+    def invert_all_one_query(self, qubits):
+        return "update quantumstate set revalue = -revalue, imvalue = -imvalue where " + " and ".join(
+            ["({0} & {1}) = {1}".format(w, m) for w, m in self.masks(qubits).items()])
+
+    def diffusion_group_columns(self, qubits, table):
+        masks = self.masks(qubits)
+        return [("({0}.{1} & ~{2})".format(table, w, masks[w]) if w in masks else table + "." + w, w) for w in
+                self.words()]
+
+    def diffusion_key_columns(self, qubits, means, combination):
+        bits = {}
+        for j, q in enumerate(qubits):
+            word, _mask = self.mask(q)
+            bits.setdefault(word, []).append("((({0} >> {1}) & 1) << {2})".format(combination, j, q % WORD_SIZE))
+        return [" | ".join([means + "." + w] + bits.get(w, [])) for w in self.words()]
+
+    def fused_query(self, expressions, merge):
+        """
+        The changed bits of a key column are cleared and set again from their fused expressions.
+        """
+        masks = {}
+        bits = {}
+        for q, e in expressions.items():
+            if e != self.bit_expression(q):
+                word, mask = self.mask(q)
+                masks[word] = masks.get(word, 0) | mask
+                bits.setdefault(word, []).append("({0} << {1})".format(e, q % WORD_SIZE))
+        if len(masks) == 0:
+            return None
+        assignments = [(w, "({0} & ~{1}) | ".format(w, m) + " | ".join(bits[w])) for w, m in masks.items()]
+        if merge:
+            return self.merge_update_queries(assignments)
+        return self.key_update_queries(assignments)
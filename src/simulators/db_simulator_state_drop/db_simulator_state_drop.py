@@ -5,16 +5,39 @@ from typing import List, Tuple
 import numpy as np
 
 from gate import GatesIdentfications
+from simulators.db_simulator.db_simulator import configure_page_and_cache_size, estimated_row_size, \
+    DEFAULT_EXPECTED_STATES
 from simulators.simulator import Simulator
 
 
 class DBSimulatorStateDrop(Simulator):
-    def __init__(self):
+    def __init__(self, without_rowid: bool = False, expected_states: int = None, maximum_rows: int = 1000,
+                 epsilon: float = None, renormalize: bool = False):
+        """
+        :param without_rowid: Creates the state table WITHOUT ROWID, so every change only maintains the primary key
+        B-tree. Page size and cache size are chosen from the amount of qubits and the expected amount of states.
+        :param expected_states: Expected amount of basis states, only used to choose the cache size
+        :param maximum_rows: The amount of basis states with the largest amplitudes which are kept after a gate
+        :param epsilon: If set, the state is not cut down to maximum_rows. Instead the basis states with the smallest
+        amplitudes are dropped as long as the probability discarded during the whole run stays at most epsilon.
+        :param renormalize: Rescales the remaining amplitudes to a norm of one after basis states have been dropped
+        """
+        assert maximum_rows > 0
+        assert epsilon is None or 0.0 <= epsilon < 1.0
+        self.maximum_rows = maximum_rows
+        self.epsilon = epsilon
+        self.renormalize = renormalize
+        self.discarded_probability = 0.0
+        self.fidelity = 1.0
+        self.amnt_qubits = None
+        self.without_rowid = without_rowid
+        self.expected_states = expected_states
+        self.name = "DBSimulatorStateDropWithoutRowid" if without_rowid else "DBSimulatorStateDrop"
+        self.connect()
+
+    def connect(self):
         self.conn = sqlite3.connect(':memory:')
         self.cur = self.conn.cursor()
-        self.maximum_rows = 1000
-        self.amnt_qubits = None
-        self.name = "DBSimulatorStateDrop"
         # See: https://blog.devart.com/increasing-sqlite-performance.html
         self.cur.execute('''PRAGMA threads = 8''')  # Maximum of the compiled version of sql
         self.cur.execute('''PRAGMA journal_mode = OFF''')
@@ -53,13 +76,15 @@ class DBSimulatorStateDrop(Simulator):
             else:
                 print("Unknown Gate Type")
                 raise
-        self.get_state()
+        self.conn.commit()
         end = time.process_time()
         return end - start
 
     def init_db(self, amnt_qubits: int):
         assert amnt_qubits > 0
         self.amnt_qubits = amnt_qubits
+        self.discarded_probability = 0.0
+        self.fidelity = 1.0
         query_create = "CREATE TABLE quantumstate_drop ("
         primary_key = ""
         for _t in range(amnt_qubits):
@@ -69,11 +94,30 @@ class DBSimulatorStateDrop(Simulator):
             else:
                 primary_key += ", " + "q" + str(_t)
         query_create += " revalue REAL, imvalue REAL, PRIMARY KEY (" + primary_key + ") )"
+        if self.without_rowid:
+            self.configure_storage()
+            query_create += " WITHOUT ROWID"
         self.cur.execute(query_create)
         self.cur.execute("insert into quantumstate_drop values (?" + ", ?" * (amnt_qubits + 1) + ")",
                          [0 for _t in range(amnt_qubits)] + [1.0, 0.0])
         return
 
+    def configure_storage(self):
+        """
+        Sets the page size and the cache size for the amount of qubits. Has to be called before the table is created.
+        The state is never larger than maximum_rows, apart from the doubling during a Hadamard gate. The probability
+        budget of epsilon does not bound the amount of basis states, so the same default as for the DBSimulator is used.
+        """
+        expected_states = self.expected_states
+        if expected_states is None and self.epsilon is not None:
+            expected_states = min(2 ** self.amnt_qubits, DEFAULT_EXPECTED_STATES)
+        elif expected_states is None:
+            expected_states = min(2 ** self.amnt_qubits, 2 * self.maximum_rows)
+        configure_page_and_cache_size(self, self.estimated_row_size(), expected_states)
+
+    def estimated_row_size(self):
+        return estimated_row_size(self.amnt_qubits)
+
     def init_with_state(self, state: List[Tuple[List[int], float, float]]):
         assert abs(sum([r ** 2 + i ** 2 for (_s, r, i) in state]) - 1.0) < 1e-6
         self.cur.execute("DELETE FROM quantumstate_drop")
@@ -83,18 +127,54 @@ class DBSimulatorStateDrop(Simulator):
                              s + [r, i])
         return
 
+    def init_with_chunks(self, chunks):
+        """
+        Bulk loads the state from an iterable of (basis_states, amplitudes) chunks, where basis_states is a
+        (states, amnt_qubits) array with the qubit values and amplitudes are the complex amplitudes. All chunks are
+        inserted with executemany inside the same transaction. Like in the DBSimulator, the chunks are checked before
+        the old state is deleted.
+        """
+        chunks = [(np.asarray(b), np.asarray(a, dtype=np.complex128)) for b, a in chunks]
+        assert all(b.shape == (len(a), self.amnt_qubits) for b, a in chunks)
+        assert abs(sum(np.vdot(a, a).real for _b, a in chunks) - 1.0) < 1e-6
+        self.cur.execute("DELETE FROM quantumstate_drop")
+        query = "insert into quantumstate_drop values (?" + ", ?" * (self.amnt_qubits + 1) + ")"
+        for basis_states, amplitudes in chunks:
+            self.cur.executemany(query, [s + [r, i] for s, r, i in zip(basis_states.astype(np.int64).tolist(),
+                                                                       amplitudes.real.tolist(),
+                                                                       amplitudes.imag.tolist())])
+        return
+
     def destroy_db(self):
         self.cur.execute("DROP TABLE quantumstate_drop")
 
     def get_state(self):
         """
-        Only this function commits the transaction. This is done for performance reasons. Only use this function
-        to access the state or commit before accessing the state.
+        Only this function, iter_state and run commit the transaction. This is done for performance reasons. Only use
+        these functions to access the state or commit before accessing the state.
         :return:
         """
         self.conn.commit()
         return self.cur.execute('SELECT * FROM quantumstate_drop').fetchall()
 
+    def iter_state(self, chunk_size: int = 10000):
+        """
+        Streams the state in chunks, without building the full list of rows.
+        :return: Pairs of a (rows, amnt_qubits) uint8 array with the qubit values and a complex128 array with the
+        amplitudes of these basis states
+        """
+        self.conn.commit()
+        cursor = self.conn.execute('SELECT * FROM quantumstate_drop')
+        rows = cursor.fetchmany(chunk_size)
+        while len(rows) > 0:
+            yield self.state_chunk(rows)
+            rows = cursor.fetchmany(chunk_size)
+        cursor.close()
+
+    def state_chunk(self, rows):
+        chunk = np.array(rows, dtype=np.float64)
+        return chunk[:, :-2].astype(np.uint8), chunk[:, -2] + 1j * chunk[:, -1]
+
     def execute_cnot(self, qubits):
         assert len(qubits) == 2
         query = "update quantumstate_drop set q{1} = (1 - q{1})*q{0} + q{1}*(1 - q{0}) where 1".format(qubits[0],
@@ -109,19 +189,19 @@ class DBSimulatorStateDrop(Simulator):
         return
 
     def execute_pauliy(self, qubits):
+        """
+        Y|0> = i|1> and Y|1> = -i|0>, so the amplitude is multiplied by i with a sign given by the old qubit value.
+        SQLite evaluates all expressions of the update on the old row.
+        """
         assert len(qubits) == 1
-        query = "update quantumstate_drop set q{0} = (1 - q{0})," \
-                " imvalue = case when q{0} = 1 then -revalue else revalue end, " \
-                "revalue = case when q{0} = 1 then imvalue else -imvalue END where 1".format(
-            qubits[0])
+        query = "update quantumstate_drop set q{0} = (1 - q{0}), revalue = (2*q{0} - 1)*imvalue," \
+                " imvalue = (1 - 2*q{0})*revalue where 1".format(qubits[0])
         self.cur.execute(query)
         return
 
     def execute_pauliz(self, qubits):
         assert len(qubits) == 1
-        query = "update quantumstate_drop set imvalue = case when q{0} = 1 then -imvalue else imvalue end," \
-                " revalue = case when q{0} = 1 then -revalue else revalue END where 1".format(
-            qubits[0])
+        query = "update quantumstate_drop set revalue = -revalue, imvalue = -imvalue where q{0} = 1".format(qubits[0])
         self.cur.execute(query)
         return
 
@@ -148,7 +228,7 @@ class DBSimulatorStateDrop(Simulator):
         query1 = "Select " + ", ".join(
             ["q" + str(_t) if _t != qubits[0] else "1 as q" + str(_t) for _t in
              range(
-                 self.amnt_qubits)]) + ", revalue*{0}*(1 - {1}) - revalue*{0}*{1} as revalue, imvalue*{0}*(1 - {1}) - imvalue*{0}*{1}  as imvalue".format(
+                 self.amnt_qubits)]) + ", revalue*{0}*(1 - 2*{1}) as revalue, imvalue*{0}*(1 - 2*{1}) as imvalue".format(
             np.sqrt(0.5), "q" + str(qubits[0])) + " FROM quantumstate_drop"
 
         new_values = "Select " + ", ".join(["q" + str(t) for t in range(self.amnt_qubits)]) + \
@@ -160,12 +240,66 @@ class DBSimulatorStateDrop(Simulator):
                 self.amnt_qubits)]) + ", revalue, imvalue) " + new_values
         self.cur.execute(update_query)
 
-        delete_query = "delete from quantumstate_drop order by imvalue*imvalue + revalue*revalue ASC, random() LIMIT (SELECT case when count(*) - " + str(
-            self.maximum_rows) + " < 0 then 0 else count(*) - " + str(
-            self.maximum_rows) + " end FROM quantumstate_drop)"
-        self.cur.execute(delete_query)
+        self.drop_states()
+        return
+
+    def drop_states(self):
+        """
+        Deletes the basis states with the smallest amplitudes, either until at most maximum_rows are left or, if
+        epsilon is set, as long as the discarded probability stays within the budget. The probabilities are read once
+        and the probability of the smallest kept basis state is used as threshold. Everything below it is deleted in
+        one scan. Of the basis states with exactly the threshold probability, only a random subset is deleted.
+        For the row limit the threshold is found with a linear time selection, the budget needs the sorted
+        probabilities to sum them up.
+        """
+        probabilities = np.array(self.cur.execute(
+            "SELECT revalue*revalue + imvalue*imvalue FROM quantumstate_drop").fetchall(), dtype=np.float64).reshape(-1)
+        total = np.sum(probabilities)
+        if total == 0:
+            # Only basis states without an amplitude are left, there is nothing to weigh them by
+            return
+        if self.epsilon is None:
+            excess = len(probabilities) - self.maximum_rows
+            if excess <= 0:
+                return
+            threshold = np.partition(probabilities, excess)[excess]
+            below = probabilities < threshold
+            ties = excess - int(np.count_nonzero(below))
+            dropped = np.sum(probabilities[below]) + ties * threshold
+        else:
+            probabilities = np.sort(probabilities)
+            cumulative = np.cumsum(probabilities)
+            budget = (self.epsilon - self.discarded_probability) * total
+            excess = min(int(np.searchsorted(cumulative, budget, side="right")), len(probabilities) - 1)
+            if excess <= 0:
+                return
+            threshold = probabilities[excess]
+            ties = excess - int(np.searchsorted(probabilities, threshold, side="left"))
+            dropped = cumulative[excess - 1]
+
+        self.cur.execute("delete from quantumstate_drop where revalue*revalue + imvalue*imvalue < ?", (threshold,))
+        if ties > 0:
+            key = "rowid" if not self.without_rowid else "(" + ", ".join(
+                ["q" + str(t) for t in range(self.amnt_qubits)]) + ")"
+            self.cur.execute("delete from quantumstate_drop where " + key + " in (SELECT " + key.strip("()") +
+                             " FROM quantumstate_drop where revalue*revalue + imvalue*imvalue = ? "
+                             "order by random() LIMIT ?)", (threshold, ties))
+
+        self.discarded_probability += dropped / total
+        self.fidelity *= 1.0 - dropped / total
+        if self.renormalize:
+            scale = 1.0 / np.sqrt(total - dropped)
+            self.cur.execute("update quantumstate_drop set revalue = revalue*?, imvalue = imvalue*? where 1",
+                             (scale, scale))
         return
 
+    def fidelity_loss(self):
+        """
+        :return: 1 - |<exact state|simulated state>|^2 under the assumption that the dropped basis states would not have
+        interfered with the remaining ones. Every drop of the probability p reduces the fidelity by the factor 1 - p.
+        """
+        return 1.0 - self.fidelity
+
     def reset_qubits(self, qubits: List[int]):
         """
         This will produce irregularities, meaning the quantum state does not have amplitude 1,
@@ -194,9 +328,37 @@ class DBSimulatorStateDrop(Simulator):
         return
 
     def diffusion(self, qubits):
-        query = "update quantumstate_drop set revalue = -revalue + (Select sum(revalue)*" + str(
-            2.0 / (2 ** len(qubits))) + " FROM quantumstate_drop)" \
-                                        ", imvalue = -imvalue + (Select sum(imvalue)*" + str(
-            2.0 / (2 ** len(qubits))) + " FROM quantumstate_drop) where 1"
+        """
+        Same reflection as in the DBSimulator: the amplitudes a of every group of the other qubits become 2*mean - a
+        and the missing basis states of a group are inserted with the amplitude 2*mean. With a row limit only the
+        largest new basis states are inserted, since the state is cut down to maximum_rows again afterwards.
+        """
+        others = ["q" + str(t) for t in range(self.amnt_qubits) if t not in qubits]
+        positions = {q: j for j, q in enumerate(qubits)}
+        query = "CREATE TEMP TABLE diffusion_mean AS SELECT " + "".join(
+            [o + ", " for o in others]) + "sum(revalue)*{0} as revalue, sum(imvalue)*{0} as imvalue, count(*) as " \
+                                          "states FROM quantumstate_drop".format(2.0 / (2 ** len(qubits)))
+        if len(others) > 0:
+            query += " GROUP BY " + ", ".join(others)
         self.cur.execute(query)
+
+        query = "update quantumstate_drop set revalue = m.revalue - quantumstate_drop.revalue, imvalue = m.imvalue - " \
+                "quantumstate_drop.imvalue FROM diffusion_mean AS m where " + (
+                    " and ".join(["quantumstate_drop." + o + " = m." + o for o in others]) if len(others) > 0 else "1")
+        self.cur.execute(query)
+
+        query = "WITH RECURSIVE combinations(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM combinations WHERE i < " + str(
+            2 ** len(qubits) - 1) + ") INSERT OR IGNORE INTO quantumstate_drop SELECT " + ", ".join(
+            ["((c.i >> {0}) & 1)".format(positions[t]) if t in positions else "m.q" + str(t) for t in
+             range(self.amnt_qubits)]) + ", m.revalue, m.imvalue FROM diffusion_mean AS m " \
+                                         "CROSS JOIN combinations AS c where m.states < " + str(2 ** len(qubits)) + \
+                " and (m.revalue != 0 or m.imvalue != 0)"
+        if self.epsilon is None:
+            # At most maximum_rows of the new basis states can survive the following drop
+            query += " order by m.revalue*m.revalue + m.imvalue*m.imvalue DESC LIMIT (SELECT count(*) + " + str(
+                self.maximum_rows) + " FROM quantumstate_drop)"
+        self.cur.execute(query)
+        self.cur.execute("DROP TABLE diffusion_mean")
+
+        self.drop_states()
         return
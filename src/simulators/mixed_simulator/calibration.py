@@ -0,0 +1,111 @@
+import numpy as np
+
+from circuit import addition_circuit, superposition_circuit
+from simulators.array_simulator.array_simulator import ArraySimulator
+from simulators.db_simulator.db_simulator import DBSimulator
+from simulators.db_simulator_state_drop.db_simulator_state_drop import DBSimulatorStateDrop
+from simulators.mixed_simulator.cost_model import BackendCost, CostModel, CALIBRATION_FILE
+from simulators.mixed_simulator.heuristics import Heuristics, HeuristicsEnumeration
+from simulators.simulator import Simulator
+
+
+def default_simulators(dense_simulator: Simulator):
+    """
+    :param dense_simulator: The dense simulator of the MixedSimulator, e.g. MixedSimulator().dense_simulator
+    :return: The simulators of the cost model by name
+    """
+    return {"db": DBSimulator(), "array": ArraySimulator(), "state_drop": DBSimulatorStateDrop(),
+            "dense": dense_simulator}
+
+
+def measure_time(simulator: Simulator, circuit, amnt_qubits: int, iterations: int):
+    """
+    :return: The mean time of the runs of the circuit on the simulator
+    """
+    return float(np.mean([simulator.run(circuit, amnt_qubits) for _i in range(iterations)]))
+
+
+def choose_heuristic(circuits, heuristics: Heuristics = None):
+    """
+    Runs the circuits on the ArraySimulator, which stores exactly the reachable basis states, and compares the amount
+    of basis states at the end with the estimate of every heuristic.
+    :param circuits: Pairs of a circuit and its amount of qubits
+    :return: The heuristic with the smallest mean absolute error, the superposition tracking heuristic on a tie
+    """
+    heuristics = heuristics if heuristics is not None else Heuristics()
+    simulator = ArraySimulator()
+    candidates = [HeuristicsEnumeration.superposition_tracking_heuristic,
+                  HeuristicsEnumeration.basic_state_calculation_heuristic]
+    errors = {h: 0.0 for h in candidates}
+    for circuit, amnt_qubits in circuits:
+        simulator.run(circuit, amnt_qubits)
+        states_log2 = np.log2(len(simulator.get_state()))
+        for h in candidates:
+            errors[h] += abs(heuristics.calculate_state_profile(circuit, h)[-1] - states_log2)
+    return min(candidates, key=lambda h: errors[h])
+
+
+def fit_backend_cost(backend_cost: BackendCost, samples):
+    """
+    Least squares fit of the time coefficients of a simulator, coefficients which would be negative are set to zero
+    and the others are fitted again. The memory coefficients are kept.
+    :param samples: Pairs of the features of a circuit (see BackendCost.features) and its measured time
+    :return: A new BackendCost with the fitted coefficients
+    """
+    features = np.array([f for f, _t in samples], dtype=np.float64)
+    times = np.array([t for _f, t in samples], dtype=np.float64)
+    # The columns differ by orders of magnitude, they are scaled to make the fit well conditioned
+    scale = np.max(features, axis=0)
+    scale[scale == 0] = 1.0
+    active = list(range(features.shape[1]))
+    coefficients = np.zeros(features.shape[1])
+    while len(active) > 0:
+        solution = np.linalg.lstsq(features[:, active] / scale[active], times, rcond=None)[0]
+        if np.all(solution >= 0):
+            coefficients[active] = solution / scale[active]
+            break
+        active = [c for c, s in zip(active, solution) if s >= 0]
+    values = backend_cost.to_dict()
+    values["seconds_per_gate"], values["seconds_per_state"], values["seconds_per_branching_state"] = [
+        float(c) for c in coefficients]
+    return BackendCost.from_dict(values)
+
+
+def calibrate(dense_simulator: Simulator, iterations: int = 3, max_input_size: int = 2,
+              max_non_det_qubits: int = 4, max_qubits_superposition: int = 10,
+              calibration_file: str = CALIBRATION_FILE, simulators=None):
+    """
+    Runs the superposition and the addition circuits with small sizes on every simulator, fits their time
+    coefficients to the measured times and saves the cost model and the best heuristic to the calibration file,
+    from where the MixedSimulator and the Heuristics load them if it is passed to them.
+    :param dense_simulator: The dense simulator of the MixedSimulator, it is calibrated as "dense"
+    :param calibration_file: The file is not written if it is None
+    :param simulators: The simulators to calibrate by their name in the cost model, see default_simulators
+    :return: The calibrated cost model and heuristic
+    """
+    simulators = simulators if simulators is not None else default_simulators(dense_simulator)
+    # The circuits of the superposition and the addition benchmark, with their amount of qubits
+    superposition = [(superposition_circuit(non_det), amnt_qubits) for amnt_qubits in
+                     range(1, max_qubits_superposition + 1) for non_det in range(amnt_qubits + 1)]
+    addition = [(addition_circuit(input_size, non_det), 3 * input_size + 5) for input_size in
+                range(1, max_input_size + 1) for non_det in range(min(max_non_det_qubits, 2 * input_size) + 1)]
+    circuits = superposition + addition
+
+    heuristics = Heuristics(calibration_file=None)
+    heuristic = choose_heuristic(addition, heuristics)
+    profiles = [heuristics.calculate_state_profile(circuit, heuristic) for circuit, _q in circuits]
+
+    cost_model = CostModel()
+    for name, simulator in simulators.items():
+        backend_cost = cost_model.backends[name]
+        if isinstance(simulator, DBSimulatorStateDrop) and simulator.epsilon is None:
+            backend_cost.maximum_states = simulator.maximum_rows
+        samples = []
+        for (circuit, amnt_qubits), profile in zip(circuits, profiles):
+            samples.append((backend_cost.features(circuit, profile, amnt_qubits),
+                            measure_time(simulator, circuit, amnt_qubits, iterations)))
+        cost_model.backends[name] = fit_backend_cost(backend_cost, samples)
+
+    if calibration_file is not None:
+        cost_model.save(calibration_file, heuristic)
+    return cost_model, heuristic
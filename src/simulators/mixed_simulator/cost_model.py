@@ -0,0 +1,201 @@
+import json
+import os
+
+from gate import GatesIdentfications
+
+# File with the calibrated cost model and heuristic of the host, next to this module
+CALIBRATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cost-model.json")
+
+# Gates after which the sparse simulators aggregate the basis states, they are much more expensive per basis state
+BRANCHING_GATES = [GatesIdentfications.hadamard, GatesIdentfications.diffusion]
+
+
+class BackendCost:
+    def __init__(self, seconds_per_gate: float, seconds_per_state: float, seconds_per_branching_state: float,
+                 bytes_per_state: float, bytes_per_qubit: float, dense: bool = False, maximum_states: int = None):
+        """
+        Linear cost model of a simulator, the time of a gate is seconds_per_gate plus the amount of basis states
+        it is applied to times seconds_per_state, or seconds_per_branching_state for the gates in BRANCHING_GATES.
+        :param bytes_per_state: Memory per stored basis state, independent of the amount of qubits
+        :param bytes_per_qubit: Additional memory per stored basis state and qubit
+        :param dense: The simulator always stores all 2^n basis states
+        :param maximum_states: The simulator never stores more basis states, e.g. a state drop simulator
+        """
+        self.seconds_per_gate = seconds_per_gate
+        self.seconds_per_state = seconds_per_state
+        self.seconds_per_branching_state = seconds_per_branching_state
+        self.bytes_per_state = bytes_per_state
+        self.bytes_per_qubit = bytes_per_qubit
+        self.dense = dense
+        self.maximum_states = maximum_states
+
+    def states(self, states_log2, amnt_qubits):
+        if self.dense:
+            return 2 ** amnt_qubits
+        states = 2 ** min(states_log2, amnt_qubits)
+        if self.maximum_states is not None:
+            # A Hadamard doubles the state before it is cut down again
+            states = min(states, 2 * self.maximum_states)
+        return states
+
+    def features(self, circuit, profile, amnt_qubits, initial_states_log2=0):
+        """
+        :param profile: For every gate the estimated logarithm to base two of the amount of basis states after it
+        :param initial_states_log2: The estimate for the state before the first gate
+        :return: The amount of gates, the summed amount of basis states of the gates not in BRANCHING_GATES and of
+        the ones in BRANCHING_GATES, the estimated time is the dot product with the coefficients
+        """
+        features = [0.0, 0.0, 0.0]
+        states_log2 = initial_states_log2
+        for g, states_after_log2 in zip(circuit, profile):
+            # A gate is applied to the state before it, a branching gate also aggregates the state after it
+            states = self.states(max(states_log2, states_after_log2), amnt_qubits)
+            features[0] += 1
+            features[2 if g.gatter in BRANCHING_GATES else 1] += states
+            states_log2 = states_after_log2
+        return features
+
+    def coefficients(self):
+        return [self.seconds_per_gate, self.seconds_per_state, self.seconds_per_branching_state]
+
+    def estimate_time(self, circuit, profile, amnt_qubits, initial_states_log2=0):
+        """
+        :param profile: For every gate the estimated logarithm to base two of the amount of basis states after it
+        """
+        return sum(c * f for c, f in
+                   zip(self.coefficients(), self.features(circuit, profile, amnt_qubits, initial_states_log2)))
+
+    def estimate_transfer_time(self, states_log2, amnt_qubits):
+        """
+        :return: The estimated time to read the state out of the simulator or to load it into it, every basis state
+        is inserted like by a branching gate
+        """
+        return self.seconds_per_gate + self.seconds_per_branching_state * self.states(states_log2, amnt_qubits)
+
+    def estimate_memory(self, profile, amnt_qubits):
+        states = self.states(max(profile, default=0), amnt_qubits)
+        return states * (self.bytes_per_state + self.bytes_per_qubit * amnt_qubits)
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @staticmethod
+    def from_dict(values):
+        return BackendCost(**values)
+
+
+class CostModel:
+    """
+    Estimates the time and memory of every simulator for a circuit, from the state profile of a heuristic. The default
+    values were measured with 24 qubits and about 16000 basis states, calibration.calibrate fits them on the host
+    and saves them to CALIBRATION_FILE.
+    """
+
+    def __init__(self, backends=None, maximum_memory: int = 2 ** 33, seconds_per_transfer: float = 1e-3):
+        """
+        :param backends: The BackendCost of every simulator, by name ("db", "array", "state_drop" and "dense")
+        :param maximum_memory: Simulators whose estimated memory exceeds this amount of bytes are not chosen
+        :param seconds_per_transfer: Fixed time of handing the state over between two simulators, e.g. to create the
+        table of the DBSimulator
+        """
+        self.backends = backends if backends is not None else {
+            "db": BackendCost(1e-5, 3e-7, 2.2e-5, 48, 1.5),
+            "array": BackendCost(2e-5, 1.5e-8, 2.5e-7, 48, 0.25),
+            "state_drop": BackendCost(5e-5, 3e-7, 2.2e-5, 48, 1.5, maximum_states=1000),
+            "dense": BackendCost(1e-5, 8e-9, 2.2e-8, 16, 0, dense=True)}
+        self.maximum_memory = maximum_memory
+        self.seconds_per_transfer = seconds_per_transfer
+
+    def save(self, file: str = CALIBRATION_FILE, heuristic=None):
+        """
+        Writes the cost model as JSON, together with the name of the heuristic which estimated the amount of basis
+        states best during the calibration
+        """
+        values = {"maximum_memory": self.maximum_memory, "seconds_per_transfer": self.seconds_per_transfer,
+                  "backends": {name: cost.to_dict() for name, cost in self.backends.items()}}
+        if heuristic is not None:
+            values["heuristic"] = heuristic.name
+        with open(file, mode="w+") as f:
+            json.dump(values, f, indent=2)
+
+    @staticmethod
+    def load(file: str = CALIBRATION_FILE):
+        """
+        :return: The cost model saved in the file, the default one if the file does not exist. Simulators which are
+        not in the file keep their default values.
+        """
+        cost_model = CostModel()
+        if not os.path.isfile(file):
+            return cost_model
+        with open(file) as f:
+            values = json.load(f)
+        cost_model.maximum_memory = values.get("maximum_memory", cost_model.maximum_memory)
+        cost_model.seconds_per_transfer = values.get("seconds_per_transfer", cost_model.seconds_per_transfer)
+        for name, cost in values.get("backends", {}).items():
+            cost_model.backends[name] = BackendCost.from_dict(cost)
+        return cost_model
+
+    def estimate_time(self, backend, circuit, profile, amnt_qubits):
+        return self.backends[backend].estimate_time(circuit, profile, amnt_qubits)
+
+    def estimate_memory(self, backend, profile, amnt_qubits):
+        return self.backends[backend].estimate_memory(profile, amnt_qubits)
+
+    def choose_segments(self, backends, circuit, profile, amnt_qubits):
+        """
+        Splits the circuit into segments which are run on different simulators, the state is handed over between two
+        segments. The split with the smallest estimated time of the gates and of the hand-overs is found by dynamic
+        programming over the gates. Simulators whose estimated memory exceeds the maximum memory at a gate are not
+        used for it, unless none fits.
+        :param backends: The names of the simulators which can be chosen
+        :return: Triples of the name of the simulator, the index of the first gate and the index after the last gate
+        """
+        circuit = list(circuit)
+        if len(circuit) == 0:
+            return [(self.choose_backend(backends, circuit, profile, amnt_qubits), 0, 0)]
+        # For every simulator the estimated time and the segments of the best split which ends on it
+        best = {b: (0.0, []) for b in backends}
+        states_log2 = 0
+        for i, (g, states_after_log2) in enumerate(zip(circuit, profile)):
+            memory = {b: self.estimate_memory(b, [max(states_log2, states_after_log2)], amnt_qubits) for b in backends}
+            fitting = [b for b in backends if memory[b] <= self.maximum_memory]
+            if len(fitting) == 0:
+                fitting = [min(backends, key=lambda b: memory[b])]
+            current = {}
+            for b in fitting:
+                gate_time = self.backends[b].estimate_time([g], [states_after_log2], amnt_qubits, states_log2)
+                candidates = []
+                for previous, (time, segments) in best.items():
+                    if i == 0 or previous == b:
+                        candidates.append((time + gate_time, previous))
+                    else:
+                        candidates.append((time + gate_time + self.estimate_transfer_time(
+                            previous, b, states_log2, amnt_qubits), previous))
+                time, previous = min(candidates)
+                segments = best[previous][1]
+                if i > 0 and previous == b:
+                    segments = segments[:-1] + [(b, segments[-1][1], i + 1)]
+                else:
+                    segments = segments + [(b, i, i + 1)]
+                current[b] = (time, segments)
+            best = current
+            states_log2 = states_after_log2
+        return min(best.values(), key=lambda v: v[0])[1]
+
+    def estimate_transfer_time(self, source, target, states_log2, amnt_qubits):
+        """
+        :return: The estimated time to hand the state over from the source to the target simulator
+        """
+        return self.seconds_per_transfer + self.backends[source].estimate_transfer_time(states_log2, amnt_qubits) + \
+            self.backends[target].estimate_transfer_time(states_log2, amnt_qubits)
+
+    def choose_backend(self, backends, circuit, profile, amnt_qubits):
+        """
+        :param backends: The names of the simulators which can be chosen
+        :return: The name of the simulator with the smallest estimated time, which fits into the maximum memory. If
+        none of them fits, the one with the smallest estimated memory.
+        """
+        fitting = [b for b in backends if self.estimate_memory(b, profile, amnt_qubits) <= self.maximum_memory]
+        if len(fitting) == 0:
+            return min(backends, key=lambda b: self.estimate_memory(b, profile, amnt_qubits))
+        return min(fitting, key=lambda b: self.estimate_time(b, circuit, profile, amnt_qubits))
@@ -1,3 +1,5 @@
+import json
+import os
 from enum import Enum
 
 from gate import GatesIdentfications
@@ -5,14 +7,42 @@ from gate import GatesIdentfications
 
 class HeuristicsEnumeration(Enum):
     basic_state_calculation_heuristic = 0
+    superposition_tracking_heuristic = 1
 
 
 class Heuristics():
-    def calculate_states(self, circuit, state_calculation_heuristic):
+    def __init__(self, calibration_file: str = None):
+        """
+        :param calibration_file: If it exists, the heuristic chosen by the calibration is the default one, e.g.
+        CALIBRATION_FILE. By default the calibration is ignored.
+        """
+        self.default_heuristic = HeuristicsEnumeration.superposition_tracking_heuristic
+        if calibration_file is not None and os.path.isfile(calibration_file):
+            with open(calibration_file) as f:
+                heuristic = json.load(f).get("heuristic")
+            if heuristic is not None:
+                self.default_heuristic = HeuristicsEnumeration[heuristic]
+
+    def calculate_states(self, circuit, state_calculation_heuristic=None):
+        """
+        :return: The estimated logarithm to base two of the largest amount of basis states during the circuit
+        """
+        return max(self.calculate_state_profile(circuit, state_calculation_heuristic), default=0)
+
+    def calculate_state_profile(self, circuit, state_calculation_heuristic=None):
+        """
+        :param state_calculation_heuristic: By default the default_heuristic
+        :return: For every gate the estimated logarithm to base two of the amount of basis states after it
+        """
+        if state_calculation_heuristic is None:
+            state_calculation_heuristic = self.default_heuristic
         if state_calculation_heuristic == HeuristicsEnumeration.basic_state_calculation_heuristic:
             return self.basic_state_calculation_heuristic(circuit)
+        if state_calculation_heuristic == HeuristicsEnumeration.superposition_tracking_heuristic:
+            return self.superposition_tracking_heuristic(circuit)
 
     def basic_state_calculation_heuristic(self, circuit):
+        profile = []
         states_approximation = 0
         for g in circuit:
             # This can be replaced with a more complex algorithm based on the amount of states a Gatter Produces
@@ -20,4 +50,46 @@ class Heuristics():
             # To calculate
             if g.gatter == GatesIdentfications.hadamard:
                 states_approximation += 1
-        return states_approximation
+            profile.append(states_approximation)
+        return profile
+
+    def superposition_tracking_heuristic(self, circuit):
+        """
+        Every Hadamard on a qubit creates a new binary variable, the branch the basis states took. For every qubit
+        the set of variables its value depends on is tracked: a CNOT or CCNOT copies the variables of the controls to
+        the target, a reset clears them. A Hadamard on a qubit which is the only one depending on its own variable
+        undoes it, e.g. two Hadamards in a row. A diffusion makes its qubits depend on all their variables and on one
+        new variable each. The amount of distinct variables is an upper bound for the logarithm of the amount of basis
+        states, it is capped at the amount of qubits.
+        """
+        variables = {}
+        owner = {}
+        profile = []
+        amnt_qubits = 0
+        for g in circuit:
+            qubits = list(g.qubits)
+            amnt_qubits = max([amnt_qubits] + [q + 1 for q in qubits])
+            if g.gatter == GatesIdentfications.hadamard:
+                q = qubits[0]
+                dependencies = variables.get(q, set())
+                if len(dependencies) == 1 and owner.get(next(iter(dependencies))) == q and all(
+                        next(iter(dependencies)) not in v for p, v in variables.items() if p != q):
+                    variables[q] = set()
+                else:
+                    variable = len(owner)
+                    owner[variable] = q
+                    variables[q] = dependencies | {variable}
+            elif g.gatter in [GatesIdentfications.cnot, GatesIdentfications.ccnot]:
+                variables[qubits[-1]] = variables.get(qubits[-1], set()).union(
+                    *[variables.get(c, set()) for c in qubits[:-1]])
+            elif g.gatter == GatesIdentfications.reset:
+                for q in qubits:
+                    variables[q] = set()
+            elif g.gatter == GatesIdentfications.diffusion:
+                dependencies = set().union(*[variables.get(q, set()) for q in qubits])
+                for q in qubits:
+                    variable = len(owner)
+                    owner[variable] = q
+                    variables[q] = dependencies | {variable}
+            profile.append(min(len(set().union(*variables.values())), amnt_qubits))
+        return profile
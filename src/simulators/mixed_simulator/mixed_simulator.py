@@ -1,29 +1,168 @@
+import time
+
+from simulators.array_simulator.array_simulator import ArraySimulator
 from simulators.db_simulator.db_simulator import DBSimulator
+from simulators.db_simulator_state_drop.db_simulator_state_drop import DBSimulatorStateDrop
+from gate import GatesIdentfications
+from simulators.mixed_simulator.cost_model import BRANCHING_GATES, CostModel
 from simulators.mixed_simulator.heuristics import Heuristics, HeuristicsEnumeration
-from simulators.qiskit.qiskit_simulator import QiskitSimulator
+from simulators.mixed_simulator.state_conversion import amnt_dense_states, export_state, import_state
 from simulators.simulator import Simulator
 
 
 class MixedSimulator(Simulator):
-    def __init__(self):
+    def __init__(self, dense_simulator: Simulator = None, cost_model: CostModel = None,
+                 state_drop_simulator: DBSimulatorStateDrop = None, switch_simulators: bool = True,
+                 dense_threshold: float = None, sparse_threshold: float = None, calibration_file: str = None):
+        """
+        :param dense_simulator: The simulator used for circuits with many superpositions, by default the qiskit
+        simulator. Any simulator whose get_state returns the full statevector can be used, e.g. the
+        StatevectorSimulator.
+        :param cost_model: Estimates the time and memory of the simulators, by default the calibrated one from the
+        calibration file if it exists, see CostModel for the default values otherwise
+        :param state_drop_simulator: The approximate state drop simulator is only chosen if one is given, its
+        maximum_rows should match the maximum_states of the "state_drop" entry of the cost model
+        :param switch_simulators: The circuit is split into segments which run on different simulators, the state is
+        handed over between them. Otherwise a single simulator runs the whole circuit.
+        :param dense_threshold: If set, the simulators are switched at runtime from the amount of basis states the
+        simulators report instead of the estimate of the heuristic. The state moves to the dense simulator once the
+        sparse one stores more than dense_threshold * 2^n basis states.
+        :param sparse_threshold: The state moves back to the sparse simulator once less than sparse_threshold * 2^n
+        basis states have an amplitude, by default a quarter of the dense_threshold
+        :param calibration_file: The cost model and the heuristic saved by calibration.calibrate, e.g. CALIBRATION_FILE.
+        By default nothing is loaded.
+        """
         self.db_simulator = DBSimulator()
-        self.qiskit_simulator = QiskitSimulator()
-        self.heuristics = Heuristics()
+        self.array_simulator = ArraySimulator()
+        if dense_simulator is None:
+            # Qiskit is only imported if it is used, so the other simulators work without it
+            from simulators.qiskit.qiskit_simulator import QiskitSimulator
+            dense_simulator = QiskitSimulator()
+        self.dense_simulator = dense_simulator
+        self.simulators = {"db": self.db_simulator, "array": self.array_simulator, "dense": self.dense_simulator}
+        if state_drop_simulator is not None:
+            self.simulators["state_drop"] = state_drop_simulator
+        if cost_model is None:
+            cost_model = CostModel.load(calibration_file) if calibration_file is not None else CostModel()
+        self.cost_model = cost_model
+        self.heuristics = Heuristics(calibration_file)
+        self.switch_simulators = switch_simulators
+        self.dense_threshold = dense_threshold
+        self.sparse_threshold = sparse_threshold if sparse_threshold is not None or dense_threshold is None \
+            else dense_threshold / 4
+        # The amount of basis states after every gate run on a sparse simulator, reported by its gate callback
+        self.reported_states = []
+        self.db_simulator.gate_callback = self.report_states
+        self.array_simulator.gate_callback = self.report_states
+        self.chosen_simulator = None
+        self.segments = []
         self.state = None
         self.name = "MixedSimulator"
 
-    def run(self, gates, amnt_qubits,
-            state_calculation_heuristic=HeuristicsEnumeration.basic_state_calculation_heuristic) -> float:
-        states_approximation = self.heuristics.calculate_states(gates, state_calculation_heuristic)
-
-        time = 0.0
-        if 0.7 * amnt_qubits > states_approximation:
-            time += self.db_simulator.run(gates, amnt_qubits)
-            self.state = self.db_simulator.get_state()
+    def run(self, gates, amnt_qubits, state_calculation_heuristic: HeuristicsEnumeration = None) -> float:
+        """
+        Estimates the amount of basis states after every gate with the heuristic and runs the circuit on the simulators
+        with the smallest estimated time according to the cost model. The state has the format of the simulator of the
+        last segment.
+        :param state_calculation_heuristic: By default the calibrated one, or the superposition tracking heuristic
+        """
+        gates = list(gates)
+        self.reported_states = []
+        profile = self.heuristics.calculate_state_profile(gates, state_calculation_heuristic)
+        if self.dense_threshold is not None:
+            return self.run_with_reported_states(gates, amnt_qubits, profile)
+        backend = self.cost_model.choose_backend(list(self.simulators), gates, profile, amnt_qubits)
+        if self.switch_simulators and backend != "state_drop":
+            # The state drop simulator does not hand over a normalized state, it only runs whole circuits
+            self.segments = self.cost_model.choose_segments([b for b in self.simulators if b != "state_drop"], gates,
+                                                            profile, amnt_qubits)
         else:
-            time += self.qiskit_simulator.run(gates, amnt_qubits)
-            self.state = self.qiskit_simulator.get_state()
-        return time
+            self.segments = [(backend, 0, len(gates))]
+
+        run_time = 0.0
+        previous = None
+        for backend, first, last in self.segments:
+            run_time += self.run_segment(previous, backend, gates[first:last], amnt_qubits)
+            previous = backend
+        self.chosen_simulator = previous
+        self.state = self.simulators[self.chosen_simulator].get_state()
+        return run_time
+
+    def run_with_reported_states(self, gates, amnt_qubits, profile) -> float:
+        """
+        Starts on the sparse simulator with the smallest estimated time. The circuit is run in blocks which end with a
+        gate that can change the amount of basis states. The state moves to the dense simulator before a block which
+        could grow the reported amount of basis states above the dense threshold, and back to the sparse simulator
+        after a block which left less basis states than the sparse threshold.
+        """
+        sparse = self.cost_model.choose_backend([b for b in ["db", "array"] if b in self.simulators], gates, profile,
+                                                amnt_qubits)
+        blocks = []
+        block = []
+        for g in gates:
+            block.append(g)
+            if g.gatter in BRANCHING_GATES or g.gatter == GatesIdentfications.reset:
+                blocks.append(block)
+                block = []
+        if len(block) > 0 or len(blocks) == 0:
+            blocks.append(block)
+
+        run_time = 0.0
+        previous = None
+        backend = sparse
+        self.segments = []
+        first = 0
+        states = 1
+        for block in blocks:
+            if backend != "dense" and min(states * self.state_growth(block), 2 ** amnt_qubits) > \
+                    self.dense_threshold * 2 ** amnt_qubits:
+                backend = "dense"
+            run_time += self.run_segment(previous, backend, block, amnt_qubits)
+            if len(self.segments) > 0 and self.segments[-1][0] == backend:
+                self.segments[-1] = (backend, self.segments[-1][1], first + len(block))
+            else:
+                self.segments.append((backend, first, first + len(block)))
+            first += len(block)
+            previous = backend
+            if backend == "dense":
+                states = amnt_dense_states(self.dense_simulator.get_state())
+                if states < self.sparse_threshold * 2 ** amnt_qubits:
+                    backend = sparse
+            else:
+                states = self.simulators[backend].amnt_states()
+        self.chosen_simulator = previous
+        self.state = self.simulators[self.chosen_simulator].get_state()
+        return run_time
+
+    @staticmethod
+    def state_growth(gates):
+        """
+        :return: The factor by which the gates can multiply the amount of basis states at most
+        """
+        growth = 1
+        for g in gates:
+            if g.gatter == GatesIdentfications.hadamard:
+                growth *= 2
+            elif g.gatter == GatesIdentfications.diffusion:
+                growth *= 2 ** len(g.qubits)
+        return growth
+
+    def run_segment(self, previous, backend, gates, amnt_qubits) -> float:
+        """
+        Runs the gates on the simulator, after the state was handed over from the previous one
+        :param previous: The name of the simulator of the previous segment, None for the first segment
+        """
+        simulator = self.simulators[backend]
+        if previous is None:
+            return simulator.run(gates, amnt_qubits)
+        if previous == backend:
+            return simulator.run(gates)
+        start = time.process_time()
+        import_state(simulator, amnt_qubits, export_state(self.simulators[previous], amnt_qubits))
+        return time.process_time() - start + simulator.run(gates)
+
+    def report_states(self, gate, amnt_states):
+        self.reported_states.append(amnt_states)
 
     def get_state(self):
         return self.state
@@ -0,0 +1,111 @@
+import numpy as np
+
+from simulators.array_simulator.array_simulator import ArraySimulator, WORD_SIZE
+from simulators.db_simulator.db_simulator import DBSimulator
+from simulators.db_simulator_state_drop.db_simulator_state_drop import DBSimulatorStateDrop
+
+# The sparse state is handed over in chunks of at most this amount of basis states
+CHUNK_SIZE = 2 ** 16
+# Amplitudes of a dense state with a smaller absolute value are rounding errors of basis states which cancelled out
+AMPLITUDE_TOLERANCE = 1e-12
+
+
+def is_sparse(simulator):
+    return isinstance(simulator, (DBSimulator, DBSimulatorStateDrop, ArraySimulator))
+
+
+def keys(basis_states, amnt_qubits):
+    """
+    :param basis_states: Either a (states, amnt_qubits) array with the qubit values or a one dimensional array of keys
+    where bit q is the value of qubit q, the same formats DBSimulator.init_with_arrays accepts
+    :return: The keys of the basis states, only possible for up to 63 qubits
+    """
+    basis_states = np.asarray(basis_states)
+    if basis_states.ndim == 1:
+        return basis_states.astype(np.int64)
+    shifts = np.arange(amnt_qubits, dtype=np.int64)
+    return np.bitwise_or.reduce(basis_states.astype(np.int64).reshape(-1, amnt_qubits) << shifts, axis=1)
+
+
+def bits(basis_states, amnt_qubits):
+    """
+    :return: The basis states in any format of keys as a (states, amnt_qubits) uint8 array
+    """
+    basis_states = np.asarray(basis_states)
+    if basis_states.ndim == 2:
+        return basis_states.astype(np.uint8)
+    return ((basis_states.astype(np.int64)[:, np.newaxis] >> np.arange(amnt_qubits, dtype=np.int64)) & 1).astype(
+        np.uint8)
+
+
+def sparse_to_dense(chunks, amnt_qubits):
+    """
+    :param chunks: Pairs of basis states in a format of keys and their complex amplitudes
+    :return: The statevector with 2^amnt_qubits amplitudes, qubit q is bit q of the index like in qiskit
+    """
+    state = np.zeros(2 ** amnt_qubits, dtype=np.complex128)
+    for basis_states, amplitudes in chunks:
+        state[keys(basis_states, amnt_qubits)] = amplitudes
+    return state
+
+
+def dense_to_sparse(state, amnt_qubits, chunk_size: int = CHUNK_SIZE):
+    """
+    :param state: The statevector with 2^amnt_qubits amplitudes
+    :return: The keys of the basis states with an amplitude above AMPLITUDE_TOLERANCE and their amplitudes, in chunks
+    """
+    state = np.asarray(state, dtype=np.complex128)
+    indices = np.flatnonzero(np.abs(state) > AMPLITUDE_TOLERANCE)
+    for start in range(0, len(indices), chunk_size):
+        chunk = indices[start:start + chunk_size]
+        yield chunk, state[chunk]
+
+
+def amnt_dense_states(state):
+    """
+    :return: The amount of basis states of the statevector with an amplitude above AMPLITUDE_TOLERANCE
+    """
+    return int(np.count_nonzero(np.abs(np.asarray(state)) > AMPLITUDE_TOLERANCE))
+
+
+def export_state(simulator, amnt_qubits):
+    """
+    :return: The state of the simulator in chunks in the format of sparse_to_dense
+    """
+    if isinstance(simulator, ArraySimulator) and amnt_qubits < WORD_SIZE:
+        # The packed basis states already are the keys
+        simulator.aggregate_state()
+        return [(simulator.basis_states[:, 0].astype(np.int64), simulator.amplitudes.copy())]
+    if is_sparse(simulator):
+        return simulator.iter_state()
+    return dense_to_sparse(simulator.get_state(), amnt_qubits)
+
+
+def import_state(simulator, amnt_qubits, chunks):
+    """
+    Replaces the state of the simulator, so that its next run without an amount of qubits continues from it.
+    :param chunks: The state in the format of sparse_to_dense
+    """
+    if isinstance(simulator, ArraySimulator):
+        chunks = list(chunks)
+        if amnt_qubits < WORD_SIZE:
+            basis_states = [keys(b, amnt_qubits) for b, _a in chunks]
+        else:
+            basis_states = [bits(b, amnt_qubits) for b, _a in chunks]
+        amplitudes = [a for _b, a in chunks]
+        if len(chunks) == 0:
+            basis_states, amplitudes = [np.zeros((0, amnt_qubits))], [np.zeros(0)]
+        simulator.init_with_arrays(amnt_qubits, np.concatenate(basis_states), np.concatenate(amplitudes))
+    elif isinstance(simulator, DBSimulator):
+        if simulator.amnt_qubits is not None:
+            simulator.destroy_db()
+        simulator.init_db(amnt_qubits)
+        simulator.init_with_chunks(chunks)
+    elif isinstance(simulator, DBSimulatorStateDrop):
+        if simulator.amnt_qubits is not None:
+            simulator.destroy_db()
+        simulator.init_db(amnt_qubits)
+        simulator.init_with_chunks(
+            (bits(basis_states, amnt_qubits), amplitudes) for basis_states, amplitudes in chunks)
+    else:
+        simulator.init_with_state(amnt_qubits, sparse_to_dense(chunks, amnt_qubits))
@@ -0,0 +1,38 @@
+class AerOptions:
+    def __init__(self, max_parallel_threads: int = None, precision: str = "double", fusion_enable: bool = None,
+                 fusion_threshold: int = None, fusion_max_qubit: int = None,
+                 statevector_parallel_threshold: int = None):
+        """
+        Performance options of the Aer statevector simulator, None keeps the default of Aer.
+        :param max_parallel_threads: Maximum amount of CPU threads, 0 uses all cores
+        :param precision: "double" or "single", single precision halves the memory of the statevector
+        :param fusion_enable: Fuses consecutive gates into larger unitaries before the simulation
+        :param fusion_threshold: Minimum amount of qubits of a circuit for which gate fusion is used
+        :param fusion_max_qubit: Maximum amount of qubits of a fused gate
+        :param statevector_parallel_threshold: Minimum amount of qubits for which the statevector is updated in
+        parallel
+        """
+        assert precision in ["double", "single"]
+        assert max_parallel_threads is None or max_parallel_threads >= 0
+        self.max_parallel_threads = max_parallel_threads
+        self.precision = precision
+        self.fusion_enable = fusion_enable
+        self.fusion_threshold = fusion_threshold
+        self.fusion_max_qubit = fusion_max_qubit
+        self.statevector_parallel_threshold = statevector_parallel_threshold
+
+    def run_options(self):
+        """
+        :return: The options which differ from the defaults of Aer, as keyword arguments of the run of the backend
+        """
+        options = {k: v for k, v in vars(self).items() if v is not None}
+        if self.precision == "double":
+            del options["precision"]
+        return options
+
+    def description(self):
+        """
+        :return: The options which differ from the defaults, e.g. "precision=single;max_parallel_threads=8". It is
+        part of the simulator name, so it is recorded in the benchmark output, it contains no commas.
+        """
+        return ";".join([k + "=" + str(v) for k, v in self.run_options().items()])
@@ -1,74 +1,140 @@
 import time
 import warnings
+from collections import OrderedDict
 
-from qiskit import QuantumCircuit, Aer
+import numpy as np
+from qiskit import QuantumCircuit, Aer, transpile
 
 from gate import GatesIdentfications
+from simulators.qiskit.aer_options import AerOptions
 from simulators.simulator import Simulator
 
 
 class QiskitSimulator(Simulator):
-    def __init__(self):
+    def __init__(self, circuit_cache_size: int = 16, aer_options: AerOptions = None):
+        """
+        :param circuit_cache_size: Amount of translated and transpiled circuits which are kept, so repeated runs of the
+        same circuit only simulate it
+        :param aer_options: Threads, precision and gate fusion of the Aer simulator, by default the ones of Aer. Options
+        which differ from them are appended to the name, e.g. QiskitSimulator[precision=single]
+        """
         self.qc = None
+        self.compiled_qc = None
         self.amnt_qubits = None
         self.state = []
+        self.circuit_cache_size = circuit_cache_size
+        self.circuit_cache = OrderedDict()
+        self.circuit_cache_hits = 0
+        self.circuit_cache_misses = 0
+        self.aer_options = aer_options if aer_options is not None else AerOptions()
         self.name = "QiskitSimulator"
+        if self.aer_options.description() != "":
+            self.name += "[" + self.aer_options.description() + "]"
         # To ignore Pending Deprecation Warning for the simulator
         warnings.filterwarnings("ignore", category=PendingDeprecationWarning)
         self.simulator = Aer.get_backend('statevector_simulator')
 
     def run(self, gates, amnt_qubits=None) -> float:
+        """
+        With an amount of qubits the circuit starts from the zero state and is taken from the circuit cache. Without
+        one the gates are appended to the current circuit, e.g. after init_with_state, and it is transpiled again.
+        """
         start = time.process_time()
+        gates = list(gates)
         if amnt_qubits is not None:
-            self.init_network(amnt_qubits)
+            self.amnt_qubits = amnt_qubits
+            self.qc, self.compiled_qc = self.cached_circuit(gates, amnt_qubits)
+        else:
+            # compose returns a new circuit, so a cached circuit is never changed
+            self.qc = self.qc.compose(self.build_circuit(gates, self.amnt_qubits))
+            self.compiled_qc = transpile(self.qc, self.simulator)
+        self.state = self.simulator.run(self.compiled_qc, **self.aer_options.run_options()).result().get_statevector()
+        end = time.process_time()
+        return end - start
+
+    def cached_circuit(self, gates, amnt_qubits):
+        """
+        Returns the translated and the transpiled circuit from the LRU cache. The key is the structure of the circuit,
+        the type and the qubits of every gate and the amount of qubits.
+        """
+        key = (amnt_qubits, tuple((g.gatter, tuple(g.qubits)) for g in gates))
+        circuits = self.circuit_cache.get(key)
+        if circuits is None:
+            self.circuit_cache_misses += 1
+            qc = self.build_circuit(gates, amnt_qubits)
+            circuits = (qc, transpile(qc, self.simulator))
+            self.circuit_cache[key] = circuits
+            if len(self.circuit_cache) > self.circuit_cache_size:
+                self.circuit_cache.popitem(last=False)
+        else:
+            self.circuit_cache_hits += 1
+            self.circuit_cache.move_to_end(key)
+        return circuits
+
+    def circuit_cache_hit_rate(self):
+        lookups = self.circuit_cache_hits + self.circuit_cache_misses
+        if lookups == 0:
+            return 0.0
+        return self.circuit_cache_hits / lookups
+
+    @staticmethod
+    def build_circuit(gates, amnt_qubits):
+        """
+        :return: The gates translated into a QuantumCircuit
+        """
+        qc = QuantumCircuit(amnt_qubits)
         for gate in gates:
             if gate.gatter == GatesIdentfications.cnot:
-                self.qc.cx(*gate.qubits)
+                qc.cx(*gate.qubits)
             elif gate.gatter == GatesIdentfications.ccnot:
-                self.qc.ccx(*gate.qubits)
+                qc.ccx(*gate.qubits)
             elif gate.gatter == GatesIdentfications.paulix:
-                self.qc.x(*gate.qubits)
+                qc.x(*gate.qubits)
             elif gate.gatter == GatesIdentfications.pauliy:
-                self.qc.y(*gate.qubits)
+                qc.y(*gate.qubits)
             elif gate.gatter == GatesIdentfications.pauliz:
-                self.qc.z(*gate.qubits)
+                qc.z(*gate.qubits)
             elif gate.gatter == GatesIdentfications.hadamard:
-                self.qc.h(*gate.qubits)
+                qc.h(*gate.qubits)
             elif gate.gatter == GatesIdentfications.reset:
-                self.qc.reset(*gate.qubits)
+                qc.reset(*gate.qubits)
             elif gate.gatter == GatesIdentfications.invert_all_one:
-                self.qc.h(gate.qubits[0])
-                self.qc.mct(list(gate.qubits[1:]), gate.qubits[0])
-                self.qc.h(gate.qubits[0])
+                QiskitSimulator.invert_all_one(qc, gate.qubits)
             elif gate.gatter == GatesIdentfications.invert_all_zero:
-                for q in gate.qubits:
-                    self.qc.x(q)
-                self.qc.h(gate.qubits[0])
-                self.qc.mct(list(gate.qubits[1:]), gate.qubits[0])
-                self.qc.h(gate.qubits[0])
-                for q in gate.qubits:
-                    self.qc.x(q)
+                QiskitSimulator.invert_all_zero(qc, gate.qubits)
+            elif gate.gatter == GatesIdentfications.invert_some_one:
+                # Inverting all basis states except the all zero one is a global phase of -1 times invert_all_zero
+                QiskitSimulator.invert_all_zero(qc, gate.qubits)
+                qc.global_phase += np.pi
             elif gate.gatter == GatesIdentfications.diffusion:
                 for h in gate.qubits:
-                    self.qc.h(h)
-
-                # Invert all zero
-                for q in gate.qubits:
-                    self.qc.x(q)
-                self.qc.h(gate.qubits[0])
-                self.qc.mct(list(gate.qubits[1:]), gate.qubits[0])
-                self.qc.h(gate.qubits[0])
-                for q in gate.qubits:
-                    self.qc.x(q)
-
+                    qc.h(h)
+                QiskitSimulator.invert_all_zero(qc, gate.qubits)
                 for h in gate.qubits:
-                    self.qc.h(h)
+                    qc.h(h)
             else:
                 print("Unknown Gate Type")
                 raise
-        self.state = self.simulator.run(self.qc).result().get_statevector()
-        end = time.process_time()
-        return end - start
+        return qc
+
+    @staticmethod
+    def invert_all_one(qc, qubits):
+        """
+        A single multi-controlled phase of pi, which Aer applies as one diagonal operation. It is symmetric in its
+        qubits, so any of them can be the target.
+        """
+        if len(qubits) == 1:
+            qc.z(qubits[0])
+        else:
+            qc.mcp(np.pi, list(qubits[1:]), qubits[0])
+
+    @staticmethod
+    def invert_all_zero(qc, qubits):
+        for q in qubits:
+            qc.x(q)
+        QiskitSimulator.invert_all_one(qc, qubits)
+        for q in qubits:
+            qc.x(q)
 
     def init_with_state(self, amnt_qubits, state):
         self.init_network(amnt_qubits)
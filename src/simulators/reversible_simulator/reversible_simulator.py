@@ -0,0 +1,88 @@
+import time
+
+import numpy as np
+
+from gate import GatesIdentfications, PERMUTATION_GATES
+from simulators.array_simulator.array_simulator import ArraySimulator, WORD_SIZE
+
+
+class ReversibleSimulator(ArraySimulator):
+    """
+    Array simulator with a fast path for the classical reversible parts of a circuit. Consecutive permutation gates
+    (CNOT, CCNOT, Pauli X and reset) never change an amplitude, they only relabel the basis states. Such a segment is
+    evaluated at once: the touched qubits are extracted from the packed basis states into one bit array per qubit,
+    every gate becomes a single bitwise operation on these arrays and the result is packed back. All other gates are
+    executed by the ArraySimulator.
+    """
+
+    def __init__(self, amplitude_cutoff: float = None, maximum_states: int = None):
+        super().__init__(amplitude_cutoff, maximum_states)
+        self.name = "ReversibleSimulator"
+        if amplitude_cutoff is not None or maximum_states is not None:
+            self.name = "ReversibleSimulatorStateDrop"
+
+    def run(self, gates, amnt_qubits=None) -> float:
+        start = time.process_time()
+        if amnt_qubits is not None:
+            self.init_state(amnt_qubits)
+        segment = []
+        for gate in gates:
+            if gate.gatter in PERMUTATION_GATES:
+                segment.append(gate)
+                continue
+            self.execute_permutation(segment)
+            self.report_states(segment)
+            segment = []
+            self.execute_gate(gate)
+            self.report_states([gate])
+        self.execute_permutation(segment)
+        self.report_states(segment)
+        self.aggregate_state()
+        end = time.process_time()
+        return end - start
+
+    def execute_permutation(self, gates):
+        """
+        :param gates: Gates which are all contained in PERMUTATION_GATES
+        """
+        if len(gates) == 0:
+            return
+        qubits = sorted({q for gate in gates for q in gate.qubits})
+        bits = {q: self.bits(q) for q in qubits}
+        for gate in gates:
+            if gate.gatter == GatesIdentfications.cnot:
+                bits[gate.qubits[1]] ^= bits[gate.qubits[0]]
+            elif gate.gatter == GatesIdentfications.ccnot:
+                bits[gate.qubits[2]] ^= bits[gate.qubits[0]] & bits[gate.qubits[1]]
+            elif gate.gatter == GatesIdentfications.paulix:
+                bits[gate.qubits[0]] ^= 1
+            elif gate.gatter == GatesIdentfications.reset:
+                for q in gate.qubits:
+                    bits[q][:] = 0
+        self.store_bits(bits)
+
+    def bits(self, qubit):
+        """
+        :return: The value of the qubit for every basis state as uint8 array
+        """
+        word, _mask = self.mask(qubit)
+        return ((self.basis_states[:, word] >> np.uint64(qubit % WORD_SIZE)) & np.uint64(1)).astype(np.uint8)
+
+    def store_bits(self, bits):
+        """
+        Writes the bit arrays of the qubits back into the packed basis states.
+        """
+        words = {}
+        for q in bits:
+            words.setdefault(self.mask(q)[0], []).append(q)
+        for word, qubits in words.items():
+            column = self.basis_states[:, word]
+            column &= ~np.bitwise_or.reduce([self.mask(q)[1] for q in qubits])
+            for q in qubits:
+                column |= bits[q].astype(np.uint64) << np.uint64(q % WORD_SIZE)
+
+
+if __name__ == "__main__":
+    reversible = ReversibleSimulator()
+    reversible.run([], 2)
+    print(reversible.get_state())
@@ -0,0 +1,159 @@
+import time
+
+import numpy as np
+
+from gate import GatesIdentfications
+from simulators.simulator import Simulator
+
+
+class StatevectorSimulator(Simulator):
+    """
+    Dense simulator which keeps all 2^n amplitudes in a complex128 vector, with the same ordering as the qiskit
+    statevector (qubit q is bit q of the index). The gates are applied on the vector reshaped to one axis per qubit,
+    so every gate is a handful of vectorized NumPy operations on views of the state.
+    """
+
+    def __init__(self):
+        self.state = None
+        self.amnt_qubits = None
+        self.name = "StatevectorSimulator"
+
+    def run(self, gates, amnt_qubits=None) -> float:
+        start = time.process_time()
+        if amnt_qubits is not None:
+            self.init_state(amnt_qubits)
+        for gate in gates:
+            if gate.gatter == GatesIdentfications.cnot:
+                self.execute_cnot(gate.qubits)
+            elif gate.gatter == GatesIdentfications.ccnot:
+                self.execute_ccnot(gate.qubits)
+            elif gate.gatter == GatesIdentfications.paulix:
+                self.execute_paulix(gate.qubits)
+            elif gate.gatter == GatesIdentfications.pauliy:
+                self.execute_pauliy(gate.qubits)
+            elif gate.gatter == GatesIdentfications.pauliz:
+                self.execute_pauliz(gate.qubits)
+            elif gate.gatter == GatesIdentfications.hadamard:
+                self.execute_hadamard(gate.qubits)
+            elif gate.gatter == GatesIdentfications.reset:
+                self.reset_qubits(gate.qubits)
+            elif gate.gatter == GatesIdentfications.invert_all_zero:
+                self.invert_all_zero(gate.qubits)
+            elif gate.gatter == GatesIdentfications.invert_some_one:
+                self.invert_some_one(gate.qubits)
+            elif gate.gatter == GatesIdentfications.invert_all_one:
+                self.invert_all_one(gate.qubits)
+            elif gate.gatter == GatesIdentfications.diffusion:
+                self.diffusion(gate.qubits)
+            else:
+                print("Unknown Gate Type")
+                raise
+        end = time.process_time()
+        return end - start
+
+    def init_state(self, amnt_qubits):
+        self.amnt_qubits = amnt_qubits
+        self.state = np.zeros(2 ** amnt_qubits, dtype=np.complex128)
+        self.state[0] = 1.0
+
+    def init_with_state(self, amnt_qubits, state):
+        """
+        :param state: The 2^amnt_qubits amplitudes, in the format get_state returns
+        """
+        assert len(state) == 2 ** amnt_qubits
+        self.amnt_qubits = amnt_qubits
+        self.state = np.array(state, dtype=np.complex128)
+
+    def get_state(self):
+        return self.state
+
+    def tensor(self):
+        """
+        :return: A view of the state with one axis of length two per qubit, qubit q is axis amnt_qubits - 1 - q
+        """
+        return self.state.reshape((2,) * self.amnt_qubits)
+
+    def axis(self, qubit):
+        return self.amnt_qubits - 1 - qubit
+
+    def index(self, qubits, values):
+        """
+        :return: The index into the tensor which selects the amplitudes where the qubits have the given values
+        """
+        index = [slice(None)] * self.amnt_qubits
+        for q, v in zip(qubits, values):
+            index[self.axis(q)] = v
+        return tuple(index)
+
+    def controlled_flip(self, controls, target):
+        """
+        Swaps the amplitudes of the target qubit being zero and one, where all the controls are one.
+        """
+        tensor = self.tensor()
+        zero = self.index(controls + [target], [1] * len(controls) + [0])
+        one = self.index(controls + [target], [1] * len(controls) + [1])
+        tensor[zero], tensor[one] = tensor[one].copy(), tensor[zero].copy()
+
+    def execute_cnot(self, qubits):
+        self.controlled_flip([qubits[0]], qubits[1])
+
+    def execute_ccnot(self, qubits):
+        self.controlled_flip([qubits[0], qubits[1]], qubits[2])
+
+    def execute_paulix(self, qubits):
+        self.controlled_flip([], qubits[0])
+
+    def execute_pauliy(self, qubits):
+        # Y|0> = i|1> and Y|1> = -i|0>
+        tensor = self.tensor()
+        zero = self.index(qubits[:1], [0])
+        one = self.index(qubits[:1], [1])
+        tensor[zero], tensor[one] = -1j * tensor[one], 1j * tensor[zero]
+
+    def execute_pauliz(self, qubits):
+        self.tensor()[self.index(qubits[:1], [1])] *= -1
+
+    def execute_hadamard(self, qubits):
+        tensor = self.tensor()
+        zero = self.index(qubits[:1], [0])
+        one = self.index(qubits[:1], [1])
+        a0 = tensor[zero] * np.sqrt(0.5)
+        a1 = tensor[one] * np.sqrt(0.5)
+        tensor[zero] = a0 + a1
+        tensor[one] = a0 - a1
+
+    def reset_qubits(self, qubits):
+        """
+        Same semantic as the sparse simulators, the amplitude of every basis state is added to the basis state with
+        the qubit set to zero.
+        """
+        tensor = self.tensor()
+        for q in qubits:
+            tensor[self.index([q], [0])] += tensor[self.index([q], [1])]
+            tensor[self.index([q], [1])] = 0.0
+
+    def invert_all_zero(self, qubits):
+        self.tensor()[self.index(qubits, [0] * len(qubits))] *= -1
+
+    def invert_some_one(self, qubits):
+        self.state *= -1
+        self.invert_all_zero(qubits)
+
+    def invert_all_one(self, qubits):
+        self.tensor()[self.index(qubits, [1] * len(qubits))] *= -1
+
+    def diffusion(self, qubits):
+        """
+        Inversion about the mean: for every value of the other qubits, the amplitudes a over the given qubits are
+        replaced by 2*mean(a) - a.
+        """
+        tensor = self.tensor()
+        mean = tensor.mean(axis=tuple(self.axis(q) for q in qubits), keepdims=True)
+        tensor *= -1
+        tensor += 2 * mean
+
+
+if __name__ == "__main__":
+    statevector = StatevectorSimulator()
+    statevector.run([], 2)
+    print(statevector.get_state())
@@ -3,14 +3,21 @@ import unittest
 import numpy as np
 
 from circuit import Circuit
+from gate import Gate, GatesIdentfications
 from simulators.array_simulator.array_simulator import ArraySimulator
+from simulators.db_simulator.db_simulator import DBSimulator
+from simulators.reversible_simulator.reversible_simulator import ReversibleSimulator
 
 
-class ArraySimulatorTest(unittest.TestCase):
+class ArraySimulatorTestCases:
+    """
+    Tests of every array simulator, the test case classes set the simulator class.
+    """
+    simulator_class = None
 
     def test_array_simulator_addition_zero(self):
 
-        array_simulator = ArraySimulator()
+        array_simulator = self.simulator_class()
 
         array_simulator.init_state(100)
         circuit = Circuit()
@@ -25,7 +32,7 @@ class ArraySimulatorTest(unittest.TestCase):
                     self.assertAlmostEqual(x, 0.0, delta=10e-7)
 
     def test_array_simulator_addition_one_left(self):
-        array_simulator = ArraySimulator()
+        array_simulator = self.simulator_class()
         amnt_qubits = 100
 
         array_simulator.init_state(100)
@@ -44,7 +51,7 @@ class ArraySimulatorTest(unittest.TestCase):
 
     def test_array_simulator_addition_one_right(self):
 
-        array_simulator = ArraySimulator()
+        array_simulator = self.simulator_class()
         amnt_qubits = 100
 
         array_simulator.init_state(100)
@@ -63,7 +70,7 @@ class ArraySimulatorTest(unittest.TestCase):
 
     def test_array_simulator_addition_one_both(self):
 
-        array_simulator = ArraySimulator()
+        array_simulator = self.simulator_class()
         amnt_qubits = 100
 
         array_simulator.init_state(100)
@@ -82,7 +89,7 @@ class ArraySimulatorTest(unittest.TestCase):
 
     def test_array_simulator_addition_two_both(self):
 
-        array_simulator = ArraySimulator()
+        array_simulator = self.simulator_class()
         amnt_qubits = 100
 
         array_simulator.init_state(100)
@@ -102,7 +109,7 @@ class ArraySimulatorTest(unittest.TestCase):
 
     def test_array_simulator_addition_three_both(self):
 
-        array_simulator = ArraySimulator()
+        array_simulator = self.simulator_class()
         amnt_qubits = 100
 
         array_simulator.init_state(100)
@@ -122,7 +129,7 @@ class ArraySimulatorTest(unittest.TestCase):
 
     def test_array_simulator_addition_five_both(self):
 
-        array_simulator = ArraySimulator()
+        array_simulator = self.simulator_class()
         amnt_qubits = 100
 
         array_simulator.init_state(100)
@@ -141,7 +148,7 @@ class ArraySimulatorTest(unittest.TestCase):
                     self.assertAlmostEqual(x, 0.0, delta=10e-7)
 
     def test_array_simulator_addition_seven_both(self):
-        array_simulator = ArraySimulator()
+        array_simulator = self.simulator_class()
         amnt_qubits = 100
 
         array_simulator.init_state(100)
@@ -161,7 +168,7 @@ class ArraySimulatorTest(unittest.TestCase):
 
     def test_array_simulator_addition_hadamard_first(self):
 
-        array_simulator = ArraySimulator()
+        array_simulator = self.simulator_class()
         amnt_qubits = 100
 
         array_simulator.init_state(100)
@@ -188,7 +195,7 @@ class ArraySimulatorTest(unittest.TestCase):
 
     def test_array_simulator_addition_hadamard_first_two(self):
 
-        array_simulator = ArraySimulator()
+        array_simulator = self.simulator_class()
         amnt_qubits = 100
 
         array_simulator.init_state(100)
@@ -232,7 +239,7 @@ class ArraySimulatorTest(unittest.TestCase):
 
     def test_array_simulator_addition_hadamard_first_left_and_right(self):
 
-        array_simulator = ArraySimulator()
+        array_simulator = self.simulator_class()
         amnt_qubits = 100
 
         array_simulator.init_state(100)
@@ -272,3 +279,34 @@ class ArraySimulatorTest(unittest.TestCase):
                         self.assertAlmostEqual(x, 0.0, delta=10e-7)
                 else:
                     self.assertEqual(0, 1)
+
+    def test_array_simulator_grover_same_as_db_simulator(self):
+        input_size = 3
+        circuit = Circuit()
+        circuit.set_addition_circuit(range(input_size), range(input_size, 2 * input_size),
+                                     range(2 * input_size, 3 * input_size + 1),
+                                     range(3 * input_size + 1, 3 * input_size + 5))
+        for h in range(2 * input_size):
+            circuit.prepend_gate(Gate(GatesIdentfications.hadamard, [h]))
+        for _i in range(int(np.sqrt(2 * input_size)) + 1):
+            circuit.append_gate(Gate(GatesIdentfications.invert_all_zero, range(2 * input_size)))
+            circuit.append_gate(Gate(GatesIdentfications.diffusion, range(2 * input_size)))
+        array_simulator = self.simulator_class()
+        db_simulator = DBSimulator()
+
+        array_simulator.run(circuit, 3 * input_size + 5)
+        db_simulator.run(circuit, 3 * input_size + 5)
+
+        db_state = {tuple(s[:-2]): complex(s[-2], s[-1]) for s in db_simulator.get_state()}
+        array_state = array_simulator.get_state()
+        self.assertEqual(len(array_state), len(db_state))
+        for s in array_state:
+            self.assertAlmostEqual(complex(s[-2], s[-1]), db_state[tuple(int(q) for q in s[:-2])], delta=10e-7)
+
+
+class ArraySimulatorTest(ArraySimulatorTestCases, unittest.TestCase):
+    simulator_class = ArraySimulator
+
+
+class ReversibleSimulatorTest(ArraySimulatorTestCases, unittest.TestCase):
+    simulator_class = ReversibleSimulator
@@ -3,14 +3,20 @@ import unittest
 import numpy as np
 
 from circuit import Circuit
+from gate import Gate, GatesIdentfications
 from simulators.db_simulator.db_simulator import DBSimulator
+from simulators.db_simulator_integer_key.db_simulator_integer_key import DBSimulatorIntegerKey
 
 
-class DBSimulatorTest(unittest.TestCase):
+class DBSimulatorTestCases:
+    """
+    Tests of every DB simulator, the test case classes set the simulator class.
+    """
+    simulator_class = None
 
     def test_db_simulator_addition_zero(self):
 
-        db_simulator = DBSimulator()
+        db_simulator = self.simulator_class()
 
         db_simulator.init_db(100)
         circuit = Circuit()
@@ -25,7 +31,7 @@ class DBSimulatorTest(unittest.TestCase):
                     self.assertAlmostEqual(x, 0.0, delta=10e-7)
 
     def test_db_simulator_addition_one_left(self):
-        db_simulator = DBSimulator()
+        db_simulator = self.simulator_class()
         amnt_qubits = 100
 
         db_simulator.init_db(100)
@@ -44,7 +50,7 @@ class DBSimulatorTest(unittest.TestCase):
 
     def test_db_simulator_addition_one_right(self):
 
-        db_simulator = DBSimulator()
+        db_simulator = self.simulator_class()
         amnt_qubits = 100
 
         db_simulator.init_db(100)
@@ -63,7 +69,7 @@ class DBSimulatorTest(unittest.TestCase):
 
     def test_db_simulator_addition_one_both(self):
 
-        db_simulator = DBSimulator()
+        db_simulator = self.simulator_class()
         amnt_qubits = 100
 
         db_simulator.init_db(100)
@@ -82,7 +88,7 @@ class DBSimulatorTest(unittest.TestCase):
 
     def test_db_simulator_addition_two_both(self):
 
-        db_simulator = DBSimulator()
+        db_simulator = self.simulator_class()
         amnt_qubits = 100
 
         db_simulator.init_db(100)
@@ -102,7 +108,7 @@ class DBSimulatorTest(unittest.TestCase):
 
     def test_db_simulator_addition_three_both(self):
 
-        db_simulator = DBSimulator()
+        db_simulator = self.simulator_class()
         amnt_qubits = 100
 
         db_simulator.init_db(100)
@@ -122,7 +128,7 @@ class DBSimulatorTest(unittest.TestCase):
 
     def test_db_simulator_addition_five_both(self):
 
-        db_simulator = DBSimulator()
+        db_simulator = self.simulator_class()
         amnt_qubits = 100
 
         db_simulator.init_db(100)
@@ -141,7 +147,7 @@ class DBSimulatorTest(unittest.TestCase):
                     self.assertAlmostEqual(x, 0.0, delta=10e-7)
 
     def test_db_simulator_addition_seven_both(self):
-        db_simulator = DBSimulator()
+        db_simulator = self.simulator_class()
         amnt_qubits = 100
 
         db_simulator.init_db(100)
@@ -161,7 +167,7 @@ class DBSimulatorTest(unittest.TestCase):
 
     def test_db_simulator_addition_hadamard_first(self):
 
-        db_simulator = DBSimulator()
+        db_simulator = self.simulator_class()
         amnt_qubits = 100
 
         db_simulator.init_db(100)
@@ -188,7 +194,7 @@ class DBSimulatorTest(unittest.TestCase):
 
     def test_db_simulator_addition_hadamard_first_two(self):
 
-        db_simulator = DBSimulator()
+        db_simulator = self.simulator_class()
         amnt_qubits = 100
 
         db_simulator.init_db(100)
@@ -232,7 +238,7 @@ class DBSimulatorTest(unittest.TestCase):
 
     def test_db_simulator_addition_hadamard_first_left_and_right(self):
 
-        db_simulator = DBSimulator()
+        db_simulator = self.simulator_class()
         amnt_qubits = 100
 
         db_simulator.init_db(100)
@@ -272,3 +278,30 @@ class DBSimulatorTest(unittest.TestCase):
                         self.assertAlmostEqual(x, 0.0, delta=10e-7)
                 else:
                     self.assertEqual(0, 1)
+
+
+class DBSimulatorTest(DBSimulatorTestCases, unittest.TestCase):
+    simulator_class = DBSimulator
+
+    def test_db_simulator_addition_gate_fusion(self):
+        circuit = Circuit()
+        circuit.set_addition_circuit([0, 1, 2], [3, 4, 5], [6, 7, 8, 9], [10, 11, 12, 13])
+        for h in range(6):
+            circuit.prepend_gate(Gate(GatesIdentfications.hadamard, [h]))
+
+        fused_simulator = DBSimulator()
+        fused_simulator.run(circuit, 14)
+        simulator = DBSimulator(gate_fusion=False)
+        simulator.run(circuit, 14)
+
+        self.assertEqual(len(fused_simulator.get_state()), 64)
+        self.assertEqual(sorted(fused_simulator.get_state()), sorted(simulator.get_state()))
+        for state in fused_simulator.get_state():
+            first = state[0] + 2 * state[1] + 4 * state[2]
+            second = state[3] + 2 * state[4] + 4 * state[5]
+            # The carry of the last position is not written into the output
+            self.assertEqual(state[6] + 2 * state[7] + 4 * state[8], (first + second) % 8)
+
+
+class DBSimulatorIntegerKeyTest(DBSimulatorTestCases, unittest.TestCase):
+    simulator_class = DBSimulatorIntegerKey
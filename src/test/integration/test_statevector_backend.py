@@ -0,0 +1,8 @@
+import unittest
+
+from simulators.statevector_simulator.statevector_simulator import StatevectorSimulator
+from test.integration.dense_simulator_test_cases import DenseSimulatorTestCases
+
+
+class StatevectorSimulatorTest(DenseSimulatorTestCases, unittest.TestCase):
+    simulator_class = StatevectorSimulator
@@ -0,0 +1,399 @@
+import numpy as np
+
+from simulators.db_simulator.db_simulator import choose_cache_size, choose_page_size
+
+
+class DBSimulatorTestCases:
+    """
+    Tests of every DB simulator, the test case classes set the simulator class.
+    """
+    simulator_class = None
+
+    def test_db_simulator_init(self):
+        """
+        Test that the DB simulator is initialized correctly
+        """
+
+        db_simulator = self.simulator_class()
+
+        db_simulator.init_db(100)
+
+        for state in db_simulator.get_state():
+            for i, x in enumerate(state):
+                if i == len(state) - 2:
+                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                else:
+                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+
+    def test_db_init_with_state(self):
+        db_simulator = self.simulator_class()
+
+        amnt_qubits = 100
+
+        db_simulator.init_db(amnt_qubits)
+        state = [([1 for _t in range(amnt_qubits)], 0.5, 0.0), ([0 for _t in range(amnt_qubits)], 0.0, 0.5),
+                 ([0] + [1 for _t in range(amnt_qubits - 1)], 0.5, 0.0),
+                 ([0, 0] + [1 for _t in range(amnt_qubits - 2)], 0.0, 0.5)]
+
+        db_simulator.init_with_state(state)
+
+        for s in db_simulator.get_state():
+            selected_state = -1
+            if s[0:3] == (0, 0, 0):
+                selected_state = 1
+            elif s[0:3] == (1, 1, 1):
+                selected_state = 0
+            elif s[0:3] == (0, 1, 1):
+                selected_state = 2
+            elif s[0:3] == (0, 0, 1):
+                selected_state = 3
+            for i, x in enumerate(s):
+                if i < amnt_qubits:
+                    self.assertAlmostEqual(x, state[selected_state][0][i], delta=10e-7)
+                elif i == amnt_qubits:
+                    self.assertAlmostEqual(x, state[selected_state][1], delta=10e-7)
+                elif i == amnt_qubits + 1:
+                    self.assertAlmostEqual(x, state[selected_state][2], delta=10e-7)
+
+    def test_db_simulator_init_and_destruction(self):
+        """
+        Test that the DB simulator is initialized and destroyed correctly
+        """
+        db_simulator = self.simulator_class()
+
+        for qubit_amnt in [1, 10, 100, 1000]:
+            db_simulator.init_db(qubit_amnt)
+
+            for state in db_simulator.get_state():
+                for i, x in enumerate(state):
+                    if i == len(state) - 2:
+                        self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                    else:
+                        self.assertAlmostEqual(x, 0.0, delta=10e-7)
+
+            db_simulator.destroy_db()
+
+    def test_db_simulator_cnot_zero(self):
+        db_simulator = self.simulator_class()
+
+        qubit_amnt = 100
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.execute_cnot((0, 1))
+        for state in db_simulator.get_state():
+            for i, x in enumerate(state):
+                if i == len(state) - 2:
+                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                else:
+                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_cnot_one(self):
+        db_simulator = self.simulator_class()
+
+        qubit_amnt = 100
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.execute_paulix([0])
+        db_simulator.execute_cnot((0, 1))
+        for state in db_simulator.get_state():
+            for i, x in enumerate(state):
+                if i in [len(state) - 2, 0, 1]:
+                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                else:
+                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_cnot_identity(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 100
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.execute_cnot((0, 1))
+        db_simulator.execute_cnot((0, 1))
+        for j, state in enumerate(db_simulator.get_state()):
+            for i, x in enumerate(state):
+                if i == len(state) - 2:
+                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                else:
+                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_paulix(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 100
+        db_simulator.init_db(qubit_amnt)
+        current_state = [0 for i in range(qubit_amnt + 2)]
+        current_state[-2] = 1.0
+        for q in [0, 1, 10, 20, 50, 99]:
+            db_simulator.execute_paulix([q])
+            current_state[q] = 1 - current_state[q]
+            for state in db_simulator.get_state():
+                for i, x in enumerate(state):
+                    self.assertAlmostEqual(x, current_state[i], delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_paulix_identity(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 100
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.execute_paulix([0])
+        db_simulator.execute_paulix([0])
+        for j, state in enumerate(db_simulator.get_state()):
+            for i, x in enumerate(state):
+                if i == len(state) - 2:
+                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                else:
+                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_pauliy(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 100
+        db_simulator.init_db(qubit_amnt)
+        current_state = [0 for i in range(qubit_amnt + 2)]
+        current_state[-2] = 1.0
+        for q in [0, 1, 10, 20, 50, 99]:
+            db_simulator.execute_pauliy([q])
+            temp = current_state[-2]
+            current_state[-2] = -current_state[-1]
+            current_state[-1] = temp
+            current_state[q] = 1 - current_state[q]
+            for state in db_simulator.get_state():
+                for i, x in enumerate(state):
+                    self.assertAlmostEqual(x, current_state[i], delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_pauliy_identity(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 100
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.execute_pauliy([0])
+        db_simulator.execute_pauliy([0])
+        for j, state in enumerate(db_simulator.get_state()):
+            for i, x in enumerate(state):
+                if i == len(state) - 2:
+                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                else:
+                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_pauliz(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 100
+        db_simulator.init_db(qubit_amnt)
+        current_state = [0 for i in range(qubit_amnt + 2)]
+        current_state[-2] = 1.0
+        for q in [0, 1, 10, 20, 50, 99]:
+            db_simulator.execute_pauliz([q])
+            for state in db_simulator.get_state():
+                for i, x in enumerate(state):
+                    self.assertAlmostEqual(x, current_state[i], delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_pauliz_identity(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 100
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.execute_pauliz([0])
+        db_simulator.execute_pauliz([0])
+        for j, state in enumerate(db_simulator.get_state()):
+            for i, x in enumerate(state):
+                if i == len(state) - 2:
+                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                else:
+                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_ccnot(self):
+        db_simulator = self.simulator_class()
+
+        qubit_amnt = 100
+        for t in [[], [0], [1], [0, 1]]:
+            db_simulator.init_db(qubit_amnt)
+            for q in t:
+                db_simulator.execute_paulix([q])
+            db_simulator.execute_ccnot((0, 1, 2))
+            for state in db_simulator.get_state():
+                for i, x in enumerate(state):
+                    if i in [len(state) - 2] + t or (t == [0, 1] and i == 2):
+                        self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                    else:
+                        self.assertAlmostEqual(x, 0.0, delta=10e-7)
+            db_simulator.destroy_db()
+
+    def test_db_simulator_ccnot_identity(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 100
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.execute_ccnot((0, 1, 2))
+        db_simulator.execute_ccnot((0, 1, 2))
+        for j, state in enumerate(db_simulator.get_state()):
+            for i, x in enumerate(state):
+                if i == len(state) - 2:
+                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                else:
+                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_hadamard(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 100
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.execute_hadamard([0])
+        first_qubits = []
+        for j, state in enumerate(db_simulator.get_state()):
+            first_qubits.append(state[0])
+            for i, x in enumerate(state):
+                if i == len(state) - 2:
+                    self.assertAlmostEqual(x, np.sqrt(0.5), delta=10e-7)
+                elif i != 0:
+                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        self.assertEqual(len(first_qubits), 2)
+        first_qubits.sort()
+        self.assertEqual(first_qubits[0], 0)
+        self.assertEqual(first_qubits[1], 1)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_hadamard_identity(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 3
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.execute_hadamard([0])
+        db_simulator.execute_hadamard([0])
+        for j, state in enumerate(db_simulator.get_state()):
+            if abs(state[-2] - 1.0) < 1e-8:
+                for i, x in enumerate(state):
+                    if i == len(state) - 2:
+                        self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                    else:
+                        self.assertAlmostEqual(x, 0.0, delta=10e-7)
+            else:
+                for i, x in enumerate(state):
+                    if i == 0:
+                        self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                    else:
+                        self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_reset(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 100
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.init_with_state([([1 for _t in range(qubit_amnt)], 1.0, 0.0)])
+        db_simulator.reset_qubits([0, 1, 2])
+        for j, state in enumerate(db_simulator.get_state()):
+            for i, x in enumerate(state):
+                if i not in [0, 1, 2, qubit_amnt + 1]:
+                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                else:
+                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_invert_zero(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 100
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.invert_all_zero(list(range(qubit_amnt)))
+        for j, state in enumerate(db_simulator.get_state()):
+            for i, x in enumerate(state):
+                if i in [qubit_amnt]:
+                    self.assertAlmostEqual(x, -1.0, delta=10e-7)
+                else:
+                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_without_rowid(self):
+        db_simulator = self.simulator_class(without_rowid=True)
+        reference_simulator = self.simulator_class()
+        for qubit_amnt in [3, 100]:
+            for simulator in [db_simulator, reference_simulator]:
+                simulator.init_db(qubit_amnt)
+                simulator.execute_hadamard([0])
+                simulator.execute_hadamard([1])
+                simulator.execute_cnot((0, 2))
+                simulator.execute_pauliz([1])
+            self.assertEqual(sorted(db_simulator.get_state()), sorted(reference_simulator.get_state()))
+            self.assertEqual(len(db_simulator.get_state()), 4)
+            db_simulator.destroy_db()
+            reference_simulator.destroy_db()
+        self.assertEqual(db_simulator.cur.execute("PRAGMA page_size").fetchone()[0], 4096)
+
+    def test_db_simulator_without_rowid_page_size(self):
+        db_simulator = self.simulator_class(without_rowid=True, expected_states=10 ** 6)
+        # Rows of 300 qubits do not fit 20 times into the default page size
+        db_simulator.init_db(300)
+        db_simulator.execute_hadamard([0])
+        db_simulator.execute_cnot((0, 299))
+
+        page_size = choose_page_size(db_simulator.estimated_row_size())
+        self.assertEqual(db_simulator.cur.execute("PRAGMA page_size").fetchone()[0], page_size)
+        self.assertEqual(db_simulator.cur.execute("PRAGMA cache_size").fetchone()[0],
+                         choose_cache_size(db_simulator.estimated_row_size(), page_size, 10 ** 6))
+        self.assertEqual(len(db_simulator.get_state()), 2)
+        for state in db_simulator.get_state():
+            self.assertEqual(state[0], state[299])
+
+    def test_db_simulator_iter_state(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 70
+        db_simulator.init_db(qubit_amnt)
+        for q in [0, 1, 65]:
+            db_simulator.execute_hadamard([q])
+        db_simulator.execute_pauliy([2])
+        rows = 0
+        for basis_states, amplitudes in db_simulator.iter_state(3):
+            self.assertLessEqual(len(amplitudes), 3)
+            self.assertEqual(basis_states.shape, (len(amplitudes), qubit_amnt))
+            for basis_state, amplitude in zip(basis_states, amplitudes):
+                self.assertEqual(basis_state[2], 1)
+                self.assertEqual(sum(basis_state) - basis_state[0] - basis_state[1] - basis_state[65], 1)
+                self.assertAlmostEqual(amplitude, 1j * np.sqrt(0.125), delta=10e-7)
+            rows += len(amplitudes)
+        self.assertEqual(rows, 8)
+
+        state = db_simulator.get_state()
+        other_simulator = self.simulator_class()
+        other_simulator.init_db(qubit_amnt)
+        other_simulator.init_with_chunks(db_simulator.iter_state(3))
+        self.assertEqual(sorted(other_simulator.get_state()), sorted(state))
+        db_simulator.destroy_db()
+        other_simulator.destroy_db()
+
+    def test_db_simulator_init_with_chunks_norm(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 3
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.execute_hadamard([0])
+        state = sorted(db_simulator.get_state())
+        basis_states = np.array([[0, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=np.uint8)
+        chunks = [(basis_states[:2], np.array([0.5, 0.5])), (basis_states[2:], np.array([0.5]))]
+
+        with self.assertRaises(AssertionError):
+            db_simulator.init_with_chunks(iter(chunks))
+
+        # The norm is checked before anything is written, so the old state is still complete
+        self.assertEqual(sorted(db_simulator.get_state()), state)
+        db_simulator.execute_hadamard([0])
+        self.assertAlmostEqual(sum(s[-2] for s in db_simulator.get_state() if s[0] == 0), 1.0, delta=10e-7)
+        db_simulator.destroy_db()
+
+    def test_db_simulator_diffusion(self):
+        db_simulator = self.simulator_class()
+        qubit_amnt = 70
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.execute_hadamard([0])
+        # The groups of qubit 0 only contain qubit 65 being zero, the diffusion over one qubit flips it
+        db_simulator.diffusion([65])
+        state = {(s[0], s[65]): s[-2] for s in db_simulator.get_state()}
+        self.assertAlmostEqual(state[(0, 1)], np.sqrt(0.5), delta=10e-7)
+        self.assertAlmostEqual(state[(1, 1)], np.sqrt(0.5), delta=10e-7)
+        self.assertAlmostEqual(state.get((0, 0), 0.0), 0.0, delta=10e-7)
+        self.assertAlmostEqual(state.get((1, 0), 0.0), 0.0, delta=10e-7)
+        db_simulator.destroy_db()
+
+        db_simulator = self.simulator_class()
+        db_simulator.init_db(qubit_amnt)
+        db_simulator.diffusion([0, 65])
+        state = db_simulator.get_state()
+        self.assertEqual(len(state), 4)
+        for s in state:
+            self.assertAlmostEqual(s[-2], -0.5 if s[0] == s[65] == 0 else 0.5, delta=10e-7)
+        db_simulator.destroy_db()
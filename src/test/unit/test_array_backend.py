@@ -1,7 +1,9 @@
+import tracemalloc
 import unittest
 
 import numpy as np
 
+from gate import Gate, GatesIdentfications
 from simulators.array_simulator.array_simulator import ArraySimulator
 
 
@@ -247,3 +249,102 @@ class ArraySimulatorTest(unittest.TestCase):
                     self.assertAlmostEqual(x, 1.0, delta=10e-7)
                 else:
                     self.assertAlmostEqual(x, 0.0, delta=10e-7)
+
+    def test_array_simulator_inversions(self):
+        qubit_amnt = 100
+        state = [[0, 0] + [0] * (qubit_amnt - 2) + [0.5, 0.0], [1, 0] + [0] * (qubit_amnt - 2) + [0.5, 0.0],
+                 [0, 0] + [0] * (qubit_amnt - 3) + [1] + [0.5, 0.0], [1, 0] + [0] * (qubit_amnt - 3) + [1] + [0.5, 0.0]]
+        expected_signs = {"invert_all_zero": [-1, 1, 1, 1], "invert_some_one": [1, -1, -1, -1],
+                          "invert_all_one": [1, 1, 1, -1]}
+        for inversion, signs in expected_signs.items():
+            array_simulator = ArraySimulator()
+            array_simulator.init_with_state(state)
+            getattr(array_simulator, inversion)([0, qubit_amnt - 1])
+            for s in array_simulator.get_state():
+                sign = signs[int(s[0]) + 2 * int(s[qubit_amnt - 1])]
+                self.assertAlmostEqual(s[-2], 0.5 * sign, delta=10e-7)
+                self.assertAlmostEqual(s[-1], 0.0, delta=10e-7)
+
+    def test_array_simulator_diffusion(self):
+        array_simulator = ArraySimulator()
+        qubit_amnt = 2
+        array_simulator.init_state(qubit_amnt)
+        array_simulator.execute_hadamard([0])
+        array_simulator.execute_hadamard([1])
+        array_simulator.invert_all_one([0, 1])
+        array_simulator.diffusion([0, 1])
+        for state in array_simulator.get_state():
+            if list(state[:2]) == [1, 1]:
+                self.assertAlmostEqual(state[-2], 1.0, delta=10e-7)
+            else:
+                self.assertAlmostEqual(state[-2], 0.0, delta=10e-7)
+
+    def test_array_simulator_maximum_states(self):
+        array_simulator = ArraySimulator(maximum_states=10)
+        self.assertEqual(array_simulator.name, "ArraySimulatorStateDrop")
+        qubit_amnt = 100
+        array_simulator.init_state(qubit_amnt)
+        for q in range(6):
+            array_simulator.execute_hadamard([q])
+        state = array_simulator.get_state()
+        self.assertEqual(len(state), 10)
+        for s in state:
+            self.assertAlmostEqual(s[-2], 0.125, delta=10e-7)
+        self.assertAlmostEqual(array_simulator.discarded_probability, 1 - 10 * 0.125 ** 2, delta=10e-7)
+
+    def test_array_simulator_maximum_states_diffusion(self):
+        simulator = ArraySimulator()
+        simulator.run([Gate(GatesIdentfications.hadamard, [q]) for q in range(4)] + [
+            Gate(GatesIdentfications.invert_all_one, [0, 1, 4]), Gate(GatesIdentfications.hadamard, [5]),
+            Gate(GatesIdentfications.pauliy, [2])], 9)
+        initial_state = simulator.get_state().tolist()
+        simulator.diffusion([1, 4, 5, 6, 7])
+        exact_state = {tuple(s[:-2]): complex(s[-2], s[-1]) for s in simulator.get_state()}
+        largest = sorted([abs(a) for a in exact_state.values()], reverse=True)
+
+        for maximum_states in [1, 20, 100]:
+            array_simulator = ArraySimulator(maximum_states=maximum_states)
+            array_simulator.init_with_state(initial_state)
+            array_simulator.diffusion([1, 4, 5, 6, 7])
+            state = array_simulator.get_state()
+            self.assertEqual(len(state), maximum_states)
+            np.testing.assert_allclose(sorted([abs(complex(s[-2], s[-1])) for s in state], reverse=True),
+                                       largest[:maximum_states], atol=10e-7)
+            for s in state:
+                self.assertAlmostEqual(complex(s[-2], s[-1]), exact_state[tuple(s[:-2])], delta=10e-7)
+
+    def test_array_simulator_maximum_states_diffusion_memory(self):
+        array_simulator = ArraySimulator(maximum_states=1000)
+        circuit = [Gate(GatesIdentfications.hadamard, [q]) for q in range(3)] + [
+            Gate(GatesIdentfications.diffusion, list(range(3, 20)))]
+        tracemalloc.start()
+        array_simulator.run(circuit, 20)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        # Without the limit the 8 groups get 2^17 basis states each
+        self.assertLess(peak, 10 ** 7)
+        self.assertEqual(len(array_simulator.get_state()), 1000)
+
+    def test_array_simulator_amplitude_cutoff(self):
+        array_simulator = ArraySimulator(amplitude_cutoff=0.25)
+        qubit_amnt = 3
+        probabilities = [0.5, 0.3, 0.1, 0.05, 0.05]
+        array_simulator.init_with_state(
+            [[(k >> t) & 1 for t in range(qubit_amnt)] + [np.sqrt(p), 0.0] for k, p in enumerate(probabilities)])
+        array_simulator.execute_pauliy([2])
+        state = array_simulator.get_state()
+        self.assertEqual(len(state), 3)
+        for s in state:
+            self.assertEqual(s[2], 1)
+        self.assertAlmostEqual(array_simulator.discarded_probability, 0.1, delta=10e-7)
+
+    def test_array_simulator_gate_callback(self):
+        array_simulator = ArraySimulator()
+        reported = []
+        array_simulator.gate_callback = lambda gate, states: reported.append(states)
+
+        array_simulator.run([Gate(GatesIdentfications.hadamard, [0]), Gate(GatesIdentfications.hadamard, [1]),
+                             Gate(GatesIdentfications.cnot, [0, 2]), Gate(GatesIdentfications.diffusion, [4, 5])], 6)
+
+        self.assertEqual(reported, [2, 4, 4, 16])
+        self.assertEqual(array_simulator.amnt_states(), len(array_simulator.get_state()))
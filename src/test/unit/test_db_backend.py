@@ -2,298 +2,93 @@ import unittest
 
 import numpy as np
 
+from gate import Gate, GatesIdentfications
+from simulators.array_simulator.array_simulator import ArraySimulator
 from simulators.db_simulator.db_simulator import DBSimulator
-
-
-class DBSimulatorTest(unittest.TestCase):
-
-    def test_db_simulator_init(self):
-        """
-        Test that the DB simulator is initialized correctly
-        """
-
-        db_simulator = DBSimulator()
-
-        db_simulator.init_db(100)
-
-        for state in db_simulator.get_state():
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-
-    def test_db_init_with_state(self):
-        db_simulator = DBSimulator()
-
-        amnt_qubits = 100
-
-        db_simulator.init_db(amnt_qubits)
-        state = [([1 for _t in range(amnt_qubits)], 0.5, 0.0), ([0 for _t in range(amnt_qubits)], 0.0, 0.5),
-                 ([0] + [1 for _t in range(amnt_qubits - 1)], 0.5, 0.0),
-                 ([0, 0] + [1 for _t in range(amnt_qubits - 2)], 0.0, 0.5)]
-
-        db_simulator.init_with_state(state)
-
-        for s in db_simulator.get_state():
-            selected_state = -1
-            if s[0:3] == (0, 0, 0):
-                selected_state = 1
-            elif s[0:3] == (1, 1, 1):
-                selected_state = 0
-            elif s[0:3] == (0, 1, 1):
-                selected_state = 2
-            elif s[0:3] == (0, 0, 1):
-                selected_state = 3
-            for i, x in enumerate(s):
-                if i < amnt_qubits:
-                    self.assertAlmostEqual(x, state[selected_state][0][i], delta=10e-7)
-                elif i == amnt_qubits:
-                    self.assertAlmostEqual(x, state[selected_state][1], delta=10e-7)
-                elif i == amnt_qubits + 1:
-                    self.assertAlmostEqual(x, state[selected_state][2], delta=10e-7)
-
-    def test_db_simulator_init_and_destruction(self):
-        """
-        Test that the DB simulator is initialized and destroyed correctly
-        """
-        db_simulator = DBSimulator()
-
-        for qubit_amnt in [1, 10, 100, 1000]:
-            db_simulator.init_db(qubit_amnt)
-
-            for state in db_simulator.get_state():
-                for i, x in enumerate(state):
-                    if i == len(state) - 2:
-                        self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                    else:
-                        self.assertAlmostEqual(x, 0.0, delta=10e-7)
-
-            db_simulator.destroy_db()
-
-    def test_db_simulator_cnot_zero(self):
-        db_simulator = DBSimulator()
-
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_cnot((0, 1))
-        for state in db_simulator.get_state():
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+from simulators.db_simulator_integer_key.db_simulator_integer_key import DBSimulatorIntegerKey
+from test.unit.db_simulator_test_cases import DBSimulatorTestCases
+
+
+class DBSimulatorTest(DBSimulatorTestCases, unittest.TestCase):
+    simulator_class = DBSimulator
+
+    def test_db_simulator_query_cache(self):
+        db_simulator = DBSimulator(query_cache_size=2)
+        db_simulator.init_db(10)
+        for _i in range(3):
+            db_simulator.invert_all_zero([0, 1, 2])
+            db_simulator.diffusion([0, 1, 2])
+        self.assertEqual(db_simulator.query_cache_misses, 2)
+        self.assertEqual(db_simulator.query_cache_hits, 4)
+        self.assertAlmostEqual(db_simulator.query_cache_hit_rate(), 4 / 6, delta=10e-7)
+        db_simulator.invert_all_one([0, 1])
+        self.assertEqual(len(db_simulator.query_cache), 2)
+        db_simulator.invert_all_zero([0, 1, 2])
+        self.assertEqual(db_simulator.query_cache_misses, 4)
         db_simulator.destroy_db()
 
-    def test_db_simulator_cnot_one(self):
+    def test_db_init_with_arrays(self):
         db_simulator = DBSimulator()
-
-        qubit_amnt = 100
+        qubit_amnt = 20
         db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_paulix([0])
-        db_simulator.execute_cnot((0, 1))
-        for state in db_simulator.get_state():
-            for i, x in enumerate(state):
-                if i in [len(state) - 2, 0, 1]:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        keys = np.arange(0, 2 ** qubit_amnt, 2 ** 10)
+        amplitudes = np.full(len(keys), 1j / np.sqrt(len(keys)))
+        db_simulator.init_with_arrays(keys, amplitudes)
+        state = db_simulator.get_state()
+        self.assertEqual(len(state), 2 ** 10)
+        for s in state:
+            self.assertEqual(sum(s[0:10]), 0)
+            self.assertAlmostEqual(s[-2], 0.0, delta=10e-7)
+            self.assertAlmostEqual(s[-1], 1 / np.sqrt(len(keys)), delta=10e-7)
+
+        other_simulator = DBSimulator()
+        other_simulator.init_db(qubit_amnt)
+        other_simulator.init_with_chunks(db_simulator.iter_state(100))
+        self.assertEqual(sorted(other_simulator.get_state()), sorted(state))
         db_simulator.destroy_db()
+        other_simulator.destroy_db()
 
-    def test_db_simulator_cnot_identity(self):
+    def test_db_simulator_gate_callback(self):
         db_simulator = DBSimulator()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_cnot((0, 1))
-        db_simulator.execute_cnot((0, 1))
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
+        reported = []
+        db_simulator.gate_callback = lambda gate, states: reported.append((gate.gatter, states))
+        gates = [Gate(GatesIdentfications.hadamard, [0]), Gate(GatesIdentfications.hadamard, [1]),
+                 Gate(GatesIdentfications.cnot, [0, 2]), Gate(GatesIdentfications.ccnot, [0, 1, 3]),
+                 Gate(GatesIdentfications.diffusion, [4, 5])]
 
-    def test_db_simulator_paulix(self):
-        db_simulator = DBSimulator()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        current_state = [0 for i in range(qubit_amnt + 2)]
-        current_state[-2] = 1.0
-        for q in [0, 1, 10, 20, 50, 99]:
-            db_simulator.execute_paulix([q])
-            current_state[q] = 1 - current_state[q]
-            for state in db_simulator.get_state():
-                for i, x in enumerate(state):
-                    self.assertAlmostEqual(x, current_state[i], delta=10e-7)
-        db_simulator.destroy_db()
+        db_simulator.run(gates, 6)
 
-    def test_db_simulator_paulix_identity(self):
-        db_simulator = DBSimulator()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_paulix([0])
-        db_simulator.execute_paulix([0])
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
+        self.assertEqual([s for _g, s in reported], [2, 4, 4, 4, 16])
+        self.assertEqual([g for g, _s in reported], [g.gatter for g in gates])
+        self.assertEqual(db_simulator.amnt_states(), len(db_simulator.get_state()))
+        db_simulator.init_with_arrays(np.array([0, 3]), np.array([np.sqrt(0.5), np.sqrt(0.5)]))
+        self.assertEqual(db_simulator.amnt_states(), 2)
 
-    def test_db_simulator_pauliy(self):
-        db_simulator = DBSimulator()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        current_state = [0 for i in range(qubit_amnt + 2)]
-        current_state[-2] = 1.0
-        for q in [0, 1, 10, 20, 50, 99]:
-            db_simulator.execute_pauliy([q])
-            temp = current_state[-2]
-            current_state[-2] = -current_state[-1]
-            current_state[-1] = temp
-            current_state[q] = 1 - current_state[q]
-            for state in db_simulator.get_state():
-                for i, x in enumerate(state):
-                    self.assertAlmostEqual(x, current_state[i], delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_pauliy_identity(self):
-        db_simulator = DBSimulator()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_pauliy([0])
-        db_simulator.execute_pauliy([0])
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_pauliz(self):
-        db_simulator = DBSimulator()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        current_state = [0 for i in range(qubit_amnt + 2)]
-        current_state[-2] = 1.0
-        for q in [0, 1, 10, 20, 50, 99]:
-            db_simulator.execute_pauliz([q])
-            for state in db_simulator.get_state():
-                for i, x in enumerate(state):
-                    self.assertAlmostEqual(x, current_state[i], delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_pauliz_identity(self):
-        db_simulator = DBSimulator()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_pauliz([0])
-        db_simulator.execute_pauliz([0])
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_ccnot(self):
-        db_simulator = DBSimulator()
-
-        qubit_amnt = 100
-        for t in [[], [0], [1], [0, 1]]:
-            db_simulator.init_db(qubit_amnt)
-            for q in t:
-                db_simulator.execute_paulix([q])
-            db_simulator.execute_ccnot((0, 1, 2))
-            for state in db_simulator.get_state():
-                for i, x in enumerate(state):
-                    if i in [len(state) - 2] + t or (t == [0, 1] and i == 2):
-                        self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                    else:
-                        self.assertAlmostEqual(x, 0.0, delta=10e-7)
-            db_simulator.destroy_db()
-
-    def test_db_simulator_ccnot_identity(self):
-        db_simulator = DBSimulator()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_ccnot((0, 1, 2))
-        db_simulator.execute_ccnot((0, 1, 2))
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_hadamard(self):
-        db_simulator = DBSimulator()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_hadamard([0])
-        first_qubits = []
-        for j, state in enumerate(db_simulator.get_state()):
-            first_qubits.append(state[0])
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, np.sqrt(0.5), delta=10e-7)
-                elif i != 0:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        self.assertEqual(len(first_qubits), 2)
-        first_qubits.sort()
-        self.assertEqual(first_qubits[0], 0)
-        self.assertEqual(first_qubits[1], 1)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_hadamard_identity(self):
-        db_simulator = DBSimulator()
-        qubit_amnt = 3
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_hadamard([0])
-        db_simulator.execute_hadamard([0])
-        for j, state in enumerate(db_simulator.get_state()):
-            if abs(state[-2] - 1.0) < 1e-8:
-                for i, x in enumerate(state):
-                    if i == len(state) - 2:
-                        self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                    else:
-                        self.assertAlmostEqual(x, 0.0, delta=10e-7)
-            else:
-                for i, x in enumerate(state):
-                    if i == 0:
-                        self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                    else:
-                        self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_reset(self):
-        db_simulator = DBSimulator()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.init_with_state([([1 for _t in range(qubit_amnt)], 1.0, 0.0)])
-        db_simulator.reset_qubits([0, 1, 2])
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i not in [0, 1, 2, qubit_amnt + 1]:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_invert_zero(self):
-        db_simulator = DBSimulator()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.invert_all_zero(list(range(qubit_amnt)))
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i in [qubit_amnt]:
-                    self.assertAlmostEqual(x, -1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
+    def test_db_simulator_key_update_collisions(self):
+        """
+        The permutation gates move rows onto the keys of rows which are only moved later in the same update and the
+        reset merges basis states, none of this may violate the primary key.
+        """
+        gates = [Gate(GatesIdentfications.hadamard, [0]), Gate(GatesIdentfications.hadamard, [1]),
+                 Gate(GatesIdentfications.hadamard, [2]), Gate(GatesIdentfications.pauliz, [1]),
+                 Gate(GatesIdentfications.paulix, [0]), Gate(GatesIdentfications.pauliy, [1]),
+                 Gate(GatesIdentfications.cnot, [0, 1]), Gate(GatesIdentfications.ccnot, [0, 1, 2]),
+                 Gate(GatesIdentfications.diffusion, [2, 3]), Gate(GatesIdentfications.cnot, [3, 0]),
+                 Gate(GatesIdentfications.reset, [0]), Gate(GatesIdentfications.paulix, [2]),
+                 Gate(GatesIdentfications.reset, [1, 3])]
+        array_simulator = ArraySimulator()
+        array_simulator.run(gates, 4)
+        expected = sorted(tuple(s) for s in array_simulator.get_state())
+        for simulator_class in [DBSimulator, DBSimulatorIntegerKey]:
+            for without_rowid in [False, True]:
+                for gate_fusion in [False, True]:
+                    db_simulator = simulator_class(without_rowid=without_rowid, gate_fusion=gate_fusion)
+                    db_simulator.run(gates, 4)
+                    state = sorted(db_simulator.get_state())
+                    self.assertEqual(db_simulator.amnt_states(), len(state))
+                    self.assertEqual(len(state), len(expected))
+                    for s, e in zip(state, expected):
+                        self.assertEqual(list(s[:-2]), list(e[:-2]))
+                        self.assertAlmostEqual(s[-2], e[-2], delta=10e-7)
+                        self.assertAlmostEqual(s[-1], e[-1], delta=10e-7)
+                    db_simulator.destroy_db()
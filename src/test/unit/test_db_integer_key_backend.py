@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from simulators.db_simulator_integer_key.db_simulator_integer_key import DBSimulatorIntegerKey, WORD_SIZE
+from test.unit.db_simulator_test_cases import DBSimulatorTestCases
+
+
+class DBSimulatorIntegerKeyTest(DBSimulatorTestCases, unittest.TestCase):
+    simulator_class = DBSimulatorIntegerKey
+
+    def test_db_init_with_arrays(self):
+        db_simulator = DBSimulatorIntegerKey()
+        qubit_amnt = 20
+        db_simulator.init_db(qubit_amnt)
+        keys = np.arange(0, 2 ** qubit_amnt, 2 ** 10)
+        amplitudes = np.full(len(keys), 1j / np.sqrt(len(keys)))
+        db_simulator.init_with_arrays(keys, amplitudes)
+        state = db_simulator.get_state()
+        self.assertEqual(len(state), 2 ** 10)
+        for s in state:
+            self.assertEqual(sum(s[0:10]), 0)
+            self.assertAlmostEqual(s[-2], 0.0, delta=10e-7)
+            self.assertAlmostEqual(s[-1], 1 / np.sqrt(len(keys)), delta=10e-7)
+
+        other_simulator = DBSimulatorIntegerKey()
+        other_simulator.init_db(qubit_amnt)
+        other_simulator.init_with_chunks(db_simulator.iter_state(100))
+        self.assertEqual(sorted(other_simulator.get_state()), sorted(state))
+        db_simulator.destroy_db()
+        other_simulator.destroy_db()
+
+    def test_db_simulator_key_words(self):
+        db_simulator = DBSimulatorIntegerKey()
+        qubit_amnt = 130
+        db_simulator.init_db(qubit_amnt)
+        self.assertEqual(db_simulator.amnt_words(), 3)
+        basis_state = np.zeros((1, qubit_amnt), dtype=np.uint8)
+        basis_state[0, [0, WORD_SIZE - 1, WORD_SIZE, 2 * WORD_SIZE, qubit_amnt - 1]] = 1
+        db_simulator.init_with_arrays(basis_state, np.array([1.0]))
+
+        # Qubit q is bit q % 63 of the key word q // 63
+        self.assertEqual(db_simulator.cur.execute("SELECT s0, s1, s2 FROM quantumstate").fetchall(),
+                         [(1 + 2 ** (WORD_SIZE - 1), 1, 1 + 2 ** 3)])
+        db_simulator.execute_cnot((qubit_amnt - 1, WORD_SIZE + 1))
+        db_simulator.execute_ccnot((0, WORD_SIZE - 1, 2 * WORD_SIZE + 1))
+        state = db_simulator.get_state()
+        self.assertEqual(len(state), 1)
+        self.assertEqual([q for q in range(qubit_amnt) if state[0][q] == 1],
+                         [0, WORD_SIZE - 1, WORD_SIZE, WORD_SIZE + 1, 2 * WORD_SIZE, 2 * WORD_SIZE + 1,
+                          qubit_amnt - 1])
+        self.assertAlmostEqual(state[0][-2], 1.0, delta=10e-7)
+        db_simulator.destroy_db()
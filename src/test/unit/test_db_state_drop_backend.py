@@ -2,298 +2,93 @@ import unittest
 
 import numpy as np
 
+from simulators.db_simulator.db_simulator import choose_cache_size, choose_page_size, DEFAULT_EXPECTED_STATES
 from simulators.db_simulator_state_drop.db_simulator_state_drop import DBSimulatorStateDrop
+from test.unit.db_simulator_test_cases import DBSimulatorTestCases
 
 
-class DBSimulatorStateDropTest(unittest.TestCase):
+class DBSimulatorStateDropTest(DBSimulatorTestCases, unittest.TestCase):
+    simulator_class = DBSimulatorStateDrop
 
-    def test_db_simulator_init(self):
-        """
-        Test that the DB simulator is initialized correctly
-        """
-
-        db_simulator = DBSimulatorStateDrop()
-
-        db_simulator.init_db(100)
-
-        for state in db_simulator.get_state():
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-
-    def test_db_init_with_state(self):
-        db_simulator = DBSimulatorStateDrop()
-
-        amnt_qubits = 100
-
-        db_simulator.init_db(amnt_qubits)
-        state = [([1 for _t in range(amnt_qubits)], 0.5, 0.0), ([0 for _t in range(amnt_qubits)], 0.0, 0.5),
-                 ([0] + [1 for _t in range(amnt_qubits - 1)], 0.5, 0.0),
-                 ([0, 0] + [1 for _t in range(amnt_qubits - 2)], 0.0, 0.5)]
-
-        db_simulator.init_with_state(state)
-
-        for s in db_simulator.get_state():
-            selected_state = -1
-            if s[0:3] == (0, 0, 0):
-                selected_state = 1
-            elif s[0:3] == (1, 1, 1):
-                selected_state = 0
-            elif s[0:3] == (0, 1, 1):
-                selected_state = 2
-            elif s[0:3] == (0, 0, 1):
-                selected_state = 3
-            for i, x in enumerate(s):
-                if i < amnt_qubits:
-                    self.assertAlmostEqual(x, state[selected_state][0][i], delta=10e-7)
-                elif i == amnt_qubits:
-                    self.assertAlmostEqual(x, state[selected_state][1], delta=10e-7)
-                elif i == amnt_qubits + 1:
-                    self.assertAlmostEqual(x, state[selected_state][2], delta=10e-7)
-
-    def test_db_simulator_init_and_destruction(self):
-        """
-        Test that the DB simulator is initialized and destroyed correctly
-        """
-        db_simulator = DBSimulatorStateDrop()
-
-        for qubit_amnt in [1, 10, 100, 1000]:
+    def test_db_simulator_maximum_rows(self):
+        for without_rowid in [False, True]:
+            db_simulator = DBSimulatorStateDrop(without_rowid=without_rowid, maximum_rows=10)
+            qubit_amnt = 8
             db_simulator.init_db(qubit_amnt)
-
-            for state in db_simulator.get_state():
-                for i, x in enumerate(state):
-                    if i == len(state) - 2:
-                        self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                    else:
-                        self.assertAlmostEqual(x, 0.0, delta=10e-7)
-
+            # All basis states have the same amplitude, a random subset of them is kept
+            for q in range(6):
+                db_simulator.execute_hadamard([q])
+            state = db_simulator.get_state()
+            self.assertEqual(len(state), 10)
+            for s in state:
+                self.assertAlmostEqual(s[-2], 0.125, delta=10e-7)
             db_simulator.destroy_db()
 
-    def test_db_simulator_cnot_zero(self):
-        db_simulator = DBSimulatorStateDrop()
-
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_cnot((0, 1))
-        for state in db_simulator.get_state():
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_cnot_one(self):
-        db_simulator = DBSimulatorStateDrop()
-
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_paulix([0])
-        db_simulator.execute_cnot((0, 1))
-        for state in db_simulator.get_state():
-            for i, x in enumerate(state):
-                if i in [len(state) - 2, 0, 1]:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_cnot_identity(self):
-        db_simulator = DBSimulatorStateDrop()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_cnot((0, 1))
-        db_simulator.execute_cnot((0, 1))
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_paulix(self):
-        db_simulator = DBSimulatorStateDrop()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        current_state = [0 for i in range(qubit_amnt + 2)]
-        current_state[-2] = 1.0
-        for q in [0, 1, 10, 20, 50, 99]:
-            db_simulator.execute_paulix([q])
-            current_state[q] = 1 - current_state[q]
-            for state in db_simulator.get_state():
-                for i, x in enumerate(state):
-                    self.assertAlmostEqual(x, current_state[i], delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_paulix_identity(self):
-        db_simulator = DBSimulatorStateDrop()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_paulix([0])
-        db_simulator.execute_paulix([0])
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_pauliy(self):
-        db_simulator = DBSimulatorStateDrop()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        current_state = [0 for i in range(qubit_amnt + 2)]
-        current_state[-2] = 1.0
-        for q in [0, 1, 10, 20, 50, 99]:
-            db_simulator.execute_pauliy([q])
-            temp = current_state[-2]
-            current_state[-2] = -current_state[-1]
-            current_state[-1] = temp
-            current_state[q] = 1 - current_state[q]
-            for state in db_simulator.get_state():
-                for i, x in enumerate(state):
-                    self.assertAlmostEqual(x, current_state[i], delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_pauliy_identity(self):
-        db_simulator = DBSimulatorStateDrop()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_pauliy([0])
-        db_simulator.execute_pauliy([0])
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_pauliz(self):
-        db_simulator = DBSimulatorStateDrop()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        current_state = [0 for i in range(qubit_amnt + 2)]
-        current_state[-2] = 1.0
-        for q in [0, 1, 10, 20, 50, 99]:
-            db_simulator.execute_pauliz([q])
-            for state in db_simulator.get_state():
-                for i, x in enumerate(state):
-                    self.assertAlmostEqual(x, current_state[i], delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_pauliz_identity(self):
-        db_simulator = DBSimulatorStateDrop()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_pauliz([0])
-        db_simulator.execute_pauliz([0])
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_ccnot(self):
-        db_simulator = DBSimulatorStateDrop()
-
-        qubit_amnt = 100
-        for t in [[], [0], [1], [0, 1]]:
             db_simulator.init_db(qubit_amnt)
-            for q in t:
-                db_simulator.execute_paulix([q])
-            db_simulator.execute_ccnot((0, 1, 2))
-            for state in db_simulator.get_state():
-                for i, x in enumerate(state):
-                    if i in [len(state) - 2] + t or (t == [0, 1] and i == 2):
-                        self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                    else:
-                        self.assertAlmostEqual(x, 0.0, delta=10e-7)
+            probabilities = [0.3, 0.2, 0.1] + [0.4 / 20] * 20
+            db_simulator.init_with_state(
+                [([(k >> t) & 1 for t in range(qubit_amnt)], np.sqrt(p), 0.0) for k, p in enumerate(probabilities)])
+            db_simulator.drop_states()
+            state = db_simulator.get_state()
+            self.assertEqual(len(state), 10)
+            keys = [sum(int(b) << t for t, b in enumerate(s[:qubit_amnt])) for s in state]
+            self.assertTrue(all(k in keys for k in [0, 1, 2]))
             db_simulator.destroy_db()
 
-    def test_db_simulator_ccnot_identity(self):
-        db_simulator = DBSimulatorStateDrop()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_ccnot((0, 1, 2))
-        db_simulator.execute_ccnot((0, 1, 2))
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_hadamard(self):
-        db_simulator = DBSimulatorStateDrop()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_hadamard([0])
-        first_qubits = []
-        for j, state in enumerate(db_simulator.get_state()):
-            first_qubits.append(state[0])
-            for i, x in enumerate(state):
-                if i == len(state) - 2:
-                    self.assertAlmostEqual(x, np.sqrt(0.5), delta=10e-7)
-                elif i != 0:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        self.assertEqual(len(first_qubits), 2)
-        first_qubits.sort()
-        self.assertEqual(first_qubits[0], 0)
-        self.assertEqual(first_qubits[1], 1)
-        db_simulator.destroy_db()
-
-    def test_db_simulator_hadamard_identity(self):
-        db_simulator = DBSimulatorStateDrop()
+    def test_db_simulator_probability_budget(self):
+        db_simulator = DBSimulatorStateDrop(epsilon=0.12, renormalize=True)
         qubit_amnt = 3
         db_simulator.init_db(qubit_amnt)
-        db_simulator.execute_hadamard([0])
-        db_simulator.execute_hadamard([0])
-        for j, state in enumerate(db_simulator.get_state()):
-            if abs(state[-2] - 1.0) < 1e-8:
-                for i, x in enumerate(state):
-                    if i == len(state) - 2:
-                        self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                    else:
-                        self.assertAlmostEqual(x, 0.0, delta=10e-7)
-            else:
-                for i, x in enumerate(state):
-                    if i == 0:
-                        self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                    else:
-                        self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        probabilities = [0.5, 0.3, 0.1, 0.05, 0.05]
+        db_simulator.init_with_state(
+            [([(k >> t) & 1 for t in range(qubit_amnt)], np.sqrt(p), 0.0) for k, p in enumerate(probabilities)])
+        db_simulator.drop_states()
+        state = db_simulator.get_state()
+        self.assertEqual(len(state), 3)
+        self.assertAlmostEqual(sum([s[-2] ** 2 + s[-1] ** 2 for s in state]), 1.0, delta=10e-7)
+        self.assertAlmostEqual(db_simulator.discarded_probability, 0.1, delta=10e-7)
+        self.assertAlmostEqual(db_simulator.fidelity_loss(), 0.1, delta=10e-7)
+
+        # The remaining budget is smaller than the smallest probability
+        db_simulator.drop_states()
+        self.assertEqual(len(db_simulator.get_state()), 3)
+        self.assertAlmostEqual(db_simulator.discarded_probability, 0.1, delta=10e-7)
         db_simulator.destroy_db()
 
-    def test_db_simulator_reset(self):
-        db_simulator = DBSimulatorStateDrop()
-        qubit_amnt = 100
+    def test_db_simulator_probability_budget_circuit(self):
+        epsilon = 0.05
+        db_simulator = DBSimulatorStateDrop(epsilon=epsilon, renormalize=True)
+        qubit_amnt = 8
         db_simulator.init_db(qubit_amnt)
-        db_simulator.init_with_state([([1 for _t in range(qubit_amnt)], 1.0, 0.0)])
-        db_simulator.reset_qubits([0, 1, 2])
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i not in [0, 1, 2, qubit_amnt + 1]:
-                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+        for q in range(4):
+            db_simulator.execute_hadamard([q])
+        db_simulator.invert_all_zero([0, 1, 2, 3])
+        db_simulator.diffusion([0, 1, 2, 3])
+        db_simulator.execute_hadamard([4])
+        state = db_simulator.get_state()
+        self.assertLessEqual(db_simulator.discarded_probability, epsilon)
+        self.assertAlmostEqual(sum([s[-2] ** 2 + s[-1] ** 2 for s in state]), 1.0, delta=10e-7)
         db_simulator.destroy_db()
 
-    def test_db_simulator_invert_zero(self):
-        db_simulator = DBSimulatorStateDrop()
-        qubit_amnt = 100
-        db_simulator.init_db(qubit_amnt)
-        db_simulator.invert_all_zero(list(range(qubit_amnt)))
-        for j, state in enumerate(db_simulator.get_state()):
-            for i, x in enumerate(state):
-                if i in [qubit_amnt]:
-                    self.assertAlmostEqual(x, -1.0, delta=10e-7)
-                else:
-                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
-        db_simulator.destroy_db()
+    def test_db_simulator_state_drop_cache_size(self):
+        qubit_amnt = 30
+        for epsilon, expected_states in [(None, 2 * 100), (0.1, DEFAULT_EXPECTED_STATES)]:
+            db_simulator = DBSimulatorStateDrop(without_rowid=True, maximum_rows=100, epsilon=epsilon)
+            db_simulator.init_db(qubit_amnt)
+            page_size = choose_page_size(db_simulator.estimated_row_size())
+            self.assertEqual(db_simulator.cur.execute("PRAGMA cache_size").fetchone()[0],
+                             choose_cache_size(db_simulator.estimated_row_size(), page_size, expected_states))
+            db_simulator.destroy_db()
+
+    def test_db_simulator_drop_zero_probability(self):
+        for epsilon in [None, 0.1]:
+            db_simulator = DBSimulatorStateDrop(maximum_rows=2, epsilon=epsilon, renormalize=True)
+            db_simulator.init_db(3)
+            db_simulator.init_with_state([([k & 1, k >> 1, 0], 0.5, 0.0) for k in range(4)])
+            db_simulator.cur.execute("update quantumstate_drop set revalue = 0, imvalue = 0 where 1")
+            amnt_states = len(db_simulator.get_state())
+            db_simulator.drop_states()
+            self.assertEqual(len(db_simulator.get_state()), amnt_states)
+            self.assertEqual(db_simulator.discarded_probability, 0.0)
+            self.assertEqual(db_simulator.fidelity_loss(), 0.0)
+            db_simulator.destroy_db()
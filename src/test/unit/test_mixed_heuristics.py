@@ -0,0 +1,104 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from circuit import Circuit
+from gate import Gate, GatesIdentfications
+from simulators.mixed_simulator.calibration import calibrate, fit_backend_cost
+from simulators.mixed_simulator.cost_model import BackendCost, CostModel
+from simulators.mixed_simulator.heuristics import Heuristics, HeuristicsEnumeration
+from simulators.mixed_simulator.mixed_simulator import MixedSimulator
+from simulators.statevector_simulator.statevector_simulator import StatevectorSimulator
+
+
+class HeuristicsTest(unittest.TestCase):
+
+    def test_superposition_tracking_heuristic(self):
+        heuristics = Heuristics()
+        circuit = [Gate(GatesIdentfications.hadamard, [0]), Gate(GatesIdentfications.hadamard, [0]),
+                   Gate(GatesIdentfications.hadamard, [1]), Gate(GatesIdentfications.cnot, [1, 2]),
+                   Gate(GatesIdentfications.hadamard, [2]), Gate(GatesIdentfications.reset, [1, 2])]
+
+        profile = heuristics.calculate_state_profile(circuit, HeuristicsEnumeration.superposition_tracking_heuristic)
+
+        self.assertEqual(profile, [1, 0, 1, 1, 2, 0])
+        self.assertEqual(heuristics.calculate_states(circuit, HeuristicsEnumeration.basic_state_calculation_heuristic),
+                         4)
+
+    def test_superposition_tracking_heuristic_addition(self):
+        heuristics = Heuristics()
+        circuit = Circuit()
+        circuit.set_addition_circuit([0, 1, 2], [3, 4, 5], [6, 7, 8, 9], [10, 11, 12, 13])
+        for h in range(3):
+            circuit.prepend_gate(Gate(GatesIdentfications.hadamard, [h]))
+
+        states = heuristics.calculate_states(circuit, HeuristicsEnumeration.superposition_tracking_heuristic)
+
+        # The addition only permutes the basis states
+        self.assertEqual(states, 3)
+
+    def test_cost_model_choose_backend(self):
+        heuristics = Heuristics()
+        cost_model = CostModel()
+        amnt_qubits = 20
+        few_states = [Gate(GatesIdentfications.hadamard, [q]) for q in range(10)] + [
+            Gate(GatesIdentfications.cnot, [q - 10, q]) for q in range(10, amnt_qubits)]
+        all_states = [Gate(GatesIdentfications.hadamard, [q]) for q in range(amnt_qubits)]
+
+        for circuit, expected in [(few_states, "array"), (all_states, "dense")]:
+            profile = heuristics.calculate_state_profile(circuit,
+                                                         HeuristicsEnumeration.superposition_tracking_heuristic)
+            backend = cost_model.choose_backend(["db", "array", "dense"], circuit, profile, amnt_qubits)
+            self.assertEqual(backend, expected)
+
+        profile = heuristics.calculate_state_profile(all_states, HeuristicsEnumeration.superposition_tracking_heuristic)
+        self.assertEqual(cost_model.estimate_memory("dense", profile, amnt_qubits), 16 * 2 ** amnt_qubits)
+        cost_model.maximum_memory = 2 ** 20
+        self.assertEqual(cost_model.choose_backend(["db", "dense"], all_states, profile, 40), "db")
+
+    def test_fit_backend_cost(self):
+        heuristics = Heuristics(calibration_file=None)
+        expected = BackendCost(1e-5, 2e-7, 3e-6, 48, 1.5)
+        samples = []
+        for amnt_qubits in range(2, 8):
+            circuit = [Gate(GatesIdentfications.hadamard, [q]) for q in range(amnt_qubits // 2)] + [
+                Gate(GatesIdentfications.cnot, [q, amnt_qubits - 1]) for q in range(amnt_qubits)[:-1]]
+            profile = heuristics.calculate_state_profile(circuit,
+                                                         HeuristicsEnumeration.superposition_tracking_heuristic)
+            samples.append((expected.features(circuit, profile, amnt_qubits),
+                            expected.estimate_time(circuit, profile, amnt_qubits)))
+
+        fitted = fit_backend_cost(BackendCost(0, 0, 0, 48, 1.5), samples)
+
+        for c, e in zip(fitted.coefficients(), expected.coefficients()):
+            self.assertAlmostEqual(c, e, delta=e * 1e-6)
+
+    def test_calibrate(self):
+        with tempfile.TemporaryDirectory() as directory:
+            calibration_file = os.path.join(directory, "cost-model.json")
+
+            output = io.StringIO()
+            with redirect_stdout(output):
+                cost_model, heuristic = calibrate(StatevectorSimulator(), iterations=1, max_input_size=1,
+                                                  max_non_det_qubits=2, max_qubits_superposition=3,
+                                                  calibration_file=calibration_file)
+            loaded = CostModel.load(calibration_file)
+
+            self.assertEqual(output.getvalue(), "")
+
+            self.assertEqual(Heuristics(calibration_file).default_heuristic, heuristic)
+            for name, cost in cost_model.backends.items():
+                self.assertTrue(all(c >= 0 for c in cost.coefficients()))
+                self.assertEqual(loaded.backends[name].to_dict(), cost.to_dict())
+            self.assertEqual(CostModel.load(os.path.join(directory, "missing.json")).backends["db"].to_dict(),
+                             CostModel().backends["db"].to_dict())
+
+            # The calibration is only loaded if the file is passed
+            calibrated = MixedSimulator(dense_simulator=StatevectorSimulator(), calibration_file=calibration_file)
+            self.assertEqual(calibrated.cost_model.backends["db"].to_dict(), cost_model.backends["db"].to_dict())
+            self.assertEqual(calibrated.heuristics.default_heuristic, heuristic)
+            uncalibrated = MixedSimulator(dense_simulator=StatevectorSimulator())
+            self.assertEqual(uncalibrated.cost_model.backends["db"].to_dict(), CostModel().backends["db"].to_dict())
+            self.assertEqual(Heuristics().default_heuristic, HeuristicsEnumeration.superposition_tracking_heuristic)
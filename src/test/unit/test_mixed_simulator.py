@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+
+from circuit import addition_circuit
+from gate import Gate, GatesIdentfications
+from simulators.array_simulator.array_simulator import ArraySimulator
+from simulators.mixed_simulator.cost_model import BackendCost, CostModel
+from simulators.mixed_simulator.mixed_simulator import MixedSimulator
+from simulators.mixed_simulator.state_conversion import export_state, sparse_to_dense
+from simulators.statevector_simulator.statevector_simulator import StatevectorSimulator
+
+
+class MixedSimulatorTest(unittest.TestCase):
+
+    def circuit(self, input_size):
+        """
+        :return: The amount of qubits and a circuit which creates all basis states and removes them again, followed by
+        an addition which only permutes the basis states
+        """
+        amnt_qubits = 3 * input_size + 5
+        hadamards = [Gate(GatesIdentfications.hadamard, [q]) for q in range(amnt_qubits)]
+        circuit = hadamards + [Gate(GatesIdentfications.pauliz, [q]) for q in range(0, amnt_qubits, 2)] + hadamards
+        return amnt_qubits, circuit + list(addition_circuit(input_size, 2 * input_size))
+
+    def assert_state(self, mixed_simulator, circuit, amnt_qubits):
+        array_simulator = ArraySimulator()
+        array_simulator.run(circuit, amnt_qubits)
+        state = sparse_to_dense(export_state(mixed_simulator.simulators[mixed_simulator.chosen_simulator], amnt_qubits),
+                                amnt_qubits)
+        self.assertTrue(np.allclose(state, sparse_to_dense(export_state(array_simulator, amnt_qubits), amnt_qubits)))
+
+    def test_mixed_simulator_segments(self):
+        amnt_qubits, circuit = self.circuit(3)
+        cost_model = CostModel()
+        # A larger time per gate of the dense simulator makes the sparse one faster for the addition
+        cost_model.backends["dense"] = BackendCost(1e-4, 8e-9, 2.2e-8, 16, 0, dense=True)
+        mixed_simulator = MixedSimulator(dense_simulator=StatevectorSimulator(), cost_model=cost_model)
+
+        mixed_simulator.run(circuit, amnt_qubits)
+
+        self.assertEqual([b for b, _f, _l in mixed_simulator.segments], ["array", "dense", "array"])
+        self.assertEqual(mixed_simulator.segments[-1][2], len(circuit))
+        self.assertEqual(mixed_simulator.chosen_simulator, "array")
+        self.assert_state(mixed_simulator, circuit, amnt_qubits)
+
+    def test_mixed_simulator_thresholds(self):
+        amnt_qubits, circuit = self.circuit(2)
+        circuit += [Gate(GatesIdentfications.hadamard, [q]) for q in range(amnt_qubits)]
+        mixed_simulator = MixedSimulator(dense_simulator=StatevectorSimulator(), cost_model=CostModel(),
+                                         dense_threshold=0.5)
+
+        mixed_simulator.run(circuit, amnt_qubits)
+
+        backends = [b for b, _f, _l in mixed_simulator.segments]
+        switches = set(zip(backends, backends[1:]))
+        self.assertEqual(switches, {("array", "dense"), ("dense", "array")})
+        self.assertEqual(backends[-1], "dense")
+        self.assertEqual(mixed_simulator.segments[-1][2], len(circuit))
+        self.assert_state(mixed_simulator, circuit, amnt_qubits)
@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+
+from circuit import addition_circuit
+from gate import Gate, GatesIdentfications
+from simulators.array_simulator.array_simulator import ArraySimulator
+from simulators.db_simulator.db_simulator import DBSimulator
+from simulators.db_simulator_state_drop.db_simulator_state_drop import DBSimulatorStateDrop
+from simulators.mixed_simulator.cost_model import CostModel
+from simulators.mixed_simulator.heuristics import Heuristics, HeuristicsEnumeration
+from simulators.mixed_simulator.state_conversion import sparse_to_dense, dense_to_sparse, export_state, import_state
+from simulators.statevector_simulator.statevector_simulator import StatevectorSimulator
+
+
+class StateConversionTest(unittest.TestCase):
+
+    def test_sparse_to_dense(self):
+        bits = np.array([[0, 0, 0], [1, 0, 1], [0, 1, 1]], dtype=np.uint8)
+        amplitudes = np.array([0.5, 0.5j, -np.sqrt(0.5)])
+
+        state = sparse_to_dense([(bits[:2], amplitudes[:2]), (bits[2:], amplitudes[2:])], 3)
+
+        expected = np.zeros(8, dtype=np.complex128)
+        expected[[0, 5, 6]] = amplitudes
+        self.assertTrue(np.allclose(state, expected))
+
+        chunks = list(dense_to_sparse(state, 3, chunk_size=2))
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(np.concatenate([k for k, _a in chunks]).tolist(), [0, 5, 6])
+        self.assertTrue(np.allclose(np.concatenate([a for _b, a in chunks]), amplitudes))
+
+    def test_hand_over_state(self):
+        amnt_qubits = 8
+        first = [Gate(GatesIdentfications.hadamard, [q]) for q in range(3)] + [
+            Gate(GatesIdentfications.cnot, [q, q + 3]) for q in range(3)]
+        second = [Gate(GatesIdentfications.pauliy, [6]), Gate(GatesIdentfications.invert_all_one, [0, 1]),
+                  Gate(GatesIdentfications.diffusion, [0, 1, 2]), Gate(GatesIdentfications.hadamard, [7])]
+        reference = StatevectorSimulator()
+        reference.run(first + second, amnt_qubits)
+
+        simulators = [ArraySimulator(), DBSimulator(), DBSimulatorStateDrop(), StatevectorSimulator()]
+        for source in simulators:
+            for target in simulators:
+                if target is source:
+                    continue
+                source.run(first, amnt_qubits)
+                import_state(target, amnt_qubits, export_state(source, amnt_qubits))
+                target.run(second)
+
+                state = sparse_to_dense(export_state(target, amnt_qubits), amnt_qubits)
+                self.assertTrue(np.allclose(state, reference.get_state()), source.name + " -> " + target.name)
+
+    def test_choose_segments(self):
+        heuristics = Heuristics(calibration_file=None)
+        cost_model = CostModel()
+        input_size = 5
+        amnt_qubits = 3 * input_size + 5
+        circuit = list(addition_circuit(input_size, 2 * input_size))
+        adder = len(circuit)
+        for _i in range(3):
+            circuit.append(Gate(GatesIdentfications.invert_all_zero, range(2 * input_size)))
+            circuit.append(Gate(GatesIdentfications.diffusion, range(amnt_qubits)))
+        profile = heuristics.calculate_state_profile(circuit, HeuristicsEnumeration.superposition_tracking_heuristic)
+
+        segments = cost_model.choose_segments(["db", "array", "dense"], circuit, profile, amnt_qubits)
+
+        # The first oracle is still applied to the sparse state, the first diffusion creates all basis states
+        self.assertEqual(segments, [("array", 0, adder + 1), ("dense", adder + 1, len(circuit))])
+        self.assertEqual(cost_model.choose_segments(["db", "array"], circuit[:adder], profile, amnt_qubits),
+                         [("array", 0, adder)])
@@ -0,0 +1,22 @@
+import unittest
+
+from simulators.qiskit.aer_options import AerOptions
+
+
+class AerOptionsTest(unittest.TestCase):
+
+    def test_aer_options_default(self):
+        aer_options = AerOptions()
+
+        self.assertEqual(aer_options.run_options(), {})
+        self.assertEqual(aer_options.description(), "")
+
+    def test_aer_options(self):
+        aer_options = AerOptions(max_parallel_threads=0, precision="single", fusion_enable=True, fusion_threshold=14)
+
+        self.assertEqual(aer_options.run_options(),
+                         {"max_parallel_threads": 0, "precision": "single", "fusion_enable": True,
+                          "fusion_threshold": 14})
+        self.assertEqual(aer_options.description(),
+                         "max_parallel_threads=0;precision=single;fusion_enable=True;fusion_threshold=14")
+        self.assertRaises(AssertionError, AerOptions, precision="half")
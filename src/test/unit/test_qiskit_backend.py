@@ -4,7 +4,9 @@ import numpy as np
 
 from circuit import Circuit
 from gate import Gate, GatesIdentfications
+from simulators.qiskit.aer_options import AerOptions
 from simulators.qiskit.qiskit_simulator import QiskitSimulator
+from simulators.statevector_simulator.statevector_simulator import StatevectorSimulator
 
 
 class QiskitSimulatorTest(unittest.TestCase):
@@ -36,3 +38,67 @@ class QiskitSimulatorTest(unittest.TestCase):
                 self.assertAlmostEqual(x, np.sqrt(0.5))
             else:
                 self.assertAlmostEqual(x, 0.0)
+
+    def test_qiskit_simulator_circuit_cache(self):
+        qiskit_simulator = QiskitSimulator(circuit_cache_size=1)
+        circuit = Circuit()
+        circuit.set_addition_circuit([0], [1], [2, 3], [4, 5, 6, 7])
+        circuit.prepend_gate(Gate(GatesIdentfications.hadamard, [0]))
+
+        for _i in range(3):
+            qiskit_simulator.run(circuit, 8)
+            state = qiskit_simulator.get_state()
+            # 0 + 0 = 0 and 1 + 0 = 1, written to qubit 2
+            self.assertAlmostEqual(abs(state[0]), np.sqrt(0.5))
+            self.assertAlmostEqual(abs(state[0b101]), np.sqrt(0.5))
+        self.assertEqual(qiskit_simulator.circuit_cache_misses, 1)
+        self.assertEqual(qiskit_simulator.circuit_cache_hits, 2)
+
+        # Appending gates does not change the cached circuit
+        qiskit_simulator.run([Gate(GatesIdentfications.paulix, [7])])
+        self.assertAlmostEqual(abs(qiskit_simulator.get_state()[0b10000000]), np.sqrt(0.5))
+        qiskit_simulator.run(circuit, 8)
+        self.assertAlmostEqual(abs(qiskit_simulator.get_state()[0]), np.sqrt(0.5))
+
+        qiskit_simulator.run([Gate(GatesIdentfications.hadamard, [1])], 8)
+        self.assertEqual(len(qiskit_simulator.circuit_cache), 1)
+        self.assertEqual(qiskit_simulator.circuit_cache_misses, 2)
+
+    def test_qiskit_simulator_inversions(self):
+        amnt_qubits = 3
+        expected_signs = {GatesIdentfications.invert_all_zero: [-1, 1, 1, 1, -1, 1, 1, 1],
+                          GatesIdentfications.invert_some_one: [1, 1, -1, -1, -1, -1, -1, -1],
+                          GatesIdentfications.invert_all_one: [1, 1, 1, 1, 1, 1, -1, -1]}
+        for gatter, signs in expected_signs.items():
+            qiskit_simulator = QiskitSimulator()
+            qubits = [0, 1] if gatter == GatesIdentfications.invert_all_zero else [1, 2]
+            circuit = [Gate(GatesIdentfications.hadamard, [q]) for q in range(amnt_qubits)] + [Gate(gatter, qubits)]
+
+            qiskit_simulator.run(circuit, amnt_qubits)
+
+            for x, sign in zip(qiskit_simulator.get_state(), signs):
+                self.assertAlmostEqual(x, sign * np.sqrt(1 / 2 ** amnt_qubits), delta=10e-7)
+
+    def test_qiskit_simulator_diffusion(self):
+        amnt_qubits = 4
+        circuit = [Gate(GatesIdentfications.hadamard, [0]), Gate(GatesIdentfications.invert_all_one, [0]),
+                   Gate(GatesIdentfications.diffusion, [0, 1])]
+        qiskit_simulator = QiskitSimulator()
+        statevector_simulator = StatevectorSimulator()
+
+        qiskit_simulator.run(circuit, amnt_qubits)
+        statevector_simulator.run(circuit, amnt_qubits)
+
+        # The qiskit diffusion is H (I - 2|0><0|) H, the reflection of the other simulators times a global phase of -1
+        for x, y in zip(qiskit_simulator.get_state(), statevector_simulator.get_state()):
+            self.assertAlmostEqual(x, -y, delta=10e-7)
+
+    def test_qiskit_simulator_single_precision(self):
+        qiskit_simulator = QiskitSimulator(aer_options=AerOptions(max_parallel_threads=1, precision="single"))
+        self.assertEqual(qiskit_simulator.name, "QiskitSimulator[max_parallel_threads=1;precision=single]")
+
+        qiskit_simulator.run([Gate(GatesIdentfications.hadamard, [0])], 2)
+
+        state = qiskit_simulator.get_state()
+        self.assertAlmostEqual(state[0], np.sqrt(0.5), delta=10e-6)
+        self.assertAlmostEqual(state[1], np.sqrt(0.5), delta=10e-6)
@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+
+from gate import Gate, GatesIdentfications
+from simulators.array_simulator.array_simulator import ArraySimulator
+from simulators.reversible_simulator.reversible_simulator import ReversibleSimulator
+
+
+class ReversibleSimulatorTest(unittest.TestCase):
+
+    def test_reversible_simulator_permutation(self):
+        reversible_simulator = ReversibleSimulator()
+
+        amnt_qubits = 100
+        reversible_simulator.init_state(amnt_qubits)
+        reversible_simulator.execute_permutation([Gate(GatesIdentfications.paulix, [0]),
+                                                  Gate(GatesIdentfications.cnot, [0, 70]),
+                                                  Gate(GatesIdentfications.ccnot, [0, 70, 99]),
+                                                  Gate(GatesIdentfications.reset, [0])])
+
+        for state in reversible_simulator.get_state():
+            for i, x in enumerate(state):
+                if i in [70, 99, amnt_qubits]:
+                    self.assertAlmostEqual(x, 1.0, delta=10e-7)
+                else:
+                    self.assertAlmostEqual(x, 0.0, delta=10e-7)
+
+    def test_reversible_simulator_reset_merges_states(self):
+        reversible_simulator = ReversibleSimulator()
+
+        circuit = [Gate(GatesIdentfications.hadamard, [0]), Gate(GatesIdentfications.cnot, [0, 1]),
+                   Gate(GatesIdentfications.reset, [0, 1])]
+        reversible_simulator.run(circuit, 2)
+
+        state = reversible_simulator.get_state()
+        self.assertEqual(len(state), 1)
+        self.assertAlmostEqual(state[0][2], 2 * np.sqrt(0.5), delta=10e-7)
+
+    def test_reversible_simulator_same_as_array_simulator(self):
+        circuit = [Gate(GatesIdentfications.hadamard, [0]), Gate(GatesIdentfications.hadamard, [65]),
+                   Gate(GatesIdentfications.cnot, [65, 1]), Gate(GatesIdentfications.ccnot, [0, 1, 66]),
+                   Gate(GatesIdentfications.pauliy, [1]), Gate(GatesIdentfications.paulix, [0]),
+                   Gate(GatesIdentfications.hadamard, [66]), Gate(GatesIdentfications.ccnot, [66, 0, 2]),
+                   Gate(GatesIdentfications.reset, [65])]
+        reversible_simulator = ReversibleSimulator()
+        array_simulator = ArraySimulator()
+
+        reversible_simulator.run(circuit, 70)
+        array_simulator.run(circuit, 70)
+
+        np.testing.assert_allclose(reversible_simulator.get_state(), array_simulator.get_state(), atol=10e-7)
+
+    def test_reversible_simulator_name(self):
+        self.assertEqual(ReversibleSimulator().name, "ReversibleSimulator")
+        self.assertEqual(ReversibleSimulator(maximum_states=4).name, "ReversibleSimulatorStateDrop")
+        self.assertEqual(ReversibleSimulator(amplitude_cutoff=1e-3).name, "ReversibleSimulatorStateDrop")
@@ -0,0 +1,102 @@
+import unittest
+
+import numpy as np
+
+from circuit import Circuit
+from gate import Gate, GatesIdentfications
+from simulators.statevector_simulator.statevector_simulator import StatevectorSimulator
+
+
+class StatevectorSimulatorTest(unittest.TestCase):
+
+    def test_statevector_simulator_paulix(self):
+        statevector_simulator = StatevectorSimulator()
+        circuit = Circuit()
+        circuit.set_paulix(0)
+
+        statevector_simulator.run(circuit, 2)
+
+        for i, x in enumerate(statevector_simulator.get_state()):
+            if i == 1:
+                self.assertAlmostEqual(x, 1.0, delta=10e-7)
+            else:
+                self.assertAlmostEqual(x, 0.0, delta=10e-7)
+
+    def test_statevector_simulator_hadamard(self):
+        statevector_simulator = StatevectorSimulator()
+        circuit = Circuit()
+        circuit.prepend_gate(Gate(GatesIdentfications.hadamard, [0]))
+
+        statevector_simulator.run(circuit, 2)
+
+        for i, x in enumerate(statevector_simulator.get_state()):
+            if i in [0, 1]:
+                self.assertAlmostEqual(x, np.sqrt(0.5), delta=10e-7)
+            else:
+                self.assertAlmostEqual(x, 0.0, delta=10e-7)
+
+    def test_statevector_simulator_cnot_ccnot(self):
+        statevector_simulator = StatevectorSimulator()
+
+        statevector_simulator.run([Gate(GatesIdentfications.hadamard, [0]), Gate(GatesIdentfications.cnot, [0, 1]),
+                                   Gate(GatesIdentfications.ccnot, [0, 1, 2])], 3)
+
+        for i, x in enumerate(statevector_simulator.get_state()):
+            if i in [0, 7]:
+                self.assertAlmostEqual(x, np.sqrt(0.5), delta=10e-7)
+            else:
+                self.assertAlmostEqual(x, 0.0, delta=10e-7)
+
+    def test_statevector_simulator_pauliy(self):
+        statevector_simulator = StatevectorSimulator()
+
+        statevector_simulator.init_state(1)
+        statevector_simulator.execute_pauliy([0])
+
+        state = statevector_simulator.get_state()
+        self.assertAlmostEqual(state[0], 0.0, delta=10e-7)
+        self.assertAlmostEqual(state[1], 1j, delta=10e-7)
+
+    def test_statevector_simulator_reset(self):
+        statevector_simulator = StatevectorSimulator()
+
+        statevector_simulator.init_with_state(2, [0.0, 0.0, 0.0, 1.0])
+        statevector_simulator.reset_qubits([0, 1])
+
+        for i, x in enumerate(statevector_simulator.get_state()):
+            if i == 0:
+                self.assertAlmostEqual(x, 1.0, delta=10e-7)
+            else:
+                self.assertAlmostEqual(x, 0.0, delta=10e-7)
+
+    def test_statevector_simulator_inversions(self):
+        amnt_qubits = 3
+        expected_signs = {GatesIdentfications.invert_all_zero: [-1, 1, 1, 1, -1, 1, 1, 1],
+                          GatesIdentfications.invert_some_one: [1, 1, -1, -1, -1, -1, -1, -1],
+                          GatesIdentfications.invert_all_one: [1, 1, 1, 1, 1, 1, -1, -1]}
+        for gatter, signs in expected_signs.items():
+            statevector_simulator = StatevectorSimulator()
+            qubits = [0, 1] if gatter == GatesIdentfications.invert_all_zero else [1, 2]
+            circuit = [Gate(GatesIdentfications.hadamard, [q]) for q in range(amnt_qubits)] + [Gate(gatter, qubits)]
+
+            statevector_simulator.run(circuit, amnt_qubits)
+
+            for x, sign in zip(statevector_simulator.get_state(), signs):
+                self.assertAlmostEqual(x, sign * np.sqrt(1 / 2 ** amnt_qubits), delta=10e-7)
+
+    def test_statevector_simulator_grover(self):
+        amnt_qubits = 4
+        marked = 11
+        circuit = [Gate(GatesIdentfications.hadamard, [q]) for q in range(amnt_qubits)]
+        for _i in range(3):
+            flips = [Gate(GatesIdentfications.paulix, [q]) for q in range(amnt_qubits) if not (marked >> q) & 1]
+            circuit += flips + [Gate(GatesIdentfications.invert_all_one, list(range(amnt_qubits)))] + flips
+            circuit.append(Gate(GatesIdentfications.diffusion, list(range(amnt_qubits))))
+        statevector_simulator = StatevectorSimulator()
+
+        statevector_simulator.run(circuit, amnt_qubits)
+
+        probabilities = np.abs(statevector_simulator.get_state()) ** 2
+        self.assertEqual(np.argmax(probabilities), marked)
+        self.assertGreater(probabilities[marked], 0.9)
+        self.assertAlmostEqual(np.sum(probabilities), 1.0, delta=10e-7)